@@ -1,14 +1,28 @@
+import asyncio
 import json
 import re
+import time
 from datetime import datetime
-from groq import Groq
+from groq import AsyncGroq
 import os
 from dotenv import load_dotenv
 
-from tools import TOOLS, TOOL_DESCRIPTIONS
+from tools import TOOLS, ATOOLS, TOOL_DESCRIPTIONS, acurrent_versions
+from cache import request_scope
+from telemetry import METRICS, current_recorder, recording, span
+from config import (
+    AGENT_TOOL_WORKERS, ROUTER_CONFIDENCE, ANSWER_CACHE_TTL_SECONDS, ANSWER_CACHE_MAX_ENTRIES, ANSWER_CACHE_PATH,
+    RESULT_TOKEN_BUDGET, LLM_TIMEOUT_SECONDS, TOOL_TIMEOUT_SECONDS,
+)
+from answer_cache import AnswerCache, answer_key
+from encoder import encode_result, estimate_tokens
+import router
+import runtime
 
 load_dotenv()
-client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+client = AsyncGroq(api_key=os.getenv("GROQ_API_KEY"))
+
+ANSWERS = AnswerCache(ANSWER_CACHE_TTL_SECONDS, ANSWER_CACHE_MAX_ENTRIES, ANSWER_CACHE_PATH or None)
 
 SYSTEM_PROMPT = """You are a Business Intelligence agent for a drone services company.
 You answer founder-level questions about pipeline, deals, work orders, revenue, and sector performance.
@@ -24,6 +38,8 @@ RULES:
 - Only ask clarifying questions when genuinely needed.
 - ONLY call a tool when the user asks a clear business question.
 - When you need data, respond ONLY with valid JSON: {"tool": "tool_name", "params": {}}
+- When a question needs several tool calls that don't depend on each other (e.g. comparing two sectors), request them together in ONE step as a JSON list:
+  [{"tool": "sector_analysis", "params": {"sector": "Mining"}}, {"tool": "sector_analysis", "params": {"sector": "Renewables"}}]
 - Do NOT add any text before or after the JSON when calling a tool.
 - After receiving tool results, give clear business analysis in plain English. Do NOT output JSON.
 - CRITICAL: All monetary values in tool results are already in CRORES. Report them exactly as given. Never multiply or divide.
@@ -44,6 +60,114 @@ RULES:
 
 
 def run_agent(user_message: str, chat_history: list):
+    answer = None
+    for event in run_agent_stream(user_message, chat_history):
+        if event["type"] == "done":
+            answer = event["text"], event["traces"]
+    return answer
+
+
+def run_agent_stream(user_message: str, chat_history: list):
+    """arun_agent_stream for plain threads (Streamlit's script runner).
+
+    The turn runs on the process-wide runtime loop next to every other
+    conversation's; this thread only waits for its events. Closing the
+    generator early (a rerun when the user navigates away) cancels the turn.
+    """
+    return runtime.iterate(arun_agent_stream(user_message, chat_history))
+
+
+async def arun_agent(user_message: str, chat_history: list):
+    # Run the stream to its end, so it closes (and resets its context) in this task
+    answer = None
+    async for event in arun_agent_stream(user_message, chat_history):
+        if event["type"] == "done":
+            answer = event["text"], event["traces"]
+    return answer
+
+
+async def arun_agent_stream(user_message: str, chat_history: list):
+    """Run one agent turn as a stream of events:
+
+    {"type": "trace", "trace": {...}}  after each tool call
+    {"type": "token", "text": "..."}   answer text as Groq generates it
+    {"type": "reset"}                  streamed text turned out to contain a tool call; discard it
+    {"type": "done", "text": ..., "traces": [...]}  the final answer and all traces
+    """
+    # Every tool call in this turn reads the same board snapshots; spans are timed from the turn's start
+    with request_scope(), recording():
+        key = _answer_key(user_message, chat_history)
+        cached = await _cached_answer(key)
+        if cached is not None:
+            age = round(time.time() - cached["stored_at"], 1)
+            traces = [dict(trace, answer_cache_age_seconds=age) for trace in cached["traces"]]
+            for trace in traces:
+                yield {"type": "trace", "trace": trace}
+            yield {"type": "token", "text": cached["text"]}
+            yield {"type": "done", "text": cached["text"], "traces": traces}
+            return
+
+        async for event in _run_agent_stream(user_message, chat_history):
+            if event["type"] == "done":
+                if not _routed(event["traces"]):
+                    # The routed tool failed and the LLM answered with the history in view
+                    key = _history_key(user_message, chat_history)
+                await asyncio.to_thread(_store_answer, key, event["text"], event["traces"])
+            yield event
+
+
+def _route(user_message: str, chat_history: list) -> dict:
+    """The router's decision; it won't route a question that leans on earlier turns in ``chat_history``"""
+    if ROUTER_CONFIDENCE > 1:
+        return {"tool": None}
+    return router.route(user_message, ROUTER_CONFIDENCE, chat_history)
+
+
+def _answer_key(user_message: str, chat_history: list) -> str:
+    """Self-contained questions the router can answer are narrated without earlier turns, so their
+    answers are shared across conversations; others are keyed with the history the LLM sees."""
+    if _route(user_message, chat_history)["tool"] is not None:
+        return answer_key(user_message, [])
+    return _history_key(user_message, chat_history)
+
+
+def _history_key(user_message: str, chat_history: list) -> str:
+    return answer_key(user_message, _build_messages(user_message, chat_history)[1:-1])
+
+
+def _routed(traces: list) -> bool:
+    return bool(traces) and traces[0].get("router", {}).get("routed", False)
+
+
+async def _cached_answer(key: str):
+    """A stored answer whose boards still hold the data it was computed from.
+
+    Checking means loading the boards: within SNAPSHOT_MAX_AGE_SECONDS that is the
+    held snapshot, but at the default of 0 it downloads them (the turn's tools reuse
+    the download on a miss). So a hit then saves the LLM calls, not monday traffic.
+    """
+    entry = await asyncio.to_thread(ANSWERS.get, key)
+    if entry is None:
+        return None
+    try:
+        for data_versions in entry["data_versions"]:
+            expected = {board_id: dep["version"] for board_id, dep in data_versions.items()}
+            if await acurrent_versions(data_versions) != expected:
+                ANSWERS.invalidate(key)
+                return None
+    except Exception:
+        return None
+    return entry
+
+
+def _store_answer(key: str, text: str, traces: list):
+    # Only answers whose every tool result can be fingerprinted are reusable
+    if not text or any(trace.get("error") or "data_versions" not in trace for trace in traces):
+        return
+    ANSWERS.put(key, text, traces, [trace["data_versions"] for trace in traces])
+
+
+def _build_messages(user_message: str, chat_history: list) -> list:
     today = datetime.now().strftime("%B %d, %Y")
     system = SYSTEM_PROMPT.replace("{tool_descriptions}", TOOL_DESCRIPTIONS).replace("{date}", today)
 
@@ -57,63 +181,196 @@ def run_agent(user_message: str, chat_history: list):
         messages.append({"role": role, "content": content})
 
     messages.append({"role": "user", "content": user_message})
+    return messages
+
+
+async def _stream_completion(messages: list, usage: dict = None):
+    """Yield the reply's text deltas; ``usage["prompt_tokens"]`` is set from Groq's final chunk if it reports one"""
+    stream = await client.chat.completions.create(
+        model="llama-3.3-70b-versatile",
+        messages=messages,
+        temperature=0.1,
+        max_tokens=2048,
+        stream=True,
+        timeout=LLM_TIMEOUT_SECONDS,
+    )
+    async for chunk in stream:
+        chunk_usage = getattr(getattr(chunk, "x_groq", None), "usage", None) or getattr(chunk, "usage", None)
+        if usage is not None and chunk_usage is not None:
+            usage["prompt_tokens"] = chunk_usage.prompt_tokens
+            usage["completion_tokens"] = getattr(chunk_usage, "completion_tokens", None)
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
+
+
+def _prompt_tokens(messages: list) -> int:
+    return sum(estimate_tokens(m["content"]) for m in messages)
+
 
+async def _run_agent_stream(user_message: str, chat_history: list):
     traces = []
 
-    for _ in range(5):
-        response = client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
-            messages=messages,
-            temperature=0.1,
-            max_tokens=2048,
-        )
-        response_text = response.choices[0].message.content.strip()
+    # Confident matches call their tool straight away; the LLM only narrates the result
+    decision = _route(user_message, chat_history)
+    routed = False
+    if decision["tool"] is not None:
+        tool_call = {"tool": decision["tool"], "params": decision["params"]}
+        (result, error, spans), = await _run_tools([tool_call])
+        routed = error is None
+    # Only self-contained questions are routed (follow-ups go to the LLM with the history), so a routed
+    # one is narrated without the history and its cached answer can be shared
+    messages = _build_messages(user_message, [] if routed else chat_history)
+    if routed:
+        messages.append({"role": "assistant", "content": json.dumps(tool_call)})
+        messages.append({"role": "user", "content": _results_message([_result_text(tool_call, 1, result)])})
+        traces.append(result.get("trace", {}))
+        traces[-1]["spans"] = spans
+    router.STATS.record(routed)
+    router_trace = {
+        "routed": routed,
+        "source": decision.get("source"),
+        "confidence": decision.get("confidence", 0.0),
+        "hit_rate": round(router.STATS.hit_rate, 3),
+    }
+    if traces:
+        traces[0]["router"] = router_trace
+        yield {"type": "trace", "trace": traces[0]}
 
-        tool_call = _extract_tool_call(response_text)
+    for step in range(5):
+        response_text = ""
+        streaming = False
+        usage = {"prompt_tokens": _prompt_tokens(messages)}
+        with span("llm", step=step + 1) as llm_attrs:
+            async for delta in _stream_completion(messages, usage):
+                response_text += delta
+                if not streaming:
+                    # Tool calls are bare JSON (an object or a list), so only hold text back while it could still be one
+                    if not response_text.strip() or response_text.lstrip().startswith(("{", "[")):
+                        continue
+                    streaming = True
+                    delta = response_text
+                yield {"type": "token", "text": delta}
+            llm_attrs["prompt_tokens"] = usage["prompt_tokens"]
+            llm_attrs["completion_tokens"] = usage.get("completion_tokens") or estimate_tokens(response_text)
+        llm_span = current_recorder().spans[-1]
+        for kind in ("prompt", "completion"):
+            METRICS.count("bi_agent_llm_tokens_total", llm_span[f"{kind}_tokens"], "Groq tokens used", kind=kind)
+        response_text = response_text.strip()
 
-        if not tool_call:
-            return response_text, traces
+        tool_calls = _extract_tool_calls(response_text)
 
-        tool_name = tool_call.get("tool")
-        tool_params = tool_call.get("params", {})
+        if not tool_calls:
+            if not streaming and response_text:
+                yield {"type": "token", "text": response_text}
+            if traces:
+                traces[-1]["answer_prompt_tokens"] = usage["prompt_tokens"]
+                traces[-1].setdefault("spans", []).append(llm_span)
+            yield {"type": "done", "text": response_text, "traces": traces}
+            return
 
-        if tool_name not in TOOLS:
-            return response_text, traces
+        if streaming:
+            yield {"type": "reset"}
 
-        try:
-            result = TOOLS[tool_name](**tool_params)
-            traces.append(result.get("trace", {}))
-            result_str = json.dumps(result.get("data", {}), default=str, indent=2)
-            messages.append({"role": "assistant", "content": json.dumps(tool_call)})
-            messages.append({
-                "role": "user",
-                "content": f"Live results from {tool_name}:\n{result_str}\n\nIMPORTANT: All values ending in '_crores' are already in crores. Report them exactly as shown — do not multiply or divide. Give clear business analysis in plain English. No JSON."
-            })
-        except Exception as e:
-            traces.append({"tool": tool_name, "error": str(e), "params": tool_params})
+        results = []
+        failed = []
+        for i, (tool_call, (result, error, spans)) in enumerate(zip(tool_calls, await _run_tools(tool_calls))):
+            tool_name = tool_call["tool"]
+            tool_params = tool_call.get("params", {})
+            if error is None:
+                results.append(_result_text(tool_call, len(tool_calls), result))
+                traces.append(result.get("trace", {}))
+            else:
+                traces.append({"tool": tool_name, "error": str(error), "params": tool_params})
+                failed.append(f"Tool {_call_label(tool_call, len(tool_calls))} failed: {str(error)}.")
+            traces[-1]["prompt_tokens"] = usage["prompt_tokens"]
+            # The LLM call that asked for this step's tools leads the first one's waterfall
+            traces[-1]["spans"] = ([llm_span] if i == 0 else []) + spans
+            if len(traces) == 1:
+                traces[0]["router"] = router_trace
+            yield {"type": "trace", "trace": traces[-1]}
+
+        if failed:
             messages.append({"role": "assistant", "content": response_text})
             messages.append({
                 "role": "user",
-                "content": f"Tool {tool_name} failed: {str(e)}. Please acknowledge and give whatever analysis you can."
+                "content": "\n\n".join(results + failed) + " Please acknowledge and give whatever analysis you can."
             })
             break
 
-    return response_text, traces
+        messages.append({"role": "assistant", "content": json.dumps(tool_calls[0] if len(tool_calls) == 1 else tool_calls)})
+        messages.append({"role": "user", "content": _results_message(results)})
+
+    yield {"type": "done", "text": response_text, "traces": traces}
 
 
-def _extract_tool_call(text: str):
+async def _run_tools(tool_calls: list) -> list:
+    """Run tool calls concurrently; returns (result, error, spans) per call, in order.
+
+    Each call is a task in a copy of the turn's context, so all of them share the
+    turn's request scope and a board fetched by one call is reused by the rest.
+    At most AGENT_TOOL_WORKERS run at once, each within TOOL_TIMEOUT_SECONDS.
+    """
+    turn = current_recorder()
+    origin = turn.origin if turn is not None else None
+    slots = asyncio.Semaphore(AGENT_TOOL_WORKERS)
+
+    async def run(tool_call):
+        async with slots:
+            with recording(origin) as recorder:
+                try:
+                    with span("tool", tool=tool_call["tool"]):
+                        result = await asyncio.wait_for(
+                            ATOOLS[tool_call["tool"]](**tool_call.get("params", {})), TOOL_TIMEOUT_SECONDS,
+                        )
+                    return result, None, recorder.spans
+                except asyncio.TimeoutError:
+                    error = TimeoutError(f"no result within {TOOL_TIMEOUT_SECONDS:g} seconds")
+                    return None, error, recorder.spans
+                except Exception as e:
+                    return None, e, recorder.spans
+
+    return await asyncio.gather(*(run(tool_call) for tool_call in tool_calls))
+
+
+def _result_text(tool_call: dict, count: int, result: dict) -> str:
+    """Prompt text for one tool result; calls made together split RESULT_TOKEN_BUDGET between them"""
+    offset = int(tool_call.get("params", {}).get("offset") or 0)
+    result_str = encode_result(result.get("data", {}), RESULT_TOKEN_BUDGET // count, offset)
+    result.setdefault("trace", {})["result_tokens"] = estimate_tokens(result_str)
+    return f"Live results from {_call_label(tool_call, count)}:\n{result_str}"
+
+
+def _results_message(results: list) -> str:
+    return (
+        "\n\n".join(results)
+        + "\n\nIMPORTANT: All values ending in '_crores' are already in crores. Report them exactly as shown — do not multiply or divide. Give clear business analysis in plain English. No JSON."
+    )
+
+
+def _call_label(tool_call: dict, count: int) -> str:
+    """Tool name, plus its params when several calls share one message"""
+    if count == 1:
+        return tool_call["tool"]
+    params = ", ".join(f"{k}={v}" for k, v in tool_call.get("params", {}).items() if v)
+    return f"{tool_call['tool']}({params})"
+
+
+def _extract_tool_calls(text: str) -> list:
+    """Tool calls in a reply — one {"tool", "params"} object or a list of them; [] for a plain answer"""
     try:
         parsed = json.loads(text.strip())
-        if "tool" in parsed:
-            return parsed
+        calls = parsed if isinstance(parsed, list) else [parsed]
+        if calls and all(isinstance(c, dict) and c.get("tool") in TOOLS for c in calls):
+            return calls
     except json.JSONDecodeError:
         pass
 
-    match = re.search(r'\{\s*"tool"\s*:\s*"[^"]+"\s*,\s*"params"\s*:\s*\{[^{}]*\}\s*\}', text, re.DOTALL)
-    if match:
+    calls = []
+    for match in re.finditer(r'\{\s*"tool"\s*:\s*"[^"]+"\s*,\s*"params"\s*:\s*\{[^{}]*\}\s*\}', text, re.DOTALL):
         try:
-            return json.loads(match.group())
+            call = json.loads(match.group())
         except json.JSONDecodeError:
-            pass
-
-    return None
\ No newline at end of file
+            continue
+        if call.get("tool") in TOOLS:
+            calls.append(call)
+    return calls
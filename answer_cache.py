@@ -0,0 +1,109 @@
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+def normalize_question(text: str) -> str:
+    """Lowercase, drop punctuation/emoji and collapse whitespace, so trivial rewordings share a key"""
+    return " ".join(re.findall(r"[a-z0-9]+", text.lower()))
+
+
+def answer_key(question: str, history: list) -> str:
+    """Cache key of a question asked after ``history`` (the messages the answer may depend on)"""
+    payload = [normalize_question(question), [[m["role"], normalize_question(m["content"])] for m in history]]
+    return hashlib.sha1(json.dumps(payload).encode()).hexdigest()
+
+
+class AnswerCache:
+    """Final agent answers (text + traces) keyed by answer_key.
+
+    Each entry remembers the data versions it was computed from; callers check
+    them against the boards' current versions before reusing it. Entries expire
+    after ``ttl_seconds`` (0 disables the cache), the least recently used go once
+    there are more than ``max_entries``, and with a ``path`` they are also kept
+    in SQLite so they survive restarts.
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int = 500, path: str = None):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+        if path and ttl_seconds > 0:
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            with self._lock, self._conn:
+                self._conn.execute("PRAGMA journal_mode=WAL")
+                self._conn.execute(
+                    "CREATE TABLE IF NOT EXISTS answers ("
+                    "key TEXT PRIMARY KEY, stored_at REAL NOT NULL, used_at REAL NOT NULL, entry_json TEXT NOT NULL)"
+                )
+
+    def get(self, key: str):
+        """The entry {"text", "traces", "data_versions", "stored_at"} for key, if it hasn't expired"""
+        if self.ttl_seconds <= 0:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None and self._conn is not None:
+                record = self._conn.execute("SELECT entry_json FROM answers WHERE key = ?", (key,)).fetchone()
+                if record is not None:
+                    entry = json.loads(record[0])
+                    self._remember(key, entry)
+            if entry is None:
+                return None
+            if time.time() - entry["stored_at"] > self.ttl_seconds:
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            if self._conn is not None:
+                with self._conn:
+                    self._conn.execute("UPDATE answers SET used_at = ? WHERE key = ?", (time.time(), key))
+            return entry
+
+    def put(self, key: str, text: str, traces: list, data_versions: dict):
+        if self.ttl_seconds <= 0:
+            return
+        entry = {"text": text, "traces": traces, "data_versions": data_versions, "stored_at": time.time()}
+        with self._lock:
+            self._remember(key, entry)
+            if self._conn is not None:
+                with self._conn:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO answers (key, stored_at, used_at, entry_json) VALUES (?, ?, ?, ?)",
+                        (key, entry["stored_at"], entry["stored_at"], json.dumps(entry, default=str)),
+                    )
+                    self._conn.execute(
+                        "DELETE FROM answers WHERE key NOT IN (SELECT key FROM answers ORDER BY used_at DESC LIMIT ?)",
+                        (self.max_entries,),
+                    )
+
+    def invalidate(self, key: str = None):
+        """Drop one answer, or every answer"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+                if self._conn is not None:
+                    with self._conn:
+                        self._conn.execute("DELETE FROM answers")
+                return
+            self._remove(key)
+
+    def _remember(self, key, entry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _remove(self, key):
+        self._entries.pop(key, None)
+        if self._conn is not None:
+            with self._conn:
+                self._conn.execute("DELETE FROM answers WHERE key = ?", (key,))
+
+    def __len__(self):
+        return len(self._entries)
@@ -1,6 +1,23 @@
 import streamlit as st
-from config import validate_config
-from agent import run_agent
+import html
+import time
+from config import validate_config, METRICS_PORT, WEBHOOK_PORT, WEBHOOK_TOKEN, WORK_ORDERS_BOARD_ID, DEALS_BOARD_ID
+from agent import run_agent_stream
+from telemetry import start_metrics_server
+from boards import SERVICE
+from refresher import start_refresher, warm_start
+from webhooks import start_webhook_server
+
+if METRICS_PORT:
+    try:
+        start_metrics_server(METRICS_PORT)
+    except OSError:
+        pass  # another process already serves metrics on this port
+if WEBHOOK_PORT:
+    try:
+        start_webhook_server(WEBHOOK_PORT, WEBHOOK_TOKEN)
+    except OSError:
+        pass  # another process already receives webhooks on this port
 
 st.set_page_config(page_title="BI Agent", page_icon="📊", layout="wide")
 
@@ -34,6 +51,10 @@ section[data-testid="stSidebar"] .stButton > button:hover {
 .sb-section { font-size: 0.6rem; color: #44403c; text-transform: uppercase; letter-spacing: 2px; font-family: 'DM Mono', monospace; padding: 14px 20px 8px; font-weight: 600; }
 .sb-source { display: flex; align-items: center; gap: 8px; padding: 6px 20px; font-size: 0.76rem; color: #78716c; border-bottom: 1px solid #2c2825; }
 .source-dot { width: 6px; height: 6px; background: #22c55e; border-radius: 50%; display: inline-block; animation: blink 3s infinite; }
+.source-dot.warn { background: #f59e0b; }
+.source-dot.down { background: #ef4444; }
+.source-dot.idle { background: #57534e; animation: none; }
+.sb-source-age { margin-left: auto; font-family: 'DM Mono', monospace; font-size: 0.64rem; color: #57534e; }
 @keyframes blink { 0%,100%{opacity:1;} 50%{opacity:0.2;} }
 
 /* TOP BAR */
@@ -62,6 +83,11 @@ section[data-testid="stSidebar"] .stButton > button:hover {
 .empty-sub { font-family: 'DM Mono', monospace; font-size: 0.68rem; color: #c4bdb5; letter-spacing: 1.5px; text-transform: uppercase; }
 
 /* TRACE */
+.waterfall { background: #f8fafc; border: 1px solid #e2e8f0; border-radius: 4px; padding: 8px 12px; font-family: 'DM Mono', monospace; font-size: 0.65rem; color: #334155; margin: 6px 0; }
+.wf-row { display: flex; align-items: center; gap: 8px; height: 16px; }
+.wf-label { width: 42%; white-space: nowrap; overflow: hidden; text-overflow: ellipsis; }
+.wf-track { position: relative; flex: 1; height: 9px; background: #eef2f7; border-radius: 2px; }
+.wf-bar { position: absolute; top: 0; height: 9px; border-radius: 2px; }
 .trace-card { background: #f0fdf4; border: 1px solid #bbf7d0; border-left: 3px solid #22c55e; border-radius: 4px; padding: 10px 14px; font-family: 'DM Mono', monospace; font-size: 0.7rem; color: #15803d; margin: 6px 0; }
 .streamlit-expanderHeader { background: #fafaf9 !important; border: 1px solid #e8e4de !important; border-left: 3px solid #22c55e !important; color: #78716c !important; font-family: 'DM Mono', monospace !important; font-size: 0.68rem !important; }
 
@@ -124,24 +150,107 @@ if "traces" not in st.session_state:
     st.session_state.traces = []  # list of lists: one list of trace-dicts per assistant reply
 
 
+SPAN_COLORS = {
+    "llm": "#a855f7", "tool": "#22c55e", "fetch": "#0ea5e9", "monday.http": "#f59e0b",
+    "monday.json": "#f97316", "normalize": "#3b82f6", "columnar": "#14b8a6", "rollup": "#06b6d4",
+}
+SPAN_DETAILS = [
+    ("tool", "{}"), ("board", "{}"), ("step", "step {}"), ("items", "{} items"), ("cache_hits", "{} cached"),
+    ("shared", "{} shared"), ("items_per_second", "{} items/s"), ("workers", "{} workers"),
+    ("prompt_tokens", "{} prompt tok"), ("completion_tokens", "{} out tok"),
+]
+MAX_SPANS = 40
+
+
+def waterfall_html(trace_list: list) -> str:
+    """Timeline of every span recorded for one reply, in start order"""
+    spans = sorted((s for t in trace_list for s in t.get("spans", [])), key=lambda s: s["start_ms"])
+    if not spans:
+        return ""
+    begin = min(s["start_ms"] for s in spans)
+    total = max(s["start_ms"] + s["duration_ms"] for s in spans) - begin or 1
+    rows = []
+    for s in spans[:MAX_SPANS]:
+        details = [fmt.format(s[key]) for key, fmt in SPAN_DETAILS if s.get(key) is not None]
+        if s.get("bytes"):
+            details.append(f'{s["bytes"] / 1024:.0f} KB')
+        label = f'{s["name"]} {s["duration_ms"]:.0f}ms' + (f' · {", ".join(details)}' if details else "")
+        left = (s["start_ms"] - begin) / total * 100
+        width = max(s["duration_ms"] / total * 100, 0.5)
+        rows.append(
+            f'<div class="wf-row"><span class="wf-label" title="{label}">{label}</span>'
+            f'<span class="wf-track"><span class="wf-bar" style="left:{left:.1f}%;width:{width:.1f}%;'
+            f'background:{SPAN_COLORS.get(s["name"], "#94a3b8")};"></span></span></div>'
+        )
+    more = f'<div>+{len(spans) - MAX_SPANS} more spans</div>' if len(spans) > MAX_SPANS else ""
+    return f'<div class="waterfall">⏱ {total:.0f} ms{"".join(rows)}{more}</div>'
+
+
+def _ago(seconds: float) -> str:
+    if seconds < 60:
+        return f"{seconds:.0f}s ago"
+    if seconds < 3600:
+        return f"{seconds / 60:.0f}m ago"
+    return f"{seconds / 3600:.1f}h ago"
+
+
+def source_html(label: str, board_id) -> str:
+    """Sidebar row for a board: a dot coloured by its last download, and how long ago that was"""
+    health = SERVICE.health(board_id)
+    fetched_at, failed_at = health["fetched_at"], health["failed_at"]
+    if failed_at and (fetched_at is None or failed_at > fetched_at):
+        dot = "warn" if fetched_at else "down"
+        age = f"failing · data {_ago(time.time() - fetched_at)}" if fetched_at else "unreachable"
+        title = health["error"]
+    elif fetched_at is None:
+        dot, age, title = "idle", "not loaded", "Loads with the first question"
+    else:
+        dot, age, title = "", _ago(time.time() - fetched_at), "Last downloaded from monday.com"
+    return (
+        f'<div class="sb-source" title="{html.escape(title or "")}"><span class="source-dot {dot}"></span> {label}'
+        f'<span class="sb-source-age">{age}</span></div>'
+    )
+
+
 def submit_query(query: str):
-    """Run agent and store message + traces atomically."""
+    """Run agent, streaming the reply into the page, then store message + traces atomically."""
     st.session_state.messages.append({"role": "user", "content": query})
     history = [
         {"role": m["role"], "content": m["content"]}
         for m in st.session_state.messages[:-1]
     ]
+    st.markdown(
+        f'<div class="msg-user-label">You</div>'
+        f'<div class="msg-user">{query}</div>',
+        unsafe_allow_html=True,
+    )
+    st.markdown('<div class="msg-agent-label">● BI Agent</div>', unsafe_allow_html=True)
+    answer = st.empty()
+    answer.markdown('<div class="msg-agent">⚡ Fetching live data from monday.com...</div>', unsafe_allow_html=True)
     try:
-        response_text, trace_list = run_agent(query, history)
-        st.session_state.messages.append({"role": "assistant", "content": response_text})
-        # trace_list is already a list of trace dicts from agent.py
-        st.session_state.traces.append(trace_list if trace_list else [])
+        text = ""
+        for event in run_agent_stream(query, history):
+            if event["type"] == "token":
+                text += event["text"]
+                answer.markdown(f'<div class="msg-agent">{text}▌</div>', unsafe_allow_html=True)
+            elif event["type"] == "reset":
+                text = ""
+            elif event["type"] == "trace":
+                answer.markdown(
+                    f'<div class="msg-agent">⚡ {event["trace"].get("tool", "tool")} done · analysing...</div>',
+                    unsafe_allow_html=True,
+                )
+            elif event["type"] == "done":
+                st.session_state.messages.append({"role": "assistant", "content": event["text"]})
+                # traces is already a list of trace dicts from agent.py
+                st.session_state.traces.append(event["traces"] or [])
     except Exception as e:
         st.session_state.messages.append({"role": "assistant", "content": f"⚠️ Error: {str(e)}"})
         st.session_state.traces.append([])
 
 
 # ── SIDEBAR ───────────────────────────────────────────────────────────────────
+pending_query = None  # a clicked quick query; answered below the chat history so it can stream in place
 with st.sidebar:
     st.markdown('<div class="sb-logo"><span class="sb-logo-dot"></span> BI Agent</div>', unsafe_allow_html=True)
     st.markdown('<div class="sb-tagline">monday.com intelligence</div>', unsafe_allow_html=True)
@@ -150,9 +259,17 @@ with st.sidebar:
     if missing:
         st.error(f"⚠️ Missing: {', '.join(missing)}")
     else:
+        warm_start()  # once per process; maps the last snapshot files so the first answer doesn't wait on monday
+        start_refresher()  # once per process; warms both boards before the first question
         st.markdown('<div class="sb-section">Live Sources</div>', unsafe_allow_html=True)
-        st.markdown('<div class="sb-source"><span class="source-dot"></span> Work Orders Board</div>', unsafe_allow_html=True)
-        st.markdown('<div class="sb-source"><span class="source-dot"></span> Deals Board</div>', unsafe_allow_html=True)
+        st.markdown(source_html("Work Orders Board", WORK_ORDERS_BOARD_ID), unsafe_allow_html=True)
+        st.markdown(source_html("Deals Board", DEALS_BOARD_ID), unsafe_allow_html=True)
+        shared = SERVICE.stats()
+        if shared["deduplicated"]:
+            st.markdown(
+                f'<div class="sb-source">⇄ {shared["deduplicated"]} loads shared · {shared["fetches"]} downloads</div>',
+                unsafe_allow_html=True,
+            )
 
     st.markdown('<div class="sb-section">Quick Queries</div>', unsafe_allow_html=True)
     queries = [
@@ -167,9 +284,7 @@ with st.sidebar:
     ]
     for q in queries:
         if st.button(q, key=f"sq_{q}", use_container_width=True):
-            with st.spinner("Fetching live data..."):
-                submit_query(q)
-            st.rerun()
+            pending_query = q
 
     st.markdown("---")
     if st.button("🗑️ Clear", use_container_width=True):
@@ -195,14 +310,20 @@ st.markdown("""
 st.markdown("""
 <div class="hero">
     <div class="hero-title">Ask your data <span>anything.</span></div>
-    <div class="hero-desc">Live business intelligence · monday.com · No caching · Every query is fresh</div>
+    <div class="hero-desc">Live business intelligence · monday.com · Answers reused only while the board data is unchanged · Cached data shows its age</div>
 </div>
 """, unsafe_allow_html=True)
 
+# ── CHAT INPUT ────────────────────────────────────────────────────────────────
+# Read up front (the widget is pinned to the bottom anyway) so the empty state can step aside
+user_input = st.chat_input("Ask a business question...")
+if user_input and user_input.strip():
+    pending_query = user_input
+
 # ── CHAT MESSAGES ─────────────────────────────────────────────────────────────
 st.markdown('<div class="chat-wrap">', unsafe_allow_html=True)
 
-if not st.session_state.messages:
+if not st.session_state.messages and not pending_query:
     st.markdown("""
     <div class="empty-state">
         <div class="empty-big">READY.</div>
@@ -235,6 +356,42 @@ for msg in st.session_state.messages:
                             ", ".join(f"{k}={v}" for k, v in trace.get("params", {}).items() if v)
                             or "no filters"
                         )
+                        if "from_cache" in trace:
+                            cache_html = (
+                                f'<br>data     : cached, {trace.get("data_age_seconds", 0)}s old'
+                                if trace["from_cache"] else "<br>data     : live fetch"
+                            )
+                        else:
+                            cache_html = ""
+                        transfer_html = (
+                            f'<br>transfer : {trace["items_transferred"]} items from monday'
+                            if "items_transferred" in trace else ""
+                        )
+                        quality_html = "".join(
+                            f'<br>quality  : {board} · {col} — {q["invalid"]} unparseable'
+                            for board, cols in trace.get("data_quality", {}).items()
+                            for col, q in cols.items()
+                        )
+                        route = trace.get("router")
+                        router_html = (
+                            f'<br>router   : {"fast path" if route["routed"] else "LLM"} '
+                            f'({route["source"] or "skipped"}, {route["confidence"]:.2f}) · '
+                            f'hit rate {route["hit_rate"] * 100:.0f}%'
+                            if route else ""
+                        )
+                        token_parts = [
+                            f"{label} {trace[key]}"
+                            for key, label in (
+                                ("prompt_tokens", "prompt"), ("result_tokens", "result"),
+                                ("answer_prompt_tokens", "answer prompt"),
+                            )
+                            if key in trace
+                        ]
+                        tokens_html = f'<br>tokens   : {" · ".join(token_parts)}' if token_parts else ""
+                        answer_html = (
+                            f'<br>answer   : cached, {trace["answer_cache_age_seconds"]}s old · data unchanged'
+                            if "answer_cache_age_seconds" in trace else ""
+                        )
                         error_html = (
                             f'<br><span style="color:#ef4444;">⚠ {trace["error"]}</span>'
                             if trace.get("error") else ""
@@ -243,16 +400,17 @@ for msg in st.session_state.messages:
                         <div class="trace-card">
                             <span style="font-weight:600;">▶ {trace.get('tool','unknown')}</span>({params_str})<br>
                             board    : {trace.get('board','N/A')}<br>
-                            returned : {trace.get('records_returned',0)} records{error_html}
+                            returned : {trace.get('records_returned',0)} records{transfer_html}{cache_html}{quality_html}{tokens_html}{router_html}{answer_html}{error_html}
                         </div>
                         """, unsafe_allow_html=True)
+                    waterfall = waterfall_html(trace_list)
+                    if waterfall:
+                        st.markdown(waterfall, unsafe_allow_html=True)
         trace_idx += 1
 
 st.markdown('</div>', unsafe_allow_html=True)
 
-# ── CHAT INPUT ────────────────────────────────────────────────────────────────
-user_input = st.chat_input("Ask a business question...")
-if user_input and user_input.strip():
-    with st.spinner("⚡ Fetching live data from monday.com..."):
-        submit_query(user_input)
+# ── STREAMED REPLY ────────────────────────────────────────────────────────────
+if pending_query:
+    submit_query(pending_query)
     st.rerun()
\ No newline at end of file
@@ -0,0 +1,182 @@
+import argparse
+import json
+import re
+import threading
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from synthetic import LABELS, SyntheticBoard
+
+DEALS_BOARD_ID = "1001"
+WORK_ORDERS_BOARD_ID = "1002"
+
+ALIASED_BOARD = re.compile(r'(\w+): boards\(ids: \[(\w+)\]\)')
+COLUMNS_ONLY = re.compile(r'^\{ (?:complexity \{[^}]*\} )?boards\(ids: \[(\w+)\]\) \{ columns \{ [^}]* \} \} \}$')
+NEXT_PAGE = re.compile(r'next_items_page\(limit: (\d+), cursor: "([^"]+)"\)')
+RULE = re.compile(
+    r'\{column_id: "([^"]+)", compare_value: (\[[^\]]*\]), operator: (\w+)(?:, compare_attribute: "\w+")?\}'
+)
+# Complexity is reported but never runs out, so benchmarks measure our code rather than pacing
+COMPLEXITY = {"before": 10_000_000, "after": 9_999_000, "reset_in_x_seconds": 60}
+
+
+class FakeMonday:
+    """The subset of monday's GraphQL API that monday_api.py uses, over synthetic boards.
+
+    Understands aliased ``boards(ids) { columns items_page(limit, query_params) }``
+    documents, ``next_items_page(limit, cursor)``, column-only board queries,
+    ``column_values(ids: [...])`` projection, ``any_of`` / ``contains_text`` /
+    ``__last_updated__`` rules and the ``complexity`` selection. Anything else
+    is answered with a GraphQL error.
+    """
+
+    def __init__(self, deals: int = 1000, work_orders: int = 1000, seed: int = 7):
+        self.lock = threading.Lock()
+        self.cursors = {}
+        self.requests = 0
+        self.resize(deals, work_orders, seed)
+
+    def resize(self, deals: int, work_orders: int, seed: int = 7):
+        with self.lock:
+            self.boards = {
+                DEALS_BOARD_ID: SyntheticBoard(DEALS_BOARD_ID, "deals", deals, seed),
+                WORK_ORDERS_BOARD_ID: SyntheticBoard(WORK_ORDERS_BOARD_ID, "work_orders", work_orders, seed),
+            }
+            self.cursors.clear()
+            self.requests = 0
+
+    def execute(self, query: str) -> dict:
+        with self.lock:
+            self.requests += 1
+        data = {}
+        if "complexity {" in query:
+            data["complexity"] = COMPLEXITY
+
+        match = NEXT_PAGE.search(query)
+        if match:
+            state = self.cursors.pop(match.group(2), None)
+            if state is None:
+                return {"errors": [{"message": "CursorExpiredError: cursor is not valid"}]}
+            data["next_items_page"] = self._page(state, int(match.group(1)), _fields(query))
+            return {"data": data}
+
+        match = COLUMNS_ONLY.match(query)
+        if match:
+            board = self.boards.get(match.group(1))
+            data["boards"] = [{"columns": board.column_meta()}] if board else []
+            return {"data": data}
+
+        boards = list(ALIASED_BOARD.finditer(query))
+        if not boards:
+            return {"errors": [{"message": "fake monday: unsupported query"}]}
+        for i, match in enumerate(boards):
+            segment = query[match.end():boards[i + 1].start() if i + 1 < len(boards) else len(query)]
+            board = self.boards.get(match.group(2))
+            if board is None:
+                data[match.group(1)] = []
+                continue
+            limit = re.search(r'items_page\(limit: (\d+)', segment)
+            state = {"board": board, "next": 0, "rules": RULE.findall(segment)}
+            data[match.group(1)] = [{
+                "columns": board.column_meta(),
+                "items_page": self._page(state, int(limit.group(1)) if limit else 25, _fields(segment)),
+            }]
+        return {"data": data}
+
+    def _page(self, state: dict, limit: int, fields: tuple) -> dict:
+        board = state["board"]
+        items = []
+        index = state["next"]
+        while index < board.size and len(items) < limit:
+            item = board.item(index)
+            index += 1
+            if _matches(item, state["rules"], board):
+                items.append(_select(item, fields))
+        cursor = None
+        if index < board.size:
+            cursor = uuid.uuid4().hex
+            with self.lock:
+                self.cursors[cursor] = dict(state, next=index)
+        return {"cursor": cursor, "items": items}
+
+
+def _fields(segment: str) -> tuple:
+    """(ids_only, column IDs or None) from an ``items { ... }`` selection"""
+    items = segment[segment.index("items {"):] if "items {" in segment else segment
+    projected = re.search(r'column_values\(ids: \[([^\]]*)\]\)', items)
+    if projected:
+        return False, set(re.findall(r'"([^"]+)"', projected.group(1)))
+    return "column_values" not in items, None
+
+
+def _select(item: dict, fields: tuple) -> dict:
+    ids_only, column_ids = fields
+    if ids_only:
+        return {"id": item["id"]}
+    values = item["column_values"]
+    if column_ids is not None:
+        values = [v for v in values if v["id"] in column_ids]
+    return {"id": item["id"], "name": item["name"], "column_values": values}
+
+
+def _matches(item: dict, rules: list, board: SyntheticBoard) -> bool:
+    texts = {v["id"]: v["text"] for v in item["column_values"]}
+    for column_id, compare_value, operator in rules:
+        compare_value = json.loads(compare_value)
+        if column_id == "__last_updated__":
+            if item["updated_at"] < compare_value[-1]:
+                return False
+        elif operator == "any_of":
+            labels = LABELS.get(board.titles.get(column_id), [])
+            wanted = {labels[i] for i in compare_value if 0 <= i < len(labels)}
+            if texts.get(column_id) not in wanted:
+                return False
+        elif operator == "contains_text":
+            text = texts.get(column_id) or ""
+            if compare_value[0].lower() not in text.lower():
+                return False
+    return True
+
+
+def make_handler(api: FakeMonday):
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            if self.path == "/_bench/boards":
+                api.resize(body.get("deals", 1000), body.get("work_orders", 1000), body.get("seed", 7))
+                result = {"ok": True}
+            elif self.path == "/_bench/stats":
+                result = {"requests": api.requests}
+            else:
+                result = api.execute(body.get("query", ""))
+            payload = json.dumps(result).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def serve(host: str = "127.0.0.1", port: int = 0, deals: int = 1000, work_orders: int = 1000, ready=None):
+    """Run the server until the process ends; ``ready`` (a queue) receives the bound port"""
+    server = ThreadingHTTPServer((host, port), make_handler(FakeMonday(deals, work_orders)))
+    server.daemon_threads = True
+    if ready is not None:
+        ready.put(server.server_address[1])
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local monday.com GraphQL stand-in over synthetic boards")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--deals", type=int, default=1000)
+    parser.add_argument("--work-orders", type=int, default=1000)
+    args = parser.parse_args()
+    print(f"Serving on http://127.0.0.1:{args.port}/v2 "
+          f"(DEALS_BOARD_ID={DEALS_BOARD_ID}, WORK_ORDERS_BOARD_ID={WORK_ORDERS_BOARD_ID})")
+    serve(port=args.port, deals=args.deals, work_orders=args.work_orders)
@@ -0,0 +1,343 @@
+"""Offline benchmarks: every tool in tools.py and end-to-end run_agent, against a
+local monday.com stand-in (fake_monday.py) serving synthetic boards and a stub LLM.
+The agent:concurrent case runs many conversations at once on the async runtime, and
+the ingest:workers=N cases load both boards with N normalization processes (0 is
+serial; boards under NORMALIZE_MIN_ITEMS stay serial whatever N is).
+
+    python benchmarks/run.py                          # 1k and 10k items, compare with baseline.json
+    python benchmarks/run.py --sizes 1000,100000,1000000 --repeats 1
+    python benchmarks/run.py --update-baseline        # record this machine's numbers as the baseline
+
+Results are written as JSON (--output). The exit status is 1 if any case is
+slower or uses more memory than the baseline beyond the tolerances.
+"""
+import argparse
+import asyncio
+import gc
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+import requests
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+from fake_monday import DEALS_BOARD_ID, WORK_ORDERS_BOARD_ID, serve  # noqa: E402
+from stub_llm import StubAsyncGroq  # noqa: E402
+
+DEALS = "deals"
+WORK_ORDERS = "work_orders"
+
+# (tool, params, boards it reads)
+TOOL_CASES = [
+    ("pipeline_summary", {}, (DEALS, WORK_ORDERS)),
+    ("sector_analysis", {"sector": "Mining"}, (DEALS, WORK_ORDERS)),
+    ("revenue_analysis", {}, (WORK_ORDERS,)),
+    ("get_deals", {"status": "Open"}, (DEALS,)),
+    ("get_work_orders", {"sector": "Mining", "status": "Ongoing"}, (WORK_ORDERS,)),
+]
+# (case name, tools.py loader) — one full board snapshot each
+SNAPSHOT_CASES = [
+    ("deals", "fetch_deals"),
+    ("work_orders", "fetch_work_orders"),
+]
+# Normalization worker counts the ingest cases compare
+INGEST_WORKERS = (0, 2, 4)
+# (case name, question) — routed, parallel multi-tool and LLM-chosen paths
+AGENT_CASES = [
+    ("routed", "Overall pipeline summary"),
+    ("compare", "compare Mining and Renewables sector revenue"),
+    ("llm_tool", "how are the open deals looking lately, anything worrying?"),
+]
+# Conversations in flight at once for agent:concurrent (the AGENT_CASES questions, round robin),
+# with the stub model streaming a token every CONCURRENT_TOKEN_LATENCY seconds
+CONCURRENT_CONVERSATIONS = 20
+CONCURRENT_TOKEN_LATENCY = 0.002
+# snapshot:persisted loads both boards through a service that keeps snapshots this long, so it also
+# writes the SQLite store and the snapshot files, as a deployment with a cache max-age does
+PERSISTED_MAX_AGE_SECONDS = 600
+# Board store and snapshot files of the run, removed afterwards
+WORKDIR = tempfile.mkdtemp(prefix="bi-agent-bench-")
+
+
+def _configure_env(port: int):
+    """Point the app at the fake server with every cross-question cache off, before it is imported.
+
+    Everything else is the shipped config, snapshot files included; they go to WORKDIR.
+    """
+    os.environ.update({
+        "MONDAY_API_URL": f"http://127.0.0.1:{port}/v2",
+        "MONDAY_API_KEY": "benchmark",
+        "GROQ_API_KEY": "benchmark",
+        "DEALS_BOARD_ID": DEALS_BOARD_ID,
+        "WORK_ORDERS_BOARD_ID": WORK_ORDERS_BOARD_ID,
+        "SNAPSHOT_MAX_AGE_SECONDS": "0",
+        "SYNC_MODE": "full",
+        "BOARD_STORE_PATH": os.path.join(WORKDIR, "board_store.sqlite3"),
+        "SNAPSHOT_DIR": os.path.join(WORKDIR, "snapshots"),
+        "ANSWER_CACHE_TTL_SECONDS": "0",
+    })
+
+
+def _measure(fn, reset, repeats: int) -> dict:
+    """Median/min/max wall time over ``repeats`` cold runs, plus peak Python heap of one more run"""
+    timings = []
+    for _ in range(repeats):
+        reset()
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    reset()
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "latency_ms": {
+            "median": round(statistics.median(timings) * 1000, 2),
+            "min": round(min(timings) * 1000, 2),
+            "max": round(max(timings) * 1000, 2),
+        },
+        "peak_mb": round(peak / 2 ** 20, 2),
+    }
+
+
+def _rss_mb():
+    """Resident set size of this process in MB, or None where /proc isn't available"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError):
+        return None
+
+
+def _rss_child(loader: str, results):
+    """In a fresh interpreter: RSS growth while one board loads (peak, sampled every 5 ms) and once held"""
+    import tools
+    gc.collect()
+    before = _rss_mb()
+    peak = [before]
+    done = threading.Event()
+
+    def sample():
+        while not done.wait(0.005):
+            peak[0] = max(peak[0], _rss_mb())
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+    held = getattr(tools, loader)()
+    done.set()
+    sampler.join()
+    gc.collect()
+    after = _rss_mb()
+    results.put({"peak_rss_mb": round(max(peak[0], after) - before, 2), "rss_mb": round(after - before, 2),
+                 "rows": len(held)})
+
+
+def _measure_rss(loader: str) -> dict:
+    """Per-snapshot RSS, measured in a child process so earlier cases' heap growth doesn't hide it"""
+    if _rss_mb() is None:
+        return {}
+    results = multiprocessing.Queue()
+    child = multiprocessing.Process(target=_rss_child, args=(loader, results))
+    child.start()
+    measured = results.get(timeout=600)
+    child.join()
+    measured.pop("rows")
+    return measured
+
+
+def _measure_persisted(repeats: int) -> dict:
+    """Both boards downloaded by a service with a cache max-age, a SQLite store and snapshot files.
+
+    Store writes run on a background thread; each run waits for them outside the
+    timing, so one run's writes don't slow the next.
+    """
+    import boards
+    from cache import SnapshotCache
+    from schema import DEALS_SCHEMA, WORK_ORDERS_SCHEMA
+    from store import BoardStore
+
+    service = boards.BoardService(
+        SnapshotCache(PERSISTED_MAX_AGE_SECONDS, 1 << 30),
+        BoardStore(os.path.join(WORKDIR, "persisted.sqlite3")),
+        os.path.join(WORKDIR, "persisted"),
+    )
+    specs = [(DEALS_BOARD_ID, DEALS_SCHEMA, None), (WORK_ORDERS_BOARD_ID, WORK_ORDERS_SCHEMA, None)]
+
+    def settle():
+        service._store_writer.submit(int).result()
+
+    return _measure(lambda: service.load_snapshots(*specs, refresh=True), settle, repeats)
+
+
+def _check_payloads(tools, encoder, budget: int):
+    """Every tool case's result as the LLM sees it: row lists must arrive as tables, nothing as a repr"""
+    for tool, params, _ in TOOL_CASES:
+        data = tools.TOOLS[tool](**params)["data"]
+        payload = encoder.encode_result(data, budget)
+        if " object at 0x" in payload:
+            raise AssertionError(f"{tool}: prompt payload holds an object repr: {payload[:120]}")
+        if not isinstance(data, dict) and json.loads(payload).get("total_rows") != len(data):
+            raise AssertionError(f"{tool}: {type(data).__name__} result was not encoded as a row table")
+
+
+async def _conversations(agent, count: int):
+    questions = [question for _, question in AGENT_CASES]
+    await asyncio.gather(*(agent.arun_agent(questions[i % len(questions)], []) for i in range(count)))
+
+
+def run(sizes: list, repeats: int, server_url: str) -> list:
+    import agent
+    import boards
+    import encoder
+    import ingest
+    import runtime
+    import tools
+
+    agent.client = StubAsyncGroq()
+
+    # Cold board data each run; column IDs stay known, as in a running app, so queries are projected
+    def reset():
+        boards.invalidate_snapshots()
+
+    results = []
+    for size in sizes:
+        requests.post(f"{server_url}/_bench/boards", json={DEALS: size, WORK_ORDERS: size}).raise_for_status()
+        tools.fetch_deals_and_work_orders()  # learn the column IDs once, as the app's first question would
+        reset()
+        _check_payloads(tools, encoder, agent.RESULT_TOKEN_BUDGET)
+        for case, loader in SNAPSHOT_CASES:
+            measured = _measure(getattr(tools, loader), reset, repeats)
+            measured.update(_measure_rss(loader))
+            measured["items_per_sec"] = round(size / (measured["latency_ms"]["median"] / 1000), 1)
+            results.append({"name": f"snapshot:{case}", "size": size, **measured})
+            print(f"{size:>9} snapshot:{case:<14} {measured['latency_ms']['median']:>10.1f} ms "
+                  f"{measured['items_per_sec']:>12.0f} items/s {measured['peak_mb']:>8.1f} MB"
+                  f"  RSS +{measured.get('rss_mb', 0):.1f} MB held, +{measured.get('peak_rss_mb', 0):.1f} MB peak")
+        measured = _measure_persisted(repeats)
+        measured["items_per_sec"] = round(2 * size / (measured["latency_ms"]["median"] / 1000), 1)
+        results.append({"name": "snapshot:persisted", "size": size, **measured})
+        print(f"{size:>9} snapshot:{'persisted':<14} {measured['latency_ms']['median']:>10.1f} ms "
+              f"{measured['items_per_sec']:>12.0f} items/s {measured['peak_mb']:>8.1f} MB")
+        workers = ingest.NORMALIZE_WORKERS
+        for count in INGEST_WORKERS:
+            ingest.NORMALIZE_WORKERS = count
+            tools.fetch_deals_and_work_orders()  # start this pool size's workers outside the timings
+            measured = _measure(tools.fetch_deals_and_work_orders, reset, repeats)
+            measured["items_per_sec"] = round(2 * size / (measured["latency_ms"]["median"] / 1000), 1)
+            case = f"workers={count}"
+            results.append({"name": f"ingest:{case}", "size": size, **measured})
+            print(f"{size:>9} ingest:{case:<16} {measured['latency_ms']['median']:>10.1f} ms "
+                  f"{measured['items_per_sec']:>12.0f} items/s {measured['peak_mb']:>8.1f} MB")
+        ingest.NORMALIZE_WORKERS = workers
+        for tool, params, reads in TOOL_CASES:
+            measured = _measure(lambda: tools.TOOLS[tool](**params), reset, repeats)
+            items = size * len(reads)
+            measured["items_per_sec"] = round(items / (measured["latency_ms"]["median"] / 1000), 1)
+            results.append({"name": f"tool:{tool}", "size": size, **measured})
+            print(f"{size:>9} tool:{tool:<18} {measured['latency_ms']['median']:>10.1f} ms "
+                  f"{measured['items_per_sec']:>12.0f} items/s {measured['peak_mb']:>8.1f} MB")
+        for case, question in AGENT_CASES:
+            measured = _measure(lambda: agent.run_agent(question, []), reset, repeats)
+            measured["questions_per_sec"] = round(1000 / measured["latency_ms"]["median"], 2)
+            results.append({"name": f"agent:{case}", "size": size, **measured})
+            print(f"{size:>9} agent:{case:<17} {measured['latency_ms']['median']:>10.1f} ms "
+                  f"{measured['questions_per_sec']:>12.2f} q/s     {measured['peak_mb']:>8.1f} MB")
+        stub, agent.client = agent.client, StubAsyncGroq(CONCURRENT_TOKEN_LATENCY)
+        measured = _measure(lambda: runtime.run(_conversations(agent, CONCURRENT_CONVERSATIONS)), reset, repeats)
+        agent.client = stub
+        measured["questions_per_sec"] = round(CONCURRENT_CONVERSATIONS * 1000 / measured["latency_ms"]["median"], 2)
+        results.append({"name": "agent:concurrent", "size": size, **measured})
+        case = f"concurrent x{CONCURRENT_CONVERSATIONS}"
+        print(f"{size:>9} agent:{case:<17} {measured['latency_ms']['median']:>10.1f} ms "
+              f"{measured['questions_per_sec']:>12.2f} q/s     {measured['peak_mb']:>8.1f} MB")
+    return results
+
+
+def regressions(results: list, baseline: list, latency_tolerance: float, memory_tolerance: float,
+                slack_ms: float = 5.0) -> list:
+    """Cases slower or hungrier than their baseline entry beyond the tolerances"""
+    previous = {(r["name"], r["size"]): r for r in baseline}
+    found = []
+    for result in results:
+        before = previous.get((result["name"], result["size"]))
+        if before is None:
+            continue
+        latency, limit = result["latency_ms"]["median"], before["latency_ms"]["median"] * latency_tolerance + slack_ms
+        if latency > limit:
+            found.append(f"{result['name']} @ {result['size']}: {latency:.1f} ms > {limit:.1f} ms allowed")
+        for key in ("peak_mb", "rss_mb"):
+            if key not in result or key not in before:
+                continue
+            memory, limit = result[key], before[key] * memory_tolerance + 1
+            if memory > limit:
+                found.append(f"{result['name']} @ {result['size']}: {key} {memory:.1f} MB > {limit:.1f} MB allowed")
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1000,10000", help="comma-separated items per board")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--output", default=os.path.join(HERE, "results.json"))
+    parser.add_argument("--baseline", default=os.path.join(HERE, "baseline.json"))
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--latency-tolerance", type=float, default=1.5, help="allowed slowdown factor")
+    parser.add_argument("--memory-tolerance", type=float, default=1.25, help="allowed peak-memory growth factor")
+    args = parser.parse_args()
+
+    ready = multiprocessing.Queue()
+    server = multiprocessing.Process(target=serve, kwargs={"ready": ready}, daemon=True)
+    server.start()
+    port = ready.get(timeout=10)
+    _configure_env(port)
+
+    try:
+        results = run([int(s) for s in args.sizes.split(",")], args.repeats, f"http://127.0.0.1:{port}")
+    finally:
+        server.terminate()
+        shutil.rmtree(WORKDIR, ignore_errors=True)
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline updated: {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print("No baseline to compare against (run with --update-baseline)")
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)["results"]
+    found = regressions(results, baseline, args.latency_tolerance, args.memory_tolerance)
+    for line in found:
+        print(f"REGRESSION {line}")
+    if not found:
+        print("No regressions against baseline")
+    return 1 if found else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
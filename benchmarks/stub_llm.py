@@ -0,0 +1,79 @@
+import asyncio
+import json
+import time
+from types import SimpleNamespace
+
+# Keyword → tool call the stub "model" answers with, first match wins
+TOOL_CHOICES = [
+    (("compare",), [
+        {"tool": "sector_analysis", "params": {"sector": "Mining"}},
+        {"tool": "sector_analysis", "params": {"sector": "Renewables"}},
+    ]),
+    (("revenue", "billing", "collection", "cash"), {"tool": "revenue_analysis", "params": {}}),
+    (("mining",), {"tool": "sector_analysis", "params": {"sector": "Mining"}}),
+    (("open deals",), {"tool": "get_deals", "params": {"status": "Open"}}),
+    (("work orders",), {"tool": "get_work_orders", "params": {"status": "Ongoing"}}),
+    (("pipeline", "summary", "deals"), {"tool": "pipeline_summary", "params": {}}),
+]
+NARRATION = (
+    "Here is the analysis of the live monday.com data. The figures above are already in crores, "
+    "and the breakdown shows where the pipeline and revenue are concentrated."
+)
+
+
+def _chunk(content=None, usage=None):
+    delta = SimpleNamespace(content=content)
+    return SimpleNamespace(
+        choices=[SimpleNamespace(delta=delta)] if content is not None else [],
+        x_groq=SimpleNamespace(usage=usage) if usage is not None else None,
+    )
+
+
+class StubCompletions:
+    def __init__(self, token_latency: float = 0.0):
+        self.token_latency = token_latency
+        self.calls = 0
+
+    def create(self, messages, stream=False, **kwargs):
+        """Answer like the agent's model would: a tool call for a new question, prose after tool results"""
+        self.calls += 1
+        last = messages[-1]["content"]
+        if last.startswith("Live results") or last.startswith("Tool "):
+            reply = NARRATION
+        else:
+            reply = next(
+                (json.dumps(call) for words, call in TOOL_CHOICES if any(w in last.lower() for w in words)),
+                "Could you tell me which part of the business you're interested in?",
+            )
+        prompt_tokens = sum(len(m["content"]) for m in messages) // 4
+        tokens = [reply[i:i + 4] for i in range(0, len(reply), 4)]
+        if not stream:
+            message = SimpleNamespace(content=reply)
+            return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+        return self._stream(tokens, prompt_tokens)
+
+    def _stream(self, tokens: list, prompt_tokens: int):
+        for token in tokens:
+            if self.token_latency:
+                time.sleep(self.token_latency)
+            yield _chunk(token)
+        yield _chunk(usage=SimpleNamespace(prompt_tokens=prompt_tokens))
+
+
+class StubAsyncCompletions(StubCompletions):
+    async def create(self, messages, stream=False, **kwargs):
+        return super().create(messages, stream=stream, **kwargs)
+
+    async def _stream(self, tokens: list, prompt_tokens: int):
+        for token in tokens:
+            if self.token_latency:
+                await asyncio.sleep(self.token_latency)
+            yield _chunk(token)
+        yield _chunk(usage=SimpleNamespace(prompt_tokens=prompt_tokens))
+
+
+class StubAsyncGroq:
+    """Drop-in for ``groq.AsyncGroq``: the same replies, awaited and streamed asynchronously"""
+
+    def __init__(self, token_latency: float = 0.0):
+        self.chat = SimpleNamespace(completions=StubAsyncCompletions(token_latency))
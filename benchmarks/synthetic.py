@@ -0,0 +1,171 @@
+import json
+import random
+from datetime import date, timedelta
+
+SECTORS = ["Mining", "Renewables", "Railways", "Powerline", "Tender", "DSP", "Construction", "Others"]
+DEAL_STAGES = [
+    "Sales Qualified Leads", "Proposal/Commercials Sent", "Feasibility", "Work Order Received", "Negotiations",
+    "Demo Done", "Lead Generated", "Project Won", "Project Lost", "Projects On Hold",
+]
+DEAL_STATUSES = ["Open", "On Hold", "Dead"]
+EXECUTION_STATUSES = ["Completed", "Not Started", "Ongoing", "Executed until current month", "Pause / struck"]
+BILLING_STATUSES = ["Billed", "Not Billed", "Partially Billed", "biled", "BIlled", "Stuck"]
+INVOICE_STATUSES = ["Fully Billed", "Partially Billed", "Not Billed yet"]
+
+# (column id, title, type); status columns get their labels in settings_str
+DEAL_COLUMNS = [
+    ("status", "Deal Status", "status"),
+    ("status_1", "Deal Stage", "status"),
+    ("color_sector", "Sector/service", "status"),
+    ("numbers_value", "Masked Deal value", "text"),
+    ("numbers_prob", "Closure Probability", "text"),
+    ("date_close", "Close Date (A)", "date"),
+    ("date_tentative", "Tentative Close Date", "date"),
+    ("date_created", "Created Date", "date"),
+    ("text_owner", "Owner code", "text"),
+]
+WORK_ORDER_COLUMNS = [
+    ("color_sector", "Sector", "status"),
+    ("status", "Execution Status", "status"),
+    ("status_billing", "Billing Status", "status"),
+    ("status_invoice", "Invoice Status", "status"),
+    ("numbers_amount", "Amount Incl GST", "text"),
+    ("numbers_billed", "Billed Value Incl GST", "text"),
+    ("numbers_collected", "Collected Amount", "text"),
+    ("numbers_receivable", "Amount Receivable", "text"),
+    ("numbers_to_bill", "Amount to Bill Incl GST", "text"),
+    ("date_delivery", "Data Delivery Date", "date"),
+    ("date_po", "Date of PO/LOI", "date"),
+    ("date_start", "Probable Start Date", "date"),
+    ("date_end", "Probable End Date", "date"),
+    ("date_invoice", "Last invoice date", "date"),
+]
+LABELS = {
+    "Deal Status": DEAL_STATUSES,
+    "Deal Stage": DEAL_STAGES,
+    "Sector/service": SECTORS,
+    "Sector": SECTORS,
+    "Execution Status": EXECUTION_STATUSES,
+    "Billing Status": BILLING_STATUSES,
+    "Invoice Status": INVOICE_STATUSES,
+}
+# Header row the real boards carry as their first item, by board kind
+HEADER_NAMES = {"deals": "Deal Name", "work_orders": "Deal name masked"}
+EPOCH = date(2023, 1, 1)
+
+
+def _indian_grouping(value: int) -> str:
+    """1200000 -> '12,00,000'"""
+    digits = str(value)
+    if len(digits) <= 3:
+        return digits
+    head, tail = digits[:-3], digits[-3:]
+    groups = []
+    while len(head) > 2:
+        groups.insert(0, head[-2:])
+        head = head[:-2]
+    return ",".join(([head] if head else []) + groups) + "," + tail
+
+
+def messy_currency(rng: random.Random, value: float) -> str:
+    """A rupee amount written the way people type them into monday, blanks and junk included"""
+    style = rng.random()
+    if style < 0.08:
+        return rng.choice(["", "N/A", "-", "TBD", "na"])
+    if style < 0.35:
+        return "₹ " + _indian_grouping(int(value))
+    if style < 0.55:
+        return f"{value:,.2f}"
+    if style < 0.65:
+        return f" {_indian_grouping(int(value))} "
+    if style < 0.70:
+        return f"$ {int(value)}"
+    return str(int(value))
+
+
+def messy_date(rng: random.Random) -> str:
+    day = EPOCH + timedelta(days=rng.randrange(900))
+    style = rng.random()
+    if style < 0.05:
+        return rng.choice(["", "TBD", "31/02/2024"])
+    if style < 0.80:
+        return day.isoformat()
+    if style < 0.90:
+        return day.strftime("%d/%m/%Y")
+    return day.strftime("%d %b %Y")
+
+
+class SyntheticBoard:
+    """A synthetic Deals ("deals") or Work Orders ("work_orders") board of ``size`` items.
+
+    Items are generated from their index with a per-item seed, so a board of any
+    size costs no memory until a page of it is requested, and the same
+    (kind, size, seed) always yields the same data.
+    """
+
+    def __init__(self, board_id: str, kind: str, size: int, seed: int = 7):
+        self.board_id = str(board_id)
+        self.kind = kind
+        self.size = size
+        self.seed = seed
+        self.columns = DEAL_COLUMNS if kind == "deals" else WORK_ORDER_COLUMNS
+        self.titles = {col_id: title for col_id, title, _ in self.columns}
+
+    def column_meta(self) -> list:
+        """boards { columns { id title type settings_str } } for this board"""
+        meta = []
+        for col_id, title, col_type in self.columns:
+            settings = {}
+            if col_type == "status":
+                settings = {"labels": {str(i): label for i, label in enumerate(LABELS[title])}}
+            meta.append({"id": col_id, "title": title, "type": col_type, "settings_str": json.dumps(settings)})
+        return meta
+
+    def item(self, index: int) -> dict:
+        """Item ``index`` as monday returns it, plus an "updated_at" day used by __last_updated__ rules"""
+        if index == 0:
+            return {"id": f"{self.board_id}0", "name": HEADER_NAMES[self.kind], "updated_at": EPOCH.isoformat(),
+                    "column_values": [{"id": col_id, "text": title} for col_id, title, _ in self.columns]}
+        rng = random.Random(self.seed * 1_000_003 + index)
+        values = self._deal(rng) if self.kind == "deals" else self._work_order(rng)
+        return {
+            "id": f"{self.board_id}{index}",
+            "name": f"{'Deal' if self.kind == 'deals' else 'WO'}-{index:07d}",
+            "updated_at": (EPOCH + timedelta(days=rng.randrange(900))).isoformat(),
+            "column_values": [{"id": col_id, "text": values.get(title) or None} for col_id, title, _ in self.columns],
+        }
+
+    def _deal(self, rng: random.Random) -> dict:
+        value = rng.lognormvariate(13.5, 1.2)
+        return {
+            "Deal Status": rng.choices(DEAL_STATUSES, [5, 2, 3])[0],
+            "Deal Stage": rng.choice(DEAL_STAGES) if rng.random() > 0.1 else "",
+            "Sector/service": rng.choices(SECTORS, [30, 20, 15, 15, 8, 5, 4, 3])[0],
+            "Masked Deal value": messy_currency(rng, value),
+            "Closure Probability": rng.choice(["High", "Medium", "Low", "", "0.5", "75"]),
+            "Close Date (A)": messy_date(rng) if rng.random() < 0.3 else "",
+            "Tentative Close Date": messy_date(rng),
+            "Created Date": messy_date(rng),
+            "Owner code": f"OWNER_{rng.randrange(12):03d}",
+        }
+
+    def _work_order(self, rng: random.Random) -> dict:
+        amount = rng.lognormvariate(14, 1.1)
+        billed = amount * rng.choice([0, 0.25, 0.5, 1.0, 1.0])
+        collected = billed * rng.choice([0, 0.5, 0.9, 1.0])
+        return {
+            "Sector": rng.choices(SECTORS, [35, 20, 15, 12, 6, 5, 4, 3])[0],
+            "Execution Status": rng.choices(EXECUTION_STATUSES, [45, 15, 25, 10, 5])[0],
+            "Billing Status": rng.choice(BILLING_STATUSES) if rng.random() > 0.2 else "",
+            "Invoice Status": rng.choice(INVOICE_STATUSES) if rng.random() > 0.3 else "",
+            "Amount Incl GST": messy_currency(rng, amount),
+            "Billed Value Incl GST": messy_currency(rng, billed),
+            "Collected Amount": messy_currency(rng, collected),
+            "Amount Receivable": messy_currency(rng, billed - collected),
+            "Amount to Bill Incl GST": messy_currency(rng, amount - billed),
+            "Data Delivery Date": messy_date(rng),
+            "Date of PO/LOI": messy_date(rng),
+            "Probable Start Date": messy_date(rng),
+            "Probable End Date": messy_date(rng),
+            "Last invoice date": messy_date(rng) if billed else "",
+        }
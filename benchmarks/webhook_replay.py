@@ -0,0 +1,114 @@
+"""Replay monday webhook events against the app's webhook receiver (WEBHOOK_PORT).
+
+    python benchmarks/webhook_replay.py --url http://127.0.0.1:8766/ --count 200
+    python benchmarks/webhook_replay.py --file captured.jsonl --rate 5
+
+Without --file, events are generated for the synthetic boards fake_monday.py
+serves (status changes, new items and deletions), so a fake-server session can
+be kept up to date by push. Each --file line is a webhook POST body as monday
+sends it ({"event": {...}}). The challenge handshake is checked first.
+"""
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+from collections import Counter
+
+import requests
+
+from fake_monday import DEALS_BOARD_ID, WORK_ORDERS_BOARD_ID
+from synthetic import LABELS, DEAL_COLUMNS, WORK_ORDER_COLUMNS
+
+# (board id, columns, status column changes are drawn from)
+BOARDS = [
+    (DEALS_BOARD_ID, DEAL_COLUMNS, ["Deal Status", "Deal Stage"]),
+    (WORK_ORDERS_BOARD_ID, WORK_ORDER_COLUMNS, ["Execution Status", "Billing Status"]),
+]
+
+
+def _status_value(title: str, rng: random.Random) -> dict:
+    index = rng.randrange(len(LABELS[title]))
+    return {"label": {"index": index, "text": LABELS[title][index]}, "post_id": None}
+
+
+def synthetic_events(count: int, size: int, seed: int = 11):
+    """``count`` webhook bodies for the synthetic boards: ~70% status changes, then creates and deletes"""
+    rng = random.Random(seed)
+    created = {board_id: size for board_id, _, _ in BOARDS}
+    for _ in range(count):
+        board_id, columns, statuses = rng.choice(BOARDS)
+        ids = {title: col_id for col_id, title, _ in columns}
+        item_id = int(f"{board_id}{rng.randrange(1, size)}")
+        kind = rng.random()
+        if kind < 0.7:
+            title = rng.choice(statuses)
+            event = {
+                "type": "update_column_value", "boardId": int(board_id), "pulseId": item_id,
+                "columnId": ids[title], "columnType": "color", "columnTitle": title, "value": _status_value(title, rng),
+            }
+        elif kind < 0.85:
+            index = created[board_id]
+            created[board_id] += 1
+            event = {
+                "type": "create_pulse", "boardId": int(board_id), "pulseId": int(f"{board_id}{index}"),
+                "pulseName": f"Pushed-{index:07d}",
+                "columnValues": {ids[title]: _status_value(title, rng) for title in statuses},
+            }
+        else:
+            event = {"type": "delete_pulse", "boardId": int(board_id), "itemId": item_id}
+        yield {"event": event}
+
+
+def replay(url: str, bodies, rate: float = 0.0) -> dict:
+    """POST each body to the receiver; returns result counts and latency percentiles"""
+    session = requests.Session()
+    challenge = session.post(url, json={"challenge": "replay-handshake"}, timeout=10)
+    challenge.raise_for_status()
+    if challenge.json().get("challenge") != "replay-handshake":
+        raise RuntimeError(f"challenge not echoed: {challenge.text}")
+
+    results = Counter()
+    latencies = []
+    started = time.perf_counter()
+    for n, body in enumerate(bodies):
+        if rate:
+            time.sleep(max(0.0, started + n / rate - time.perf_counter()))
+        sent = time.perf_counter()
+        response = session.post(url, json=body, timeout=10)
+        latencies.append((time.perf_counter() - sent) * 1000)
+        results[response.json().get("result", "error") if response.ok else f"http {response.status_code}"] += 1
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "events": len(latencies),
+        "results": dict(results),
+        "events_per_sec": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "latency_ms": {
+            "median": round(statistics.median(latencies), 2) if latencies else 0.0,
+            "p95": round(latencies[int(len(latencies) * 0.95)] if latencies else 0.0, 2),
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:8766/", help="webhook URL, including ?token= if set")
+    parser.add_argument("--file", help="JSONL of webhook POST bodies to replay instead of synthetic events")
+    parser.add_argument("--count", type=int, default=100)
+    parser.add_argument("--size", type=int, default=1000, help="items per synthetic board")
+    parser.add_argument("--rate", type=float, default=0.0, help="events per second (0 = as fast as possible)")
+    args = parser.parse_args()
+
+    if args.file:
+        with open(args.file) as f:
+            bodies = [json.loads(line) for line in f if line.strip()]
+    else:
+        bodies = synthetic_events(args.count, args.size)
+    print(json.dumps(replay(args.url, bodies, args.rate), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
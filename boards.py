@@ -0,0 +1,755 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from monday_api import (
+    iter_board_pages, iter_board_item_ids, fetch_first_pages, updated_since_params, projected_item_fields,
+    get_columns, aiter_board_pages, aiter_board_item_ids, afetch_first_pages, aget_columns,
+)
+from filters import parse_column_meta, compile_filters, rules_literal
+from cache import BoardSnapshot, SnapshotCache, covers, snapshot_version
+from compact import ColumnTable
+from store import BoardStore
+from snapshot_file import read_snapshot, snapshot_boards, snapshot_path, write_snapshot
+from schema import BoardSchema
+from ingest import EMPTY_TEXT, normalize_pages, anormalize_pages
+from telemetry import METRICS, span
+from config import (
+    SNAPSHOT_MAX_AGE_SECONDS, SNAPSHOT_CACHE_MAX_MB, SYNC_MODE, RECONCILE_INTERVAL_SECONDS, BOARD_STORE_PATH,
+    REFRESH_INTERVAL_SECONDS, SNAPSHOT_DIR, SNAPSHOT_FILE_MAX_AGE_SECONDS,
+)
+
+
+def merge_delta(base: BoardSnapshot, item_ids: list, rows: list, issues: dict, live_ids: set = None) -> tuple:
+    """Apply changed rows on top of a snapshot, dropping items missing from ``live_ids`` if given"""
+    changed = dict(zip(item_ids, rows))
+    merged_ids = []
+    merged_rows = ColumnTable()
+    for item_id, row in zip(base.item_ids, base.rows):
+        if live_ids is not None and item_id not in live_ids:
+            continue
+        merged_ids.append(item_id)
+        merged_rows.append(changed.pop(item_id, row))
+    merged_ids.extend(changed)
+    for row in changed.values():
+        merged_rows.append(row)
+
+    # Parse issues of changed items are replaced by this delta's; deleted items drop theirs
+    kept = set(merged_ids).difference(item_ids)
+    merged_issues = {}
+    for title, bad in (base.issues or {}).items():
+        merged_issues[title] = {i: text for i, text in bad.items() if i in kept}
+    for title, bad in issues.items():
+        merged_issues.setdefault(title, {}).update(bad)
+    return merged_ids, merged_rows, merged_issues
+
+
+def _union(a, b):
+    return None if a is None or b is None else frozenset(a) | frozenset(b)
+
+
+def _reconciles(base: BoardSnapshot, started: float) -> bool:
+    """True if a delta on ``base`` is due for an ID-only pass to catch deleted items"""
+    return base is not None and started - base.reconciled_at >= RECONCILE_INTERVAL_SECONDS
+
+
+def _resolve(future):
+    if not future.done():
+        future.set_result(None)
+
+
+class _Flight:
+    """One board download in progress; callers needing no more columns wait for it instead.
+
+    Threads wait on ``done``; coroutines await wait_async(), which doesn't block their loop.
+    """
+
+    def __init__(self, columns):
+        self.columns = columns
+        self.done = threading.Event()
+        self.snapshot = None
+        self.error = None
+        self._lock = threading.Lock()
+        self._waiters = []  # (loop, future) of each coroutine awaiting the download
+
+    def serves(self, columns) -> bool:
+        if self.columns is None:
+            return True
+        return columns is not None and self.columns.issuperset(columns)
+
+    async def wait_async(self):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        with self._lock:
+            if self.done.is_set():
+                return
+            self._waiters.append((loop, future))
+        await future
+
+    def finish(self, snapshot, error: BaseException = None):
+        with self._lock:
+            self.snapshot, self.error = snapshot, error
+            self.done.set()
+            waiters, self._waiters = self._waiters, []
+        for loop, future in waiters:
+            loop.call_soon_threadsafe(_resolve, future)
+
+
+class BoardService:
+    """Process-wide owner of board snapshots, shared read-only by every session.
+
+    Streamlit reruns app.py per browser session but imports modules once per
+    process, so the module-level SERVICE below is what all sessions and their
+    tool threads go through. Concurrent loads of a board collapse into one
+    in-flight fetch (single-flight): the first caller downloads it and the
+    others wait for its snapshot, provided it fetches every column they need.
+    """
+
+    def __init__(self, snapshots: SnapshotCache, store: BoardStore = None, files: str = None):
+        self.snapshots = snapshots
+        self.store = store
+        # Store writes run in order on one thread, off the request path; while any are queued the
+        # store may lag the held snapshots, so filters scan memory instead of its indexes
+        self._store_writer = ThreadPoolExecutor(1, thread_name_prefix="board-store") if store is not None else None
+        self._store_pending = 0
+        # {board_id: snapshot} last queued for a full save; an older one still queued is skipped
+        self._store_latest = {}
+        # Directory of memory-mapped snapshot files (see snapshot_file.py); None disables them
+        self.files = files
+        # {board_id: snapshot} mapped from its file at startup: held until the board's first download
+        # attempt ends, then only the fallback while monday fails; never past SNAPSHOT_FILE_MAX_AGE_SECONDS
+        self._warm = {}
+        self._warm_held = set()
+        # {board_id: columns its snapshot file holds}, so a projected download never narrows a wider file
+        self._file_columns = {}
+        # {board_id: {column title: {"id", "type", "labels"}}} from the most recent fetch,
+        # used to project queries and compile filters
+        self.column_meta = {}
+        # Schema each board was last loaded with, to type-parse pushed changes
+        self._schemas = {}
+        self._flights = {}
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._fetches = 0
+        self._deduplicated = 0
+        # {board_id: {"fetched_at", "error", "failed_at"}} — the last download and the last failure
+        self._health = {}
+
+    def stats(self) -> dict:
+        """Boards downloaded, loads that joined another caller's download, and boards downloading now"""
+        with self._lock:
+            return {"fetches": self._fetches, "deduplicated": self._deduplicated, "in_flight": sorted(self._flights)}
+
+    def warm_start(self, boards: list) -> list:
+        """Map the snapshot files of (board_id, schema) boards this process holds nothing for yet.
+
+        Until a download of the board is first attempted, loads are answered from its
+        mapped snapshot (if at most SNAPSHOT_FILE_MAX_AGE_SECONDS old) instead of
+        waiting on monday; the caller starts that download in the background. If it
+        fails, later loads go to monday and only fall back to the mapped snapshot
+        while monday keeps failing. Returns the
+        (board_id, schema, None) boards that were mapped: catching up fetches whole
+        boards, so the files converge on every column.
+        """
+        mapped = []
+        if self.files is None:
+            return mapped
+        for board_id, schema in boards:
+            board_id = str(board_id)
+            if self.snapshots.peek(board_id) is not None or board_id in self._warm:
+                continue
+            with span("snapshot_file", board=schema.name) as attrs:
+                snapshot = read_snapshot(snapshot_path(self.files, board_id))
+                attrs["items"] = len(snapshot.rows) if snapshot is not None else 0
+            if snapshot is None or snapshot.board_id != board_id:
+                continue
+            if snapshot.age_seconds > SNAPSHOT_FILE_MAX_AGE_SECONDS:
+                continue
+            self._schemas[board_id] = schema
+            self._warm[board_id] = snapshot
+            self._warm_held.add(board_id)
+            self._file_columns[board_id] = snapshot.columns
+            with self._lock:
+                self._health.setdefault(board_id, {"fetched_at": snapshot.fetched_at, "error": None, "failed_at": None})
+            mapped.append((board_id, schema, None))
+        return mapped
+
+    def _held(self, board_id):
+        """The cached snapshot of a board, else its mapped startup snapshot until a download is attempted"""
+        snapshot = self.snapshots.get(board_id)
+        if snapshot is None and board_id in self._warm_held:
+            snapshot = self._mapped(board_id)
+            if snapshot is not None:
+                self.snapshots.pin(snapshot)
+        return snapshot
+
+    def _mapped(self, board_id):
+        """The board's mapped startup snapshot, unless it is older than SNAPSHOT_FILE_MAX_AGE_SECONDS"""
+        snapshot = self._warm.get(board_id)
+        if snapshot is None or snapshot.age_seconds > SNAPSHOT_FILE_MAX_AGE_SECONDS:
+            return None
+        return snapshot
+
+    def warm_boards(self) -> list:
+        """IDs of the boards still answered from a mapped startup snapshot (no download has landed yet)"""
+        return sorted(self._warm)
+
+    def health(self, board_id) -> dict:
+        """When a board was last downloaded, and the last failure if one came after that"""
+        with self._lock:
+            return dict(self._health.get(str(board_id), {"fetched_at": None, "error": None, "failed_at": None}))
+
+    def load_snapshots(self, *boards, refresh: bool = False) -> list:
+        """Return (snapshot, from_cache) per (board_id, schema, columns).
+
+        ``columns`` lists the column titles the caller reads (None for all of them);
+        only those columns are requested from monday, and a cached snapshot is reused
+        when it holds at least those columns. A refetch asks for the union of what the
+        cached snapshot had and what is needed now, so tools with different column
+        needs converge on one shared snapshot per board.
+
+        Uncached boards are fetched in one batched request plus pagination follow-ups,
+        unless another caller is already fetching them. In incremental mode a board
+        with an expired snapshot only downloads the items updated since that snapshot,
+        and every RECONCILE_INTERVAL_SECONDS an ID-only pass drops items that were
+        deleted on monday.
+
+        ``refresh`` downloads the boards even if their snapshots are still fresh.
+        Otherwise a failed download falls back to the last good snapshot, expired or
+        not, when one is retained (see SERVICE below).
+        """
+        pending = self._pending(boards)
+        loaded = {}
+        with span("fetch", boards=len(boards)) as attrs:
+            shared = stale = 0
+            while pending:
+                lead, joined, busy = self._claim(pending, loaded, refresh)
+                retry = []
+                if lead:
+                    try:
+                        fetched = self._load(lead, refresh)
+                    except BaseException as e:
+                        fetched = self._recover(lead, e, refresh)
+                        if fetched is None:
+                            raise
+                        stale += len(fetched)
+                    self._land(lead, fetched)
+                    loaded.update(fetched)
+                for board, flight in joined:
+                    flight.done.wait()
+                    shared += self._join(board, flight, loaded, retry)
+                # Fetches that lack some of our columns: wait them out, then look again
+                for board, flight in busy:
+                    flight.done.wait()
+                    retry.append(board)
+                pending = retry
+            self._record(attrs, loaded, shared, stale)
+        return [loaded[str(board_id)] for board_id, _, _ in boards]
+
+    async def aload_snapshots(self, *boards, refresh: bool = False) -> list:
+        """load_snapshots for coroutines: downloads go through the async monday client and
+        waiting on another caller's fetch doesn't block the event loop. Shares single-flight
+        with load_snapshots, so a thread and a coroutine never download the same board twice."""
+        pending = self._pending(boards)
+        loaded = {}
+        with span("fetch", boards=len(boards)) as attrs:
+            shared = stale = 0
+            while pending:
+                lead, joined, busy = self._claim(pending, loaded, refresh)
+                retry = []
+                if lead:
+                    try:
+                        fetched = await self._aload(lead, refresh)
+                    except BaseException as e:
+                        fetched = self._recover(lead, e, refresh)
+                        if fetched is None:
+                            raise
+                        stale += len(fetched)
+                    self._land(lead, fetched)
+                    loaded.update(fetched)
+                for board, flight in joined:
+                    await flight.wait_async()
+                    shared += self._join(board, flight, loaded, retry)
+                for board, flight in busy:
+                    await flight.wait_async()
+                    retry.append(board)
+                pending = retry
+            self._record(attrs, loaded, shared, stale)
+        return [loaded[str(board_id)] for board_id, _, _ in boards]
+
+    def _pending(self, boards) -> list:
+        pending = [(str(board_id), schema, frozenset(columns) if columns is not None else None)
+                   for board_id, schema, columns in boards]
+        for board_id, schema, _ in pending:
+            self._schemas[board_id] = schema
+        return pending
+
+    def _join(self, board, flight: _Flight, loaded: dict, retry: list) -> int:
+        """Take the snapshot of another caller's finished fetch; 1 if it served us.
+
+        A fetch whose caller was cancelled (a closed conversation) isn't our failure: look again.
+        """
+        if isinstance(flight.error, asyncio.CancelledError):
+            retry.append(board)
+            return 0
+        if flight.error is not None:
+            raise flight.error
+        self.snapshots.pin(flight.snapshot)
+        loaded[board[0]] = (flight.snapshot, False)
+        return 1
+
+    def _recover(self, boards: list, error: BaseException, refresh: bool):
+        """After our fetch failed: the last good snapshots to serve instead, or None to raise ``error``"""
+        if not isinstance(error, asyncio.CancelledError):  # our caller gave up; monday didn't fail
+            self._failed(boards, error)
+        fetched = None if refresh or not isinstance(error, Exception) else self._last_good(boards)
+        if fetched is None:
+            self._land(boards, {}, error)
+        return fetched
+
+    def _record(self, attrs: dict, loaded: dict, shared: int, stale: int):
+        attrs["cache_hits"] = sum(hit for _, hit in loaded.values())
+        if shared:
+            attrs["shared"] = shared
+        if stale:
+            attrs["stale"] = stale
+        for _, hit in loaded.values():
+            METRICS.count(
+                "bi_agent_snapshot_lookups_total", 1, "Board snapshot lookups", result="hit" if hit else "miss",
+            )
+        if shared:
+            METRICS.count("bi_agent_fetches_deduplicated_total", shared, "Board loads served by another caller's fetch")
+
+    def _claim(self, pending: list, loaded: dict, refresh: bool = False) -> tuple:
+        """Split boards into (ours to fetch, joining a fetch in flight, waiting on an insufficient one)"""
+        lead, joined, busy = [], [], []
+        with self._lock:
+            for board in pending:
+                board_id, _, columns = board
+                if board_id in loaded or any(b[0] == board_id for b in lead):
+                    continue
+                snapshot = None if refresh else self._held(board_id)
+                if snapshot is not None and covers(snapshot, columns):
+                    loaded[board_id] = (snapshot, True)
+                    continue
+                flight = self._flights.get(board_id)
+                if flight is None:
+                    self._flights[board_id] = _Flight(columns)
+                    lead.append(board)
+                elif flight.serves(columns):
+                    joined.append((board, flight))
+                    self._deduplicated += 1
+                else:
+                    busy.append((board, flight))
+        return lead, joined, busy
+
+    def _land(self, boards: list, fetched: dict, error: BaseException = None):
+        """Hand the result of our fetch to everyone waiting on it"""
+        with self._lock:
+            for board_id, _, _ in boards:
+                self._flights.pop(board_id).finish(fetched.get(board_id, (None, False))[0], error)
+
+    def _failed(self, boards: list, error: BaseException):
+        with self._lock:
+            for board_id, _, _ in boards:
+                # Past the first attempt, questions try monday first and fall back to the mapped copy
+                self._warm_held.discard(board_id)
+                health = self._health.setdefault(board_id, {"fetched_at": None, "error": None, "failed_at": None})
+                health.update(error=str(error) or type(error).__name__, failed_at=time.time())
+
+    def _last_good(self, boards: list):
+        """The retained snapshots of ``boards`` regardless of age, or None unless all of them have one"""
+        fallback = {}
+        for board_id, _, columns in boards:
+            snapshot = self.snapshots.peek(board_id) or self._mapped(board_id)
+            if snapshot is None or not covers(snapshot, columns):
+                return None
+            self.snapshots.pin(snapshot)
+            fallback[board_id] = (snapshot, True)
+        return fallback
+
+    def _restore(self, board_id):
+        """A fresh enough snapshot persisted by an earlier process, so a cold start can answer without monday"""
+        if self.store is None or self.snapshots.peek(board_id) is not None:
+            return None
+        stored_at = self.store.fetched_at(board_id)
+        if stored_at is None or time.time() - stored_at > self.snapshots.max_age_seconds:
+            return None
+        snapshot = self.store.load_snapshot(board_id)
+        self.snapshots.put(snapshot)
+        with self._lock:
+            self._health.setdefault(board_id, {"fetched_at": snapshot.fetched_at, "error": None, "failed_at": None})
+        return snapshot
+
+    def _item_fields(self, board_id, columns) -> str:
+        """Selection fetching only ``columns`` of a board, or every column while its IDs are unknown.
+
+        Titles the board doesn't have are skipped — a full fetch wouldn't return them either.
+        """
+        meta = self.column_meta.get(board_id)
+        if columns is None or meta is None:
+            return projected_item_fields(None)
+        return projected_item_fields({meta[title]["id"] for title in columns if title in meta})
+
+    def _load(self, boards: list, refresh: bool = False) -> dict:
+        """{board_id: (snapshot, from_cache)} for boards this caller has claimed"""
+        loaded, stale = self._plan(boards, refresh)
+        if not stale:
+            return loaded
+        started = time.time()
+        first_pages = fetch_first_pages(**self._first_page_request(stale))
+        for board_id, schema, columns, base in stale:
+            first_page = first_pages[board_id]
+            self.column_meta[board_id] = parse_column_meta(first_page["meta"])
+            pages = iter_board_pages(board_id, first_page=first_page)
+            normalized = normalize_pages(pages, first_page["columns"], schema)
+            live_ids = set(iter_board_item_ids(board_id)) if _reconciles(base, started) else None
+            snapshot = self._settle(board_id, columns, base, first_page, normalized, started, live_ids)
+            loaded[board_id] = (snapshot, False)
+        return loaded
+
+    async def _aload(self, boards: list, refresh: bool = False) -> dict:
+        """_load on the async client; SQLite reads/writes and merging run in worker threads"""
+        loaded, stale = await asyncio.to_thread(self._plan, boards, refresh)
+        if not stale:
+            return loaded
+        started = time.time()
+        first_pages = await afetch_first_pages(**self._first_page_request(stale))
+        for board_id, schema, columns, base in stale:
+            first_page = first_pages[board_id]
+            self.column_meta[board_id] = parse_column_meta(first_page["meta"])
+            pages = aiter_board_pages(board_id, first_page=first_page)
+            normalized = await anormalize_pages(pages, first_page["columns"], schema)
+            live_ids = None
+            if _reconciles(base, started):
+                live_ids = {item_id async for item_id in aiter_board_item_ids(board_id)}
+            snapshot = await asyncio.to_thread(
+                self._settle, board_id, columns, base, first_page, normalized, started, live_ids,
+            )
+            loaded[board_id] = (snapshot, False)
+        return loaded
+
+    def _plan(self, boards: list, refresh: bool = False) -> tuple:
+        """Split claimed boards into ({board_id: (snapshot, True)} already held,
+        [(board_id, schema, columns to fetch, incremental base or None)] to download)"""
+        loaded = {}
+        stale = []
+        for board_id, schema, columns in boards:
+            snapshot = None if refresh else self._held(board_id) or self._restore(board_id)
+            if snapshot is not None and covers(snapshot, columns):
+                loaded[board_id] = (snapshot, True)
+                continue
+            if snapshot is not None:
+                columns = _union(columns, snapshot.columns)
+            base = None
+            if SYNC_MODE == "incremental":
+                # A mapped startup snapshot carries its sync time, so catching up is a delta too
+                base = self.snapshots.peek(board_id) or self._warm.get(board_id)
+                if base is None and self.store is not None:
+                    base = self.store.load_snapshot(board_id)
+            if base is not None and (base.item_ids is None or not covers(base, columns)):
+                base = None
+            if base is not None:
+                # A delta must carry every column the base holds, or unchanged rows would lose them
+                columns = base.columns
+            stale.append((board_id, schema, columns, base))
+        if stale:
+            with self._lock:
+                self._fetches += len(stale)
+        return loaded, stale
+
+    def _first_page_request(self, stale: list) -> dict:
+        """fetch_first_pages arguments covering every board _plan left to download"""
+        return {
+            "board_ids": [board_id for board_id, _, _, _ in stale],
+            "item_fields": {board_id: self._item_fields(board_id, columns) for board_id, _, columns, _ in stale},
+            "query_params": {board_id: updated_since_params(base.fetched_at) for board_id, _, _, base in stale if base},
+        }
+
+    def _settle(self, board_id, columns, base, first_page: dict, normalized: tuple, started: float,
+                live_ids: set = None) -> BoardSnapshot:
+        """Build the snapshot of a downloaded board (merged onto ``base`` for a delta), then cache and persist it"""
+        item_ids, rows, issues = normalized
+        if first_page["fields"] == projected_item_fields(None):
+            columns = None
+        reconciled_at = started
+        if base is not None:
+            if live_ids is None:
+                reconciled_at = base.reconciled_at
+            item_ids, rows, issues = merge_delta(base, item_ids, rows, issues, live_ids)
+            columns = base.columns
+        snapshot = BoardSnapshot(
+            board_id, rows, started, item_ids=item_ids, reconciled_at=reconciled_at, issues=issues,
+            columns=columns,
+        )
+        self.snapshots.put(snapshot)
+        self._warm.pop(board_id, None)
+        self._warm_held.discard(board_id)
+        if self.store is not None:
+            self._store_latest[board_id] = snapshot
+            self._persist(self._save, snapshot)
+        if self.files is not None:
+            self._write_file(snapshot)
+        with self._lock:
+            self._health[board_id] = {"fetched_at": started, "error": None, "failed_at": None}
+        return snapshot
+
+    def _persist(self, write, *args):
+        with self._lock:
+            self._store_pending += 1
+        future = self._store_writer.submit(write, *args)
+        future.add_done_callback(self._persisted)
+        return future
+
+    def _persisted(self, future):
+        with self._lock:
+            self._store_pending -= 1
+        if future.exception() is not None:
+            # The held snapshot is unaffected; the next download rewrites the board
+            METRICS.count("bi_agent_store_errors_total", 1, "Board store writes that failed")
+
+    def _save(self, snapshot: BoardSnapshot):
+        if self._store_latest.get(snapshot.board_id) is snapshot:
+            self.store.save_snapshot(snapshot)
+
+    def _write_file(self, snapshot: BoardSnapshot):
+        """Replace a board's snapshot file, unless the file holds columns this snapshot lacks"""
+        path = snapshot_path(self.files, snapshot.board_id)
+        if snapshot.board_id not in self._file_columns:
+            existing = read_snapshot(path)
+            self._file_columns[snapshot.board_id] = existing.columns if existing is not None else frozenset()
+        if not covers(snapshot, self._file_columns[snapshot.board_id]):
+            return
+        with span("snapshot_file", board=snapshot.board_id, write=True):
+            try:
+                write_snapshot(path, snapshot)
+            except OSError:
+                # The download still counts; the next one rewrites the file
+                METRICS.count("bi_agent_snapshot_file_errors_total", 1, "Snapshot files that failed to write")
+                return
+        self._file_columns[snapshot.board_id] = snapshot.columns
+
+    def apply_item(self, board_id, item_id, values: dict, name: str = None) -> str:
+        """Apply a pushed change to one item of the held snapshot, adding the item if it is new.
+
+        ``values`` maps column IDs to monday's display text for the changed cells.
+        The snapshot is replaced copy-on-write, so requests already holding the old
+        one keep a consistent view. Returns "updated", "created", "ignored" (board
+        not held, or nothing it holds changed) or "invalidated" when the change
+        can't be mapped to columns and the board is dropped to be refetched.
+        """
+        board_id, item_id = str(board_id), str(item_id)
+        with self._write_lock:
+            snapshot = self.snapshots.peek(board_id)
+            schema = self._schemas.get(board_id)
+            if snapshot is None or schema is None or snapshot.item_ids is None:
+                return "ignored"
+            meta = self.column_meta.get(board_id)
+            if meta is None:
+                self.snapshots.invalidate(board_id)
+                return "invalidated"
+            titles = {column["id"]: title for title, column in meta.items()}
+            changed = {}
+            for column_id, text in values.items():
+                title = titles.get(column_id)
+                if title is None or (snapshot.columns is not None and title not in snapshot.columns):
+                    continue  # a column no snapshot of this board carries
+                if text is not None and text.strip() in EMPTY_TEXT:
+                    text = None
+                changed[title] = text
+            try:
+                position = snapshot.item_ids.index(item_id)
+            except ValueError:
+                position = None
+            if name is not None and name in schema.header_names:
+                return "ignored"
+            if position is not None and not changed and name is None:
+                return "ignored"
+
+            issues = {title: dict(bad) for title, bad in (snapshot.issues or {}).items()}
+            for title in changed:
+                issues.get(title, {}).pop(item_id, None)
+            schema.parse_row(item_id, changed, issues)
+            if position is None:
+                held = snapshot.columns if snapshot.columns is not None else meta
+                old_row, row = None, {"name": name or "Unknown", **dict.fromkeys(held), **changed}
+                item_ids, rows = snapshot.item_ids + [item_id], snapshot.rows.appended(row)
+            else:
+                old_row = dict(snapshot.rows[position])
+                row = {**old_row, **changed}
+                if name is not None:
+                    row["name"] = name
+                item_ids, rows = snapshot.item_ids, snapshot.rows.replaced(position, row)
+            self._replace(snapshot, item_ids, rows, issues, old_row, row)
+            if self.store is not None:
+                self._persist(self.store.save_item, board_id, item_id, row, issues)
+        return "created" if position is None else "updated"
+
+    def remove_item(self, board_id, item_id) -> str:
+        """Drop a deleted item from the held snapshot; "ignored" if the board or item isn't held"""
+        board_id, item_id = str(board_id), str(item_id)
+        with self._write_lock:
+            snapshot = self.snapshots.peek(board_id)
+            if snapshot is None or snapshot.item_ids is None or item_id not in snapshot.item_ids:
+                return "ignored"
+            position = snapshot.item_ids.index(item_id)
+            issues = {title: {i: text for i, text in bad.items() if i != item_id}
+                      for title, bad in (snapshot.issues or {}).items()}
+            item_ids = snapshot.item_ids[:position] + snapshot.item_ids[position + 1:]
+            rows = snapshot.rows.without(position)
+            self._replace(snapshot, item_ids, rows, issues, dict(snapshot.rows[position]), None)
+            if self.store is not None:
+                self._persist(self.store.delete_item, board_id, item_id, issues)
+        return "deleted"
+
+    def _replace(self, snapshot: BoardSnapshot, item_ids: list, rows: list, issues: dict, old_row, new_row):
+        """Swap in an edited copy of a snapshot; it keeps the original fetch time, as the rest is no newer.
+
+        Derived structures that can follow a single row change (rollups) are carried
+        over with it; the rest are rebuilt on first use.
+        """
+        edited = BoardSnapshot(
+            snapshot.board_id, rows, snapshot.fetched_at, size_bytes=snapshot.size_bytes, item_ids=item_ids,
+            reconciled_at=snapshot.reconciled_at, columns=snapshot.columns, issues=issues,
+        )
+        for key, value in list(snapshot.derived.items()):
+            if hasattr(value, "updated"):
+                edited.derived[key] = value.updated(old_row, new_row)
+        self.snapshots.put(edited)
+
+    def query_board(self, board_id, schema: BoardSchema, filters: dict) -> tuple:
+        """Rows of a board matching {column title: substring} filters, plus fetch stats.
+
+        A fresh full snapshot answers locally. Otherwise the filters are compiled
+        into items_page rules so monday only sends matching items; filters that
+        can't be expressed as rules are applied to what comes back. Returns
+        (rows, {"from_cache", "data_age_seconds", "items_transferred", "issues", "version"});
+        "version" is the snapshot's content hash, or None for rows fetched with pushdown.
+        """
+        board_id = str(board_id)
+        snapshot = self._held(board_id) or self._restore(board_id)
+        if not any(filters.values()) or (snapshot is not None and covers(snapshot, None)):
+            snapshot, from_cache = self.load_snapshots((board_id, schema, None))[0]
+            return self.filter_rows(snapshot, filters), _snapshot_stats(snapshot, from_cache)
+
+        if board_id not in self.column_meta:
+            self.column_meta[board_id] = parse_column_meta(get_columns(board_id))
+        rules, unmatched, residual = compile_filters(filters, self.column_meta[board_id])
+        stats = {"from_cache": False, "data_age_seconds": 0.0, "items_transferred": 0, "issues": {}, "version": None}
+        if unmatched:
+            return [], stats
+
+        query_params = {board_id: rules_literal(rules)} if rules else None
+        with span("fetch", boards=1, pushdown=True, cache_hits=0):
+            first_page = fetch_first_pages([board_id], query_params=query_params)[board_id]
+            pages = iter_board_pages(board_id, first_page=first_page)
+            _, rows, issues = normalize_pages(pages, first_page["columns"], schema)
+        stats["items_transferred"] = len(rows)
+        stats["issues"] = issues
+        return _residual(rows, residual), stats
+
+    async def aquery_board(self, board_id, schema: BoardSchema, filters: dict) -> tuple:
+        """query_board for coroutines; local filtering and hashing run in a worker thread"""
+        board_id = str(board_id)
+        snapshot = self._held(board_id) or await asyncio.to_thread(self._restore, board_id)
+        if not any(filters.values()) or (snapshot is not None and covers(snapshot, None)):
+            snapshot, from_cache = (await self.aload_snapshots((board_id, schema, None)))[0]
+            rows = await asyncio.to_thread(self.filter_rows, snapshot, filters)
+            return rows, await asyncio.to_thread(_snapshot_stats, snapshot, from_cache)
+
+        if board_id not in self.column_meta:
+            self.column_meta[board_id] = parse_column_meta(await aget_columns(board_id))
+        rules, unmatched, residual = compile_filters(filters, self.column_meta[board_id])
+        stats = {"from_cache": False, "data_age_seconds": 0.0, "items_transferred": 0, "issues": {}, "version": None}
+        if unmatched:
+            return [], stats
+
+        query_params = {board_id: rules_literal(rules)} if rules else None
+        with span("fetch", boards=1, pushdown=True, cache_hits=0):
+            first_page = (await afetch_first_pages([board_id], query_params=query_params))[board_id]
+            pages = aiter_board_pages(board_id, first_page=first_page)
+            _, rows, issues = await anormalize_pages(pages, first_page["columns"], schema)
+        stats["items_transferred"] = len(rows)
+        stats["issues"] = issues
+        return _residual(rows, residual), stats
+
+    def filter_rows(self, snapshot: BoardSnapshot, filters: dict) -> list:
+        """Rows of a snapshot whose columns contain each filter substring (case-insensitive).
+
+        Served from the store's indexes when it holds this exact snapshot with no writes
+        queued, otherwise (and always without filters) from the snapshot in memory.
+        """
+        rows = list(snapshot.rows)
+        if not any(filters.values()):
+            return rows
+        with self._lock:
+            settled = self._store_pending == 0
+        if settled and self.store is not None and self.store.fetched_at(snapshot.board_id) == snapshot.fetched_at:
+            return self.store.query(snapshot.board_id, filters)
+        for title, needle in filters.items():
+            if needle:
+                rows = [r for r in rows if r.get(title) and needle.lower() in str(r[title]).lower()]
+        return rows
+
+    def invalidate(self, board_id=None):
+        self.snapshots.invalidate(board_id)
+        if self.store is not None:
+            if board_id is None:
+                self._store_latest.clear()
+            else:
+                self._store_latest.pop(str(board_id), None)
+            # Behind any queued writes, and waited for, so nothing is restored from the old copy afterwards
+            self._persist(self.store.invalidate, board_id).result()
+        for held in list(self._warm) if board_id is None else [str(board_id)]:
+            self._warm.pop(held, None)
+            self._warm_held.discard(held)
+            self._file_columns.pop(held, None)
+        if self.files is not None:
+            for held in snapshot_boards(self.files) if board_id is None else [str(board_id)]:
+                try:
+                    os.remove(snapshot_path(self.files, held))
+                except OSError:
+                    pass
+
+
+def _snapshot_stats(snapshot: BoardSnapshot, from_cache: bool) -> dict:
+    return {
+        "from_cache": from_cache,
+        "data_age_seconds": snapshot.age_seconds,
+        "items_transferred": 0 if from_cache else len(snapshot.rows),
+        "issues": snapshot.issues,
+        "version": snapshot_version(snapshot),
+    }
+
+
+def _residual(rows, residual: dict) -> list:
+    """Apply the substring filters monday's rules couldn't express; always a list (tools hand it to the encoder)"""
+    rows = list(rows)
+    for title, needle in residual.items():
+        rows = [r for r in rows if r.get(title) and needle.lower() in str(r[title]).lower()]
+    return rows
+
+
+SERVICE = BoardService(
+    # Expired snapshots are kept as the base for the next incremental delta, and with
+    # the background refresher on as the last good copy to serve while monday fails
+    SnapshotCache(
+        SNAPSHOT_MAX_AGE_SECONDS,
+        int(SNAPSHOT_CACHE_MAX_MB * 1024 * 1024),
+        retain_stale=SYNC_MODE == "incremental" or (REFRESH_INTERVAL_SECONDS > 0 and SNAPSHOT_MAX_AGE_SECONDS > 0),
+    ),
+    # Persistent copy of the latest snapshots; an empty BOARD_STORE_PATH disables it. It is only read
+    # back within the cache max-age or as an incremental base, so without either it isn't kept at all
+    BoardStore(BOARD_STORE_PATH) if BOARD_STORE_PATH and (SNAPSHOT_MAX_AGE_SECONDS > 0 or SYNC_MODE == "incremental")
+    else None,
+    # Memory-mapped copies for fast starts; an empty SNAPSHOT_DIR disables them
+    SNAPSHOT_DIR or None,
+)
+
+load_snapshots = SERVICE.load_snapshots
+query_board = SERVICE.query_board
+aload_snapshots = SERVICE.aload_snapshots
+aquery_board = SERVICE.aquery_board
+filter_rows = SERVICE.filter_rows
+invalidate_snapshots = SERVICE.invalidate
@@ -0,0 +1,199 @@
+import hashlib
+import json
+import sys
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+_request_snapshots = ContextVar("request_snapshots", default=None)
+
+
+@dataclass
+class BoardSnapshot:
+    board_id: str
+    rows: list
+    fetched_at: float
+    size_bytes: int = 0
+    item_ids: list = None
+    reconciled_at: float = 0.0
+    # Column titles the rows were fetched with; None means every column of the board
+    columns: frozenset = None
+    # Cells that failed type parsing at ingest: {column title: {item_id: raw text}}
+    issues: dict = None
+    # Structures computed from rows (columnar views etc.), built lazily and shared with the snapshot
+    derived: dict = field(default_factory=dict)
+
+    @property
+    def age_seconds(self) -> float:
+        return time.time() - self.fetched_at
+
+
+def covers(snapshot: BoardSnapshot, columns) -> bool:
+    """True if the snapshot holds every column in ``columns`` (None asks for all of them)"""
+    if snapshot.columns is None:
+        return True
+    return columns is not None and snapshot.columns.issuperset(columns)
+
+
+class _ContentHash:
+    """Order-independent hash of a snapshot's rows (limited to ``titles``): the sum of one digest per row.
+
+    A row change moves the sum by that row alone, so an edited snapshot (see
+    BoardService._replace, which carries anything with ``updated`` over) gets its
+    version without rehashing the board.
+    """
+
+    __slots__ = ("titles", "total")
+    MODULUS = 1 << 160
+
+    def __init__(self, titles, total: int = 0):
+        self.titles = titles
+        self.total = total
+
+    @classmethod
+    def of(cls, rows, titles) -> "_ContentHash":
+        version = cls(titles)
+        version.total = sum(version._digest(row) for row in rows) % cls.MODULUS
+        return version
+
+    def _digest(self, row) -> int:
+        if self.titles is not None:
+            values = [row.get(title) for title in self.titles]
+        else:
+            # Empty cells are left out, so a column another row added doesn't change this row's digest
+            values = sorted((title, value) for title, value in row.items() if value is not None)
+        return int.from_bytes(hashlib.sha1(json.dumps(values, default=str).encode()).digest(), "big")
+
+    def updated(self, old_row, new_row) -> "_ContentHash":
+        total = self.total
+        if old_row is not None:
+            total -= self._digest(old_row)
+        if new_row is not None:
+            total += self._digest(new_row)
+        return _ContentHash(self.titles, total % self.MODULUS)
+
+    def hexdigest(self) -> str:
+        return format(self.total, "040x")
+
+
+def snapshot_version(snapshot: BoardSnapshot, columns=None) -> str:
+    """Content hash of a snapshot's rows, limited to ``columns`` (None for every column).
+
+    Two fetches of unchanged board data hash the same, so this identifies the data
+    itself rather than when it was fetched. Memoized per column set on the snapshot,
+    and kept current through pushed row changes.
+    """
+    key = ("version", frozenset(columns) if columns is not None else None)
+    version = snapshot.derived.get(key)
+    if version is None:
+        titles = sorted(columns) if columns is not None else None
+        version = snapshot.derived[key] = _ContentHash.of(snapshot.rows, titles)
+    return version.hexdigest()
+
+
+def estimate_size(rows) -> int:
+    """Rough in-memory footprint of normalized rows (row dicts + their values; keys are shared)"""
+    if hasattr(rows, "nbytes"):  # a compact ColumnTable
+        return rows.nbytes
+    size = sys.getsizeof(rows)
+    for row in rows:
+        size += sys.getsizeof(row) + sum(sys.getsizeof(v) for v in row.values())
+    return size
+
+
+@contextmanager
+def request_scope():
+    """Pin every snapshot loaded inside the block, so one agent turn sees one consistent
+    copy of each board no matter how many tools it calls or what max_age is."""
+    token = _request_snapshots.set({})
+    try:
+        yield
+    finally:
+        _request_snapshots.reset(token)
+
+
+class SnapshotCache:
+    """Board snapshots keyed by board ID.
+
+    Entries older than ``max_age_seconds`` are treated as misses (0 disables the
+    cross-turn cache entirely), and the least recently used boards are evicted
+    once the total estimated size passes ``max_bytes``. With ``retain_stale`` the
+    expired entries are kept (see peek) as the base for an incremental sync.
+    """
+
+    def __init__(self, max_age_seconds: float = 0, max_bytes: int = 256 * 1024 * 1024, retain_stale: bool = False):
+        self.max_age_seconds = max_age_seconds
+        self.max_bytes = max_bytes
+        self.retain_stale = retain_stale
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, board_id):
+        board_id = str(board_id)
+        scoped = _request_snapshots.get()
+        if scoped is not None and board_id in scoped:
+            return scoped[board_id]
+        with self._lock:
+            snapshot = self._entries.get(board_id)
+            if snapshot is None:
+                return None
+            if snapshot.age_seconds > self.max_age_seconds:
+                if not self.retain_stale:
+                    self._remove(board_id)
+                return None
+            self._entries.move_to_end(board_id)
+        if scoped is not None:
+            scoped[board_id] = snapshot
+        return snapshot
+
+    def put(self, snapshot: BoardSnapshot):
+        if not snapshot.size_bytes:
+            snapshot.size_bytes = estimate_size(snapshot.rows)
+        scoped = _request_snapshots.get()
+        if scoped is not None:
+            scoped[snapshot.board_id] = snapshot
+        if (self.max_age_seconds <= 0 and not self.retain_stale) or snapshot.size_bytes > self.max_bytes:
+            return
+        with self._lock:
+            self._remove(snapshot.board_id)
+            self._entries[snapshot.board_id] = snapshot
+            self._bytes += snapshot.size_bytes
+            while self._bytes > self.max_bytes and self._entries:
+                self._remove(next(iter(self._entries)))
+
+    def pin(self, snapshot: BoardSnapshot):
+        """Add a snapshot loaded elsewhere (another caller's fetch) to the current request scope only"""
+        scoped = _request_snapshots.get()
+        if scoped is not None:
+            scoped[snapshot.board_id] = snapshot
+
+    def peek(self, board_id):
+        """Return the stored snapshot for a board regardless of its age"""
+        with self._lock:
+            return self._entries.get(str(board_id))
+
+    def invalidate(self, board_id=None):
+        """Drop one board (or every board) from the cache and the current request scope"""
+        scoped = _request_snapshots.get()
+        with self._lock:
+            if board_id is None:
+                self._entries.clear()
+                self._bytes = 0
+                if scoped is not None:
+                    scoped.clear()
+                return
+            self._remove(str(board_id))
+            if scoped is not None:
+                scoped.pop(str(board_id), None)
+
+    def _remove(self, board_id):
+        snapshot = self._entries.pop(board_id, None)
+        if snapshot is not None:
+            self._bytes -= snapshot.size_bytes
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,278 @@
+from array import array
+from collections.abc import Mapping, Sequence
+
+NAN = float("nan")
+
+
+def _typecode(labels: int) -> str:
+    """Smallest unsigned array type able to hold codes for ``labels`` distinct values"""
+    return "B" if labels <= 1 << 8 else "H" if labels <= 1 << 16 else "I"
+
+
+def _copied(data) -> array:
+    """A writable array copy of an array or of a read-only typed memoryview (a mapped snapshot file)"""
+    return array(data.typecode if isinstance(data, array) else data.format, data.tobytes())
+
+
+class _Column:
+    """One column of a ColumnTable.
+
+    Starts as a float64 array (None stored as NaN) and switches for good to
+    dictionary encoding — codes into a label list — at the first value that
+    isn't a float. Label lists only ever grow, so copies of a column can share
+    them: a copy never sees codes it didn't write. ``floats``/``codes`` may also
+    be read-only memoryviews over a snapshot file; edits go through copy() anyway.
+    """
+
+    __slots__ = ("floats", "codes", "labels", "lookup")
+
+    def __init__(self, size: int = 0):
+        self.floats = array("d", [NAN]) * size
+        self.codes = None
+        self.labels = None
+        self.lookup = None
+
+    @classmethod
+    def from_buffer(cls, data, labels: list = None) -> "_Column":
+        column = cls()
+        if labels is None:
+            column.floats = data
+        else:
+            # The lookup is only needed to add values, so it is built on the first copy()
+            column.floats, column.codes, column.labels = None, data, labels
+        return column
+
+    def copy(self) -> "_Column":
+        column = _Column()
+        if self.codes is None:
+            column.floats = _copied(self.floats)
+        else:
+            if self.lookup is None:
+                self.lookup = {label: code for code, label in enumerate(self.labels)}
+            column.floats = None
+            column.codes = _copied(self.codes)
+            column.labels, column.lookup = self.labels, self.lookup
+        return column
+
+    def _code(self, value) -> int:
+        code = self.lookup.get(value)
+        if code is None:
+            code = self.lookup[value] = len(self.labels)
+            self.labels.append(value)
+            if code >= 1 << (8 * self.codes.itemsize):
+                self.codes = array(_typecode(code + 1), self.codes)
+        return code
+
+    def _encode(self):
+        self.labels, self.lookup = [None], {None: 0}
+        floats, self.floats = self.floats, None
+        self.codes = array("B")
+        for v in floats:
+            code = self._code(None if v != v else v)
+            self.codes.append(code)
+
+    def _fits(self, value) -> bool:
+        return self.codes is not None or value is None or type(value) is float
+
+    def append(self, value):
+        if not self._fits(value):
+            self._encode()
+        if self.codes is None:
+            self.floats.append(NAN if value is None else value)
+        else:
+            code = self._code(value)  # may widen self.codes, so look it up afterwards
+            self.codes.append(code)
+
+    def extend(self, other: "_Column"):
+        """Append every value of another column, translating its codes into this column's labels"""
+        if other.codes is not None and self.codes is None:
+            self._encode()
+        if self.codes is None:
+            self.floats.extend(other.floats)
+            return
+        if other.codes is None:
+            codes = [self._code(None if v != v else v) for v in other.floats]
+        else:
+            mapping = [self._code(label) for label in other.labels]
+            codes = [mapping[code] for code in other.codes]
+        self.codes.extend(codes)  # after the lookups, which may have widened self.codes
+
+    def set(self, index: int, value):
+        if not self._fits(value):
+            self._encode()
+        if self.codes is None:
+            self.floats[index] = NAN if value is None else value
+        else:
+            code = self._code(value)
+            self.codes[index] = code
+
+    def delete(self, index: int):
+        del (self.floats if self.codes is None else self.codes)[index]
+
+    def get(self, index: int):
+        if self.codes is None:
+            value = self.floats[index]
+            return None if value != value else value
+        return self.labels[self.codes[index]]
+
+    def values(self) -> list:
+        if self.codes is None:
+            return [None if v != v else v for v in self.floats]
+        labels = self.labels
+        return [labels[code] for code in self.codes]
+
+    @property
+    def data(self):
+        """The float or code array (or memoryview) backing the column"""
+        return self.floats if self.codes is None else self.codes
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.data) * self.data.itemsize
+
+
+class RowView(Mapping):
+    """Read-only dict-like view of one row of a ColumnTable; dict(view) copies it out"""
+
+    __slots__ = ("_table", "_index")
+
+    def __init__(self, table: "ColumnTable", index: int):
+        self._table = table
+        self._index = index
+
+    def __getitem__(self, title):
+        column = self._table.columns.get(title)
+        if column is None:
+            raise KeyError(title)
+        return column.get(self._index)
+
+    def get(self, title, default=None):
+        column = self._table.columns.get(title)
+        if column is None:
+            return default
+        return column.get(self._index)
+
+    def __contains__(self, title):
+        return title in self._table.columns
+
+    def __iter__(self):
+        return iter(self._table.columns)
+
+    def __len__(self):
+        return len(self._table.columns)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+class ColumnTable(Sequence):
+    """Rows of a board stored column by column under one shared list of titles.
+
+    Numeric cells live in float64 arrays and everything else (sectors,
+    statuses, stages, names, dates) is dictionary-encoded, so a board costs a
+    few bytes per cell instead of a dict per row. Indexing yields RowView
+    objects, so code written against row dicts keeps working. Tables are
+    never modified once shared: the edit methods return an edited copy.
+    """
+
+    def __init__(self):
+        self.columns = {}
+        self.size = 0
+
+    @classmethod
+    def from_rows(cls, rows) -> "ColumnTable":
+        table = cls()
+        for row in rows:
+            table.append(row)
+        return table
+
+    def append(self, row: Mapping):
+        """Add a row while the table is being built (before it is shared)"""
+        for title in row:
+            if title not in self.columns:
+                self.columns[title] = _Column(self.size)
+        for title, column in self.columns.items():
+            column.append(row.get(title))
+        self.size += 1
+
+    def extend(self, other: "ColumnTable"):
+        """Add another table's rows while this one is being built (e.g. chunks normalized elsewhere)"""
+        for title in other.columns:
+            if title not in self.columns:
+                self.columns[title] = _Column(self.size)
+        for title, column in self.columns.items():
+            column.extend(other.columns.get(title) or _Column(other.size))
+        self.size += other.size
+
+    @classmethod
+    def from_buffers(cls, size: int, buffers) -> "ColumnTable":
+        """Table over existing column data: (title, float or code buffer, labels or None for floats) triples"""
+        table = cls()
+        table.columns = {title: _Column.from_buffer(data, labels) for title, data, labels in buffers}
+        table.size = size
+        return table
+
+    def buffers(self):
+        """(title, float or code array, labels or None) per column — the inverse of from_buffers"""
+        for title, column in self.columns.items():
+            yield title, column.data, column.labels
+
+    def values(self, title: str) -> list:
+        """Every value of one column, in row order (Nones where the column is empty)"""
+        column = self.columns.get(title)
+        return column.values() if column is not None else [None] * self.size
+
+    def _copy(self) -> "ColumnTable":
+        table = ColumnTable()
+        table.columns = {title: column.copy() for title, column in self.columns.items()}
+        table.size = self.size
+        return table
+
+    def replaced(self, index: int, row: Mapping) -> "ColumnTable":
+        table = self._copy()
+        for title in row:
+            if title not in table.columns:
+                table.columns[title] = _Column(table.size)
+        for title, column in table.columns.items():
+            column.set(index, row.get(title))
+        return table
+
+    def appended(self, row: Mapping) -> "ColumnTable":
+        table = self._copy()
+        table.append(row)
+        return table
+
+    def without(self, index: int) -> "ColumnTable":
+        table = self._copy()
+        for column in table.columns.values():
+            column.delete(index)
+        table.size -= 1
+        return table
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the column arrays and the distinct labels (shared strings counted once)"""
+        size = 0
+        seen = set()
+        for column in self.columns.values():
+            size += column.nbytes
+            if column.labels is not None and id(column.labels) not in seen:
+                seen.add(id(column.labels))
+                size += sum(len(label) + 49 if isinstance(label, str) else 24 for label in column.labels)
+        return size
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [RowView(self, i) for i in range(*index.indices(self.size))]
+        if index < 0:
+            index += self.size
+        if not 0 <= index < self.size:
+            raise IndexError(index)
+        return RowView(self, index)
+
+    def __iter__(self):
+        for index in range(self.size):
+            yield RowView(self, index)
@@ -8,6 +8,75 @@ GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 WORK_ORDERS_BOARD_ID = os.getenv("WORK_ORDERS_BOARD_ID")
 DEALS_BOARD_ID = os.getenv("DEALS_BOARD_ID")
 
+# GraphQL endpoint — overridable so benchmarks can point at a local stand-in
+MONDAY_API_URL = os.getenv("MONDAY_API_URL", "https://api.monday.com/v2")
+
+# Board paging — monday caps items_page at 500 items; 0 max pages means no cap
+MONDAY_PAGE_SIZE = int(os.getenv("MONDAY_PAGE_SIZE", "500"))
+MONDAY_MAX_PAGES = int(os.getenv("MONDAY_MAX_PAGES", "0"))
+
+# HTTP client — keep-alive pool size, per-request timeout and retry/backoff (seconds)
+MONDAY_POOL_SIZE = int(os.getenv("MONDAY_POOL_SIZE", "10"))
+MONDAY_TIMEOUT = float(os.getenv("MONDAY_TIMEOUT", "30"))
+MONDAY_MAX_RETRIES = int(os.getenv("MONDAY_MAX_RETRIES", "5"))
+MONDAY_BACKOFF_BASE = float(os.getenv("MONDAY_BACKOFF_BASE", "0.5"))
+MONDAY_BACKOFF_MAX = float(os.getenv("MONDAY_BACKOFF_MAX", "30"))
+
+# Board snapshot cache — 0 max age keeps every question fresh (snapshots are still shared within one question)
+SNAPSHOT_MAX_AGE_SECONDS = float(os.getenv("SNAPSHOT_MAX_AGE_SECONDS", "0"))
+SNAPSHOT_CACHE_MAX_MB = float(os.getenv("SNAPSHOT_CACHE_MAX_MB", "256"))
+
+# "full" re-downloads expired boards; "incremental" fetches only items updated since the last sync
+SYNC_MODE = os.getenv("SYNC_MODE", "full").lower()
+RECONCILE_INTERVAL_SECONDS = float(os.getenv("RECONCILE_INTERVAL_SECONDS", "3600"))
+
+# Background refresher — re-downloads both boards this often (and before snapshots reach
+# SNAPSHOT_MAX_AGE_SECONDS) so questions don't wait on monday; needs a nonzero max age, 0 disables it
+REFRESH_INTERVAL_SECONDS = float(os.getenv("REFRESH_INTERVAL_SECONDS", "300"))
+
+# SQLite copy of the normalized boards — survives restarts; set empty to disable. Only kept with a nonzero
+# SNAPSHOT_MAX_AGE_SECONDS or incremental sync, the cases that read it back
+BOARD_STORE_PATH = os.getenv("BOARD_STORE_PATH", "board_store.sqlite3")
+
+# Binary snapshot files of the normalized boards, rewritten after each download and memory-mapped at
+# startup so the first questions are answered while the boards re-download; set empty to disable
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", "snapshots")
+SNAPSHOT_FILE_MAX_AGE_SECONDS = float(os.getenv("SNAPSHOT_FILE_MAX_AGE_SECONDS", "86400"))
+
+# Board ingest — boards past NORMALIZE_MIN_ITEMS items are normalized in chunks on this many worker
+# processes while the next page downloads; 0 workers keeps normalization in-process. The default
+# leaves a core for the app and is 0 on single-core hosts, where a pool only adds overhead
+NORMALIZE_WORKERS = int(os.getenv("NORMALIZE_WORKERS", str(min(4, (os.cpu_count() or 1) - 1))))
+NORMALIZE_MIN_ITEMS = int(os.getenv("NORMALIZE_MIN_ITEMS", "5000"))
+
+# Tool calls the agent runs at once when the model asks for several in one step
+AGENT_TOOL_WORKERS = int(os.getenv("AGENT_TOOL_WORKERS", "4"))
+
+# Per-call limits (seconds) in the async agent runtime: one Groq completion, one tool call
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "60"))
+TOOL_TIMEOUT_SECONDS = float(os.getenv("TOOL_TIMEOUT_SECONDS", "120"))
+
+# Fast-path router: minimum classifier confidence to call a tool without asking the LLM first (above 1 disables it)
+ROUTER_CONFIDENCE = float(os.getenv("ROUTER_CONFIDENCE", "0.85"))
+
+# Answer cache — reuses a final answer while the board data behind it is unchanged; 0 TTL disables it.
+# Checking that loads the boards, so with SNAPSHOT_MAX_AGE_SECONDS=0 a hit still downloads them (it saves the LLM calls)
+ANSWER_CACHE_TTL_SECONDS = float(os.getenv("ANSWER_CACHE_TTL_SECONDS", "3600"))
+ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "500"))
+ANSWER_CACHE_PATH = os.getenv("ANSWER_CACHE_PATH", "answer_cache.sqlite3")
+
+# Approximate prompt tokens one agent step may spend on tool results; larger results are summarized and paged
+RESULT_TOKEN_BUDGET = int(os.getenv("RESULT_TOKEN_BUDGET", "3000"))
+
+# Port for the Prometheus /metrics endpoint; 0 disables it
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+
+# monday webhook receiver — applies pushed item changes to held snapshots; 0 port disables it.
+# With a token set it listens on every interface; register the webhook URL as
+# http://host:port/?token=<WEBHOOK_TOKEN>. Without one it only listens on 127.0.0.1
+WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", "0"))
+WEBHOOK_TOKEN = os.getenv("WEBHOOK_TOKEN", "")
+
 # Validate all keys are present
 def validate_config():
     missing = []
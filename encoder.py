@@ -0,0 +1,110 @@
+import json
+from collections import Counter
+from collections.abc import Mapping
+
+TOP_N = 5
+SAMPLE_ROWS = 5
+# A text column with at most this many distinct values is summarized as counts
+MAX_CATEGORIES = 25
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough LLM token count (~4 characters per token), for when the API doesn't report usage"""
+    return max(1, len(text) // 4) if text else 0
+
+
+def _compact(value):
+    """Drop None fields recursively and write integral floats as ints"""
+    if isinstance(value, Mapping):
+        return {k: _compact(v) for k, v in value.items() if v is not None}
+    if isinstance(value, list):
+        return [_compact(v) for v in value]
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def _dumps(value) -> str:
+    return json.dumps(value, default=str, separators=(",", ":"), ensure_ascii=False)
+
+
+def _table_columns(rows: list) -> list:
+    """Columns with at least one value, most populated first (name always leads)"""
+    filled = Counter(k for row in rows for k, v in row.items() if v is not None)
+    return sorted(filled, key=lambda k: (k != "name", -filled[k]))
+
+
+def _numeric(rows: list, column: str) -> bool:
+    values = [row.get(column) for row in rows if row.get(column) is not None]
+    return bool(values) and all(isinstance(v, (int, float)) for v in values)
+
+
+def _summary(rows: list, columns: list) -> dict:
+    """Exact aggregates over every row: totals of numeric columns, counts of categorical ones"""
+    totals = {}
+    counts = {}
+    for column in columns:
+        if column == "name":
+            continue
+        if _numeric(rows, column):
+            values = [row[column] for row in rows if row.get(column) is not None]
+            total = sum(values)
+            totals[column] = {"sum": _compact(total), "sum_crores": round(total / 10000000, 2), "count": len(values)}
+        else:
+            distinct = Counter(row[column] for row in rows if row.get(column) is not None)
+            if len(distinct) <= MAX_CATEGORIES:
+                counts[column] = dict(distinct.most_common())
+    return {"totals": totals, "counts": counts}
+
+
+def _top_rows(rows: list, columns: list, totals: dict) -> dict:
+    """The TOP_N rows by the numeric column with the largest total"""
+    if not totals:
+        return {}
+    by = max(totals, key=lambda c: abs(totals[c]["sum"]))
+    ranked = sorted((row for row in rows if row.get(by) is not None), key=lambda row: row[by], reverse=True)
+    return {"by": by, "rows": [[row.get(c) for c in columns] for row in ranked[:TOP_N]]}
+
+
+def encode_rows(rows: list, budget_tokens: int, offset: int = 0) -> dict:
+    """Encode a list of row dicts for the prompt within ``budget_tokens``.
+
+    Rows become a header plus positional arrays. When the whole table fits it is
+    returned as is; otherwise the result carries exact aggregates, the top rows by
+    value and as many rows from ``offset`` as still fit, with ``next_offset`` for
+    the model to ask for the next page.
+    """
+    rows = [_compact(row) for row in rows]
+    columns = _table_columns(rows)
+    table = [[row.get(c) for c in columns] for row in rows]
+    encoded = {"total_rows": len(rows), "columns": columns, "rows": table}
+    if offset == 0 and estimate_tokens(_dumps(encoded)) <= budget_tokens:
+        return encoded
+
+    summary = _summary(rows, columns)
+    encoded = {
+        "total_rows": len(rows),
+        "summary": summary,
+        "top": _top_rows(rows, columns, summary["totals"]),
+        "columns": columns,
+        "offset": offset,
+        "rows": [],
+    }
+    used = estimate_tokens(_dumps(encoded))
+    for values in table[offset:]:
+        cost = estimate_tokens(_dumps(values)) + 1
+        if used + cost > budget_tokens and len(encoded["rows"]) >= min(SAMPLE_ROWS, len(table) - offset):
+            break
+        encoded["rows"].append(values)
+        used += cost
+    end = offset + len(encoded["rows"])
+    if end < len(rows):
+        encoded["next_offset"] = end
+    return encoded
+
+
+def encode_result(data, budget_tokens: int, offset: int = 0) -> str:
+    """Compact prompt text for a tool result: tables for row lists, null-free JSON otherwise"""
+    if isinstance(data, list) and all(isinstance(row, Mapping) for row in data):
+        return _dumps(encode_rows(data, budget_tokens, offset))
+    return _dumps(_compact(data))
@@ -0,0 +1,65 @@
+import json
+
+# Column types whose values are a fixed set of labels with IDs in settings_str
+LABEL_TYPES = {"status", "color", "dropdown"}
+TEXT_TYPES = {"text", "long_text", "name"}
+
+
+def parse_column_meta(columns: list) -> dict:
+    """{title: {"id", "type", "labels": {label text: label id} | None}} from a boards { columns } selection"""
+    meta = {}
+    for col in columns or []:
+        labels = None
+        if col.get("type") in LABEL_TYPES:
+            try:
+                settings = json.loads(col.get("settings_str") or "{}")
+            except json.JSONDecodeError:
+                settings = {}
+            raw = settings.get("labels") or {}
+            if isinstance(raw, dict):  # status: {"0": "Working on it", ...}
+                labels = {text: int(label_id) for label_id, text in raw.items() if text}
+            else:  # dropdown: [{"id": 1, "name": "..."}, ...]
+                labels = {label["name"]: label["id"] for label in raw if label.get("name")}
+        meta[col["title"].strip()] = {"id": col["id"], "type": col.get("type"), "labels": labels}
+    return meta
+
+
+def compile_filters(filters: dict, column_meta: dict) -> tuple:
+    """Turn {column title: substring} tool filters into monday items_page rules.
+
+    Label columns (status/dropdown) resolve the substring against their label
+    set, case-insensitively, and become an ``any_of`` over the matching label
+    IDs. Text columns become ``contains_text``. Returns (rules, unmatched,
+    residual): ``unmatched`` is True when a label filter matches no label at
+    all (so nothing can match), and ``residual`` holds the filters that
+    couldn't be expressed server-side.
+    """
+    rules = []
+    residual = {}
+    for title, needle in filters.items():
+        if not needle:
+            continue
+        col = column_meta.get(title)
+        if col is None:
+            residual[title] = needle
+        elif col["labels"] is not None:
+            label_ids = sorted(i for text, i in col["labels"].items() if needle.lower() in text.lower())
+            if not label_ids:
+                return [], True, residual
+            rules.append(
+                '{column_id: ' + json.dumps(col["id"]) + ', compare_value: ' + json.dumps(label_ids)
+                + ', operator: any_of}'
+            )
+        elif col["type"] in TEXT_TYPES:
+            rules.append(
+                '{column_id: ' + json.dumps(col["id"]) + ', compare_value: [' + json.dumps(needle)
+                + '], operator: contains_text}'
+            )
+        else:
+            residual[title] = needle
+    return rules, False, residual
+
+
+def rules_literal(rules: list) -> str:
+    """items_page query_params literal ANDing the rules"""
+    return '{rules: [' + ', '.join(rules) + '], operator: and}'
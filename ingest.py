@@ -0,0 +1,191 @@
+import asyncio
+import multiprocessing
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from compact import ColumnTable
+from schema import BoardSchema
+from telemetry import METRICS, span
+from config import NORMALIZE_WORKERS, NORMALIZE_MIN_ITEMS
+
+# Worker processes only import this module and its light dependencies (no monday client, store or service)
+
+EMPTY_TEXT = ["", "null", "None", "-", "N/A", "n/a"]
+
+_pool = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def normalize_page(page: list, col_map: dict, schema: BoardSchema, item_ids: list, rows: ColumnTable, issues: dict):
+    """Normalize and type-parse one raw item page onto the accumulators, then drop the page"""
+    for item in page:
+        row = {"name": item.get("name", "Unknown")}
+        for col in item.get("column_values", []):
+            col_id = col.get("id", "")
+            title = col_map.get(col_id, col_id).strip()
+            text = col.get("text", "") or ""
+            if text.strip() in EMPTY_TEXT:
+                text = None
+            row[title] = text
+        if row.get("name") not in schema.header_names:
+            schema.parse_row(item.get("id"), row, issues)
+            item_ids.append(item.get("id"))
+            rows.append(row)
+    page.clear()
+
+
+def _normalize_chunk(items: list, col_map: dict, schema: BoardSchema) -> tuple:
+    """Runs in a worker process: one chunk of raw items -> (item_ids, ColumnTable rows, issues)"""
+    item_ids = []
+    rows = ColumnTable()
+    issues = {}
+    normalize_page(items, col_map, schema, item_ids, rows, issues)
+    return item_ids, rows, issues
+
+
+def _executor(workers: int) -> ProcessPoolExecutor:
+    """The shared worker pool, started on first use and restarted if the worker count changed.
+
+    Workers are spawned rather than forked: the parent has the runtime loop,
+    the refresher and open sockets on other threads, which a fork would copy
+    mid-flight.
+    """
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"))
+            _pool_workers = workers
+        return _pool
+
+
+def _discard_pool():
+    """Drop a pool whose worker died, so the next board starts a fresh one"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def _chunks(page: list, count: int) -> list:
+    size = -(-len(page) // count)
+    chunks = [page[i:i + size] for i in range(0, len(page), size)]
+    page.clear()
+    return chunks
+
+
+def _merge(result: tuple, item_ids: list, rows: ColumnTable, issues: dict):
+    chunk_ids, chunk_rows, chunk_issues = result
+    item_ids.extend(chunk_ids)
+    rows.extend(chunk_rows)
+    for title, bad in chunk_issues.items():
+        issues.setdefault(title, {}).update(bad)
+
+
+class _Ingest:
+    """Accumulators for one board's pages and the parallel/serial decision.
+
+    Pages are normalized in place until the board passes NORMALIZE_MIN_ITEMS;
+    after that each page is split into one chunk per worker and handed to the
+    pool, and the caller moves straight on to the next page (whose download is
+    already in flight). At most two pages' worth of chunks are outstanding;
+    results are merged in page order, so the table matches a serial run.
+    """
+
+    def __init__(self, workers: int):
+        self.item_ids = []
+        self.rows = ColumnTable()
+        self.issues = {}
+        self.pending = deque()
+        self.workers = workers
+        self.seen = 0
+        self.parallel = False
+        self.started = time.perf_counter()
+
+    def serial(self, page: list) -> bool:
+        """Whether this page is normalized in place; once a board goes to the pool it stays there"""
+        self.seen += len(page)
+        self.parallel = self.parallel or (self.workers > 0 and self.seen > NORMALIZE_MIN_ITEMS)
+        return not self.parallel
+
+    def backlog(self) -> bool:
+        return len(self.pending) > 2 * self.workers
+
+    def merge(self, result: tuple):
+        _merge(result, self.item_ids, self.rows, self.issues)
+
+    def cancel(self):
+        for future in self.pending:
+            future.cancel()
+
+    def finish(self, attrs: dict) -> tuple:
+        elapsed = time.perf_counter() - self.started
+        attrs["items"] = len(self.rows)
+        if self.parallel:
+            attrs["workers"] = self.workers
+        # Download waits included: this is the rate a board actually arrives at
+        attrs["items_per_second"] = round(len(self.rows) / elapsed) if elapsed > 0 else None
+        METRICS.count("bi_agent_items_parsed_total", len(self.rows), "Board items normalized and type-parsed")
+        return self.item_ids, self.rows, self.issues
+
+
+def normalize_pages(pages, col_map, schema: BoardSchema) -> tuple:
+    """Normalize and type-parse a stream of raw item pages into (item_ids, ColumnTable rows, issues).
+
+    Each raw page is dropped as soon as its items are in the table (or handed
+    to a worker), so only the compact columns outlive the download.
+    """
+    ingest = _Ingest(NORMALIZE_WORKERS)
+    # Includes waiting on page downloads; the monday.http spans show how much of it that was
+    with span("normalize", board=schema.name) as attrs:
+        try:
+            for page in pages:
+                if ingest.serial(page):
+                    normalize_page(page, col_map, schema, ingest.item_ids, ingest.rows, ingest.issues)
+                    continue
+                pool = _executor(ingest.workers)
+                for chunk in _chunks(page, ingest.workers):
+                    ingest.pending.append(pool.submit(_normalize_chunk, chunk, col_map, schema))
+                while ingest.backlog():
+                    ingest.merge(ingest.pending.popleft().result())
+            while ingest.pending:
+                ingest.merge(ingest.pending.popleft().result())
+        except BrokenProcessPool:
+            _discard_pool()
+            raise
+        finally:
+            ingest.cancel()
+        return ingest.finish(attrs)
+
+
+async def anormalize_pages(pages, col_map, schema: BoardSchema) -> tuple:
+    """normalize_pages over an async page stream; serial pages are parsed in a worker thread to keep the loop free"""
+    loop = asyncio.get_running_loop()
+    ingest = _Ingest(NORMALIZE_WORKERS)
+    with span("normalize", board=schema.name) as attrs:
+        try:
+            async for page in pages:
+                if ingest.serial(page):
+                    await asyncio.to_thread(
+                        normalize_page, page, col_map, schema, ingest.item_ids, ingest.rows, ingest.issues,
+                    )
+                    continue
+                pool = _executor(ingest.workers)
+                for chunk in _chunks(page, ingest.workers):
+                    ingest.pending.append(loop.run_in_executor(pool, _normalize_chunk, chunk, col_map, schema))
+                while ingest.backlog():
+                    ingest.merge(await ingest.pending.popleft())
+            while ingest.pending:
+                ingest.merge(await ingest.pending.popleft())
+        except BrokenProcessPool:
+            _discard_pool()
+            raise
+        finally:
+            ingest.cancel()
+        return ingest.finish(attrs)
@@ -1,73 +1,428 @@
+import asyncio
+import contextvars
+import random
+import re
+import threading
+import time
+import weakref
+import httpx
 import requests
-from config import MONDAY_API_KEY
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from requests.adapters import HTTPAdapter
+from telemetry import METRICS, span
+from config import (
+    MONDAY_API_KEY, MONDAY_API_URL, MONDAY_PAGE_SIZE, MONDAY_MAX_PAGES, MONDAY_POOL_SIZE, MONDAY_TIMEOUT,
+    MONDAY_MAX_RETRIES, MONDAY_BACKOFF_BASE, MONDAY_BACKOFF_MAX,
+)
 
-MONDAY_URL = "https://api.monday.com/v2"
+MONDAY_URL = MONDAY_API_URL
+COMPLEXITY_FIELDS = "complexity { before after reset_in_x_seconds }"
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+RATE_LIMIT_CODES = {"ComplexityException", "COMPLEXITY_BUDGET_EXHAUSTED", "RATE_LIMIT_EXCEEDED", "Rate Limit Exceeded"}
+
+
+class MondayRateLimited(Exception):
+    def __init__(self, message: str, retry_in: float = None):
+        super().__init__(message)
+        self.retry_in = retry_in
+
+
+class ComplexityBudget:
+    """Client-side view of monday's per-minute complexity budget.
+
+    Every response reports ``complexity { before after reset_in_x_seconds }``;
+    callers reserve the expected cost of their query before sending it and
+    queue until the budget resets once it would run dry, instead of firing
+    requests that come back as complexity errors.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self.remaining = None  # unknown until the first response, and again after each reset
+        self.reset_at = 0.0
+        self.cost_estimate = 0.0
+        self.waited_seconds = 0.0
+
+    def _reserve(self):
+        """Reserve one query's expected cost; None once reserved, else how long to wait first"""
+        now = time.monotonic()
+        if self.remaining is not None and now >= self.reset_at:
+            self.remaining = None
+        if self.remaining is None or 0 < self.remaining >= self.cost_estimate:
+            if self.remaining is not None:
+                self.remaining -= self.cost_estimate
+            return None
+        wait = self.reset_at - now
+        self.waited_seconds += wait
+        return wait
+
+    def acquire(self):
+        with self._cond:
+            while True:
+                wait = self._reserve()
+                if wait is None:
+                    return
+                self._cond.wait(wait)
+
+    async def acquire_async(self):
+        """acquire() for coroutines: sleeps out the reset without holding up the event loop"""
+        while True:
+            with self._cond:
+                wait = self._reserve()
+            if wait is None:
+                return
+            await asyncio.sleep(wait)
+
+    def update(self, complexity: dict):
+        try:
+            before, after = float(complexity["before"]), float(complexity["after"])
+            reset_in = float(complexity["reset_in_x_seconds"])
+        except (KeyError, TypeError, ValueError):
+            return
+        with self._cond:
+            cost = max(before - after, 0.0)
+            self.cost_estimate = cost if not self.cost_estimate else 0.8 * self.cost_estimate + 0.2 * cost
+            self.remaining = after
+            self.reset_at = time.monotonic() + reset_in
+            self._cond.notify_all()
+
+    def exhausted(self, retry_in: float):
+        with self._cond:
+            self.remaining = 0.0
+            self.reset_at = time.monotonic() + retry_in
+
+
+BUDGET = ComplexityBudget()
+
+
+HEADERS = {
+    "Authorization": MONDAY_API_KEY or "",
+    "Content-Type": "application/json",
+    "Accept-Encoding": "gzip, deflate",
+    "API-Version": "2024-01",
+}
+
+
+def _make_session() -> requests.Session:
+    session = requests.Session()
+    # pool_block makes callers queue for a free keep-alive connection instead of opening extra ones
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=MONDAY_POOL_SIZE, pool_block=True)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update(HEADERS)
+    return session
+
+
+_session = _make_session()
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def _async_client() -> httpx.AsyncClient:
+    """The running event loop's keep-alive client (an httpx pool belongs to the loop that opened it).
+
+    Past MONDAY_POOL_SIZE connections, requests queue for a free one, as with the sync session.
+    """
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = _async_clients[loop] = httpx.AsyncClient(
+            headers=HEADERS,
+            timeout=MONDAY_TIMEOUT,
+            limits=httpx.Limits(max_connections=MONDAY_POOL_SIZE, max_keepalive_connections=MONDAY_POOL_SIZE),
+        )
+    return client
+
+
+def with_complexity(query: str) -> str:
+    """Add the complexity field to the top-level selection of a query document"""
+    if "complexity" in query:
+        return query
+    brace = query.find("{")
+    if brace < 0:
+        return query
+    return query[:brace + 1] + " " + COMPLEXITY_FIELDS + query[brace + 1:]
+
+
+def _rate_limit_error(result: dict):
+    """The retry delay if a GraphQL response is a complexity / rate-limit error, else None"""
+    errors = result.get("errors") or []
+    if result.get("error_code"):
+        errors = errors + [{"message": result.get("error_message", ""), "extensions": {"code": result["error_code"]}}]
+    for error in errors:
+        extensions = error.get("extensions") or {}
+        if extensions.get("code") in RATE_LIMIT_CODES or "budget exhausted" in str(error.get("message", "")).lower():
+            if extensions.get("retry_in_seconds") is not None:
+                return float(extensions["retry_in_seconds"])
+            match = re.search(r"reset in (\d+) seconds?", str(error.get("message", "")))
+            return float(match.group(1)) if match else 0.0
+    return None
+
+
+def _backoff(attempt: int) -> float:
+    # Exponential backoff with full jitter
+    return random.uniform(0, min(MONDAY_BACKOFF_MAX, MONDAY_BACKOFF_BASE * 2 ** attempt))
+
+
+def _status_delay(response, attempt: int) -> float:
+    """How long to wait before retrying a retryable HTTP status"""
+    retry_after = response.headers.get("Retry-After")
+    delay = float(retry_after) if retry_after and retry_after.isdigit() else _backoff(attempt)
+    if response.status_code == 429:
+        BUDGET.exhausted(delay)
+    return delay
+
+
+def _accept(result: dict, attempt: int, last_attempt: bool) -> bool:
+    """Record a response's complexity; False if it was a rate-limit error worth retrying"""
+    retry_in = _rate_limit_error(result)
+    if retry_in is not None:
+        if last_attempt:
+            raise MondayRateLimited(str(result.get("errors") or result.get("error_message")), retry_in)
+        # Let the budget hold everyone back until the reset, plus jitter so waiters don't stampede
+        BUDGET.exhausted(retry_in + _backoff(attempt))
+        return False
+    BUDGET.update((result.get("data") or {}).get("complexity"))
+    return True
 
 
 def monday_query(query: str) -> dict:
-    headers = {
-        "Authorization": MONDAY_API_KEY,
-        "Content-Type": "application/json",
-        "API-Version": "2024-01"
-    }
-    response = requests.post(
-        MONDAY_URL,
-        json={"query": query},
-        headers=headers,
-        timeout=30
-    )
-    response.raise_for_status()
-    return response.json()
-
-
-def get_column_titles(board_id: str) -> dict:
-    query = '{ boards(ids: [' + str(board_id) + ']) { columns { id title } } }'
-    result = monday_query(query)
-    try:
-        columns = result["data"]["boards"][0]["columns"]
-        return {col["id"]: col["title"] for col in columns}
-    except (KeyError, IndexError):
-        return {}
+    query = with_complexity(query)
+    for attempt in range(MONDAY_MAX_RETRIES + 1):
+        last_attempt = attempt == MONDAY_MAX_RETRIES
+        BUDGET.acquire()
+        try:
+            with span("monday.http", attempt=attempt) as attrs:
+                response = _session.post(MONDAY_URL, json={"query": query}, timeout=MONDAY_TIMEOUT)
+                attrs["status"] = response.status_code
+                attrs["bytes"] = len(response.content)
+        except (requests.ConnectionError, requests.Timeout):
+            if last_attempt:
+                raise
+            time.sleep(_backoff(attempt))
+            continue
+        METRICS.count("bi_agent_monday_bytes_total", attrs["bytes"], "Response bytes received from monday.com")
+
+        if response.status_code in RETRYABLE_STATUS and not last_attempt:
+            time.sleep(_status_delay(response, attempt))
+            continue
+        response.raise_for_status()
+        with span("monday.json", bytes=attrs["bytes"]):
+            result = response.json()
+        if _accept(result, attempt, last_attempt):
+            return result
+
 
+async def amonday_query(query: str) -> dict:
+    """monday_query over the pooled async client; budget waits and backoff sleep without blocking the loop"""
+    query = with_complexity(query)
+    for attempt in range(MONDAY_MAX_RETRIES + 1):
+        last_attempt = attempt == MONDAY_MAX_RETRIES
+        await BUDGET.acquire_async()
+        try:
+            with span("monday.http", attempt=attempt) as attrs:
+                response = await _async_client().post(MONDAY_URL, json={"query": query})
+                attrs["status"] = response.status_code
+                attrs["bytes"] = len(response.content)
+        except httpx.TransportError:
+            if last_attempt:
+                raise
+            await asyncio.sleep(_backoff(attempt))
+            continue
+        METRICS.count("bi_agent_monday_bytes_total", attrs["bytes"], "Response bytes received from monday.com")
 
-def get_board_items(board_id: str, limit: int = 500) -> list:
-    col_map = get_column_titles(board_id)
-    query = '{ boards(ids: [' + str(board_id) + ']) { name items_page(limit: ' + str(limit) + ') { items { id name column_values { id text value } } } } }'
-    result = monday_query(query)
+        if response.status_code in RETRYABLE_STATUS and not last_attempt:
+            await asyncio.sleep(_status_delay(response, attempt))
+            continue
+        response.raise_for_status()
+        with span("monday.json", bytes=attrs["bytes"]):
+            result = response.json()
+        if _accept(result, attempt, last_attempt):
+            return result
+
+
+ITEM_FIELDS = "id name column_values { id text }"
+COLUMN_FIELDS = "id title type settings_str"
+
+
+ID_FIELDS = "id"
+
+
+def projected_item_fields(column_ids) -> str:
+    """Item fields restricted to the given column IDs (None means every column)"""
+    if column_ids is None:
+        return ITEM_FIELDS
+    ids = ", ".join('"' + col_id + '"' for col_id in sorted(column_ids))
+    return "id name column_values(ids: [" + ids + "]) { id text }"
+
+
+def updated_since_params(since: float) -> str:
+    """items_page query_params matching items updated on or after the day of ``since`` (a UNIX time).
+
+    __last_updated__ compares at day granularity, so a delta re-sends everything touched
+    that day; merging by item ID makes the overlap harmless.
+    """
+    day = datetime.fromtimestamp(since, timezone.utc).strftime("%Y-%m-%d")
+    return ('{rules: [{column_id: "__last_updated__", compare_value: ["EXACT", "' + day + '"], '
+            'operator: greater_than_or_equals, compare_attribute: "UPDATED_AT"}]}')
+
+
+def build_boards_query(board_ids, page_size: int = MONDAY_PAGE_SIZE, item_fields=ITEM_FIELDS,
+                       query_params: dict = None) -> str:
+    """One GraphQL document fetching columns + first item page of every board, aliased b0, b1, ...
+
+    ``item_fields`` is one selection for every board or a {board_id: selection} dict;
+    ``query_params`` optionally maps a board ID to an items_page query_params literal.
+    """
+    query_params = query_params or {}
+    parts = []
+    for i, board_id in enumerate(board_ids):
+        fields = _fields_for(item_fields, board_id)
+        args = 'limit: ' + str(page_size)
+        if query_params.get(str(board_id)):
+            args += ', query_params: ' + query_params[str(board_id)]
+        parts.append(
+            'b' + str(i) + ': boards(ids: [' + str(board_id) + ']) { columns { ' + COLUMN_FIELDS + ' } '
+            'items_page(' + args + ') { cursor items { ' + fields + ' } } }'
+        )
+    return '{ ' + ' '.join(parts) + ' }'
+
+
+def _fields_for(item_fields, board_id) -> str:
+    if isinstance(item_fields, dict):
+        return item_fields.get(str(board_id)) or ITEM_FIELDS
+    return item_fields
+
+
+def _next_page_query(cursor: str, page_size: int, item_fields: str = ITEM_FIELDS) -> str:
+    return ('{ next_items_page(limit: ' + str(page_size) + ', cursor: "' + cursor + '") '
+            '{ cursor items { ' + item_fields + ' } } }')
+
+
+def fetch_first_pages(board_ids, page_size: int = MONDAY_PAGE_SIZE, item_fields=ITEM_FIELDS,
+                      query_params: dict = None) -> dict:
+    """Fetch column titles and the first item page of several boards in a single request.
+
+    Returns {board_id: {"columns": {col_id: title}, "meta": [raw columns], "items": [...],
+    "cursor": str | None, "fields": str}}.
+    """
+    board_ids = [str(b) for b in board_ids]
+    result = monday_query(build_boards_query(board_ids, page_size, item_fields, query_params))
+    return _first_pages(result, board_ids, item_fields)
+
+
+async def afetch_first_pages(board_ids, page_size: int = MONDAY_PAGE_SIZE, item_fields=ITEM_FIELDS,
+                             query_params: dict = None) -> dict:
+    """fetch_first_pages on the async client"""
+    board_ids = [str(b) for b in board_ids]
+    result = await amonday_query(build_boards_query(board_ids, page_size, item_fields, query_params))
+    return _first_pages(result, board_ids, item_fields)
+
+
+def _first_pages(result: dict, board_ids: list, item_fields) -> dict:
+    data = result.get("data") or {}
+    pages = {}
+    for i, board_id in enumerate(board_ids):
+        try:
+            board = data["b" + str(i)][0] or {}
+        except (KeyError, IndexError, TypeError):
+            board = {}
+        page = board.get("items_page") or {}
+        pages[board_id] = {
+            "columns": {col["id"]: col["title"] for col in board.get("columns") or []},
+            "meta": board.get("columns") or [],
+            "items": page.get("items") or [],
+            "cursor": page.get("cursor"),
+            "fields": _fields_for(item_fields, board_id),
+        }
+    return pages
+
+
+def get_columns(board_id: str) -> list:
+    """Column metadata (id, title, type, settings_str) of a board"""
+    result = monday_query('{ boards(ids: [' + str(board_id) + ']) { columns { ' + COLUMN_FIELDS + ' } } }')
+    return _board_columns(result)
+
+
+async def aget_columns(board_id: str) -> list:
+    result = await amonday_query('{ boards(ids: [' + str(board_id) + ']) { columns { ' + COLUMN_FIELDS + ' } } }')
+    return _board_columns(result)
+
+
+def _board_columns(result: dict) -> list:
     try:
-        items = result["data"]["boards"][0]["items_page"]["items"]
-        for item in items:
-            item["_col_map"] = col_map
-        return items
-    except (KeyError, IndexError):
+        return result["data"]["boards"][0]["columns"] or []
+    except (KeyError, IndexError, TypeError):
         return []
 
 
-def normalize_item(item: dict) -> dict:
-    col_map = item.get("_col_map", {})
-    normalized = {"name": item.get("name", "Unknown")}
-    for col in item.get("column_values", []):
-        col_id = col.get("id", "unknown")
-        key = col_map.get(col_id, col_id).strip()
-        text = col.get("text", "") or ""
-        if text.strip() in ["", "null", "None", "-", "N/A", "n/a"]:
-            text = None
-        normalized[key] = text
-    return normalized
+def iter_board_pages(board_id: str, page_size: int = MONDAY_PAGE_SIZE, max_pages: int = MONDAY_MAX_PAGES,
+                     first_page: dict = None):
+    """Yield a board's items one page at a time, following the items_page cursor.
 
+    Pass a ``first_page`` from fetch_first_pages to skip the initial request.
+    The request for the next page goes out before the current page is yielded,
+    so the caller normalizes one page while the next one downloads. Only those
+    two pages are held at once, however large the board is.
+    """
+    if first_page is None:
+        first_page = fetch_first_pages([board_id], page_size)[str(board_id)]
+    item_fields = first_page.get("fields", ITEM_FIELDS)
+    items, cursor = first_page["items"], first_page["cursor"]
+    pages = 0
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        while True:
+            pages += 1
+            pending = None
+            if cursor and (not max_pages or pages < max_pages):
+                # Run in a copy of the caller's context so the prefetch's spans land in the caller's trace
+                pending = pool.submit(
+                    contextvars.copy_context().run, monday_query, _next_page_query(cursor, page_size, item_fields),
+                )
+            yield items
+            if pending is None:
+                return
+            page = (pending.result().get("data") or {}).get("next_items_page") or {}
+            items, cursor = page.get("items") or [], page.get("cursor")
 
-def safe_float(value) -> float:
-    if value is None:
-        return 0.0
+
+async def aiter_board_pages(board_id: str, page_size: int = MONDAY_PAGE_SIZE, max_pages: int = MONDAY_MAX_PAGES,
+                            first_page: dict = None):
+    """iter_board_pages as an async generator; the next page downloads as a task while the caller
+    works on the current one, and is cancelled if the caller stops early"""
+    if first_page is None:
+        first_page = (await afetch_first_pages([board_id], page_size))[str(board_id)]
+    item_fields = first_page.get("fields", ITEM_FIELDS)
+    items, cursor = first_page["items"], first_page["cursor"]
+    pages = 0
+    pending = None
     try:
-        cleaned = (
-            str(value)
-            .replace(",", "")
-            .replace("₹", "")
-            .replace("$", "")
-            .replace(" ", "")
-            .strip()
-        )
-        return float(cleaned) if cleaned else 0.0
-    except (ValueError, TypeError):
-        return 0.0
+        while True:
+            pages += 1
+            pending = None
+            if cursor and (not max_pages or pages < max_pages):
+                pending = asyncio.ensure_future(amonday_query(_next_page_query(cursor, page_size, item_fields)))
+            yield items
+            if pending is None:
+                return
+            page = ((await pending).get("data") or {}).get("next_items_page") or {}
+            items, cursor = page.get("items") or [], page.get("cursor")
+    finally:
+        if pending is not None:
+            pending.cancel()
+
+
+def iter_board_item_ids(board_id: str, page_size: int = MONDAY_PAGE_SIZE):
+    """Page through a board requesting only item IDs — the cheap pass used to detect deletions"""
+    first_page = fetch_first_pages([board_id], page_size, item_fields=ID_FIELDS)[str(board_id)]
+    for page in iter_board_pages(board_id, page_size, max_pages=0, first_page=first_page):
+        for item in page:
+            yield item["id"]
+
+
+async def aiter_board_item_ids(board_id: str, page_size: int = MONDAY_PAGE_SIZE):
+    """iter_board_item_ids on the async client"""
+    first_page = (await afetch_first_pages([board_id], page_size, item_fields=ID_FIELDS))[str(board_id)]
+    async for page in aiter_board_pages(board_id, page_size, max_pages=0, first_page=first_page):
+        for item in page:
+            yield item["id"]
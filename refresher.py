@@ -0,0 +1,140 @@
+import random
+import threading
+import time
+from boards import SERVICE, BoardService
+from schema import DEALS_SCHEMA, WORK_ORDERS_SCHEMA
+from config import DEALS_BOARD_ID, WORK_ORDERS_BOARD_ID, REFRESH_INTERVAL_SECONDS, SNAPSHOT_MAX_AGE_SECONDS
+
+# Refresh once snapshots are this far into SNAPSHOT_MAX_AGE_SECONDS, so they never expire under a question
+REFRESH_AHEAD = 0.8
+# Retry delays after failed refreshes: 5s, 10s, 20s, ... capped at the refresh interval
+RETRY_BASE_SECONDS = 5.0
+# Cap on the retry delay of the startup catch-up, which runs when the refresher is off
+CATCH_UP_MAX_DELAY_SECONDS = 300.0
+
+
+class BoardRefresher:
+    """Daemon thread keeping the shared board snapshots warm.
+
+    Loads every board as soon as it starts, then again every ``interval`` seconds,
+    or sooner when the oldest snapshot nears ``max_age``. A failed refresh is
+    retried with exponential backoff while the last good snapshots keep serving.
+    """
+
+    def __init__(self, service: BoardService, boards: list, interval: float, max_age: float):
+        self.service = service
+        self.boards = [(str(board_id), schema, None) for board_id, schema in boards]
+        self.interval = interval
+        self.max_age = max_age
+        self.last_success = None
+        self.last_error = None
+        self.failures = 0
+        self.next_run = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="board-refresher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def status(self) -> dict:
+        return {
+            "running": self._thread is not None and self._thread.is_alive(),
+            "last_success": self.last_success,
+            "last_error": self.last_error,
+            "failures": self.failures,
+            "next_run": self.next_run,
+        }
+
+    def refresh(self):
+        """Download every board now; raises if monday can't be reached"""
+        try:
+            self.service.load_snapshots(*self.boards, refresh=True)
+        except Exception as e:
+            self.failures += 1
+            self.last_error = str(e) or type(e).__name__
+            raise
+        self.failures = 0
+        self.last_error = None
+        self.last_success = time.time()
+
+    def _delay(self) -> float:
+        """Seconds until the next refresh is due"""
+        if self.failures:
+            retry = min(RETRY_BASE_SECONDS * 2 ** (self.failures - 1), self.interval)
+            return random.uniform(retry / 2, retry)
+        due = self.interval - (time.time() - self.last_success)
+        for board_id, _, _ in self.boards:
+            # Questions refetch the boards too; whichever copy is newest sets the deadline
+            snapshot = self.service.snapshots.peek(board_id)
+            if snapshot is not None:
+                due = min(due, self.max_age * REFRESH_AHEAD - snapshot.age_seconds)
+        return max(due, 0.0)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception:
+                pass  # recorded in last_error; the service keeps serving the last good snapshots
+            delay = self._delay()
+            self.next_run = time.time() + delay
+            if self._stop.wait(delay):
+                return
+
+
+_refresher = None
+_refresher_lock = threading.Lock()
+_warmed = False
+
+
+def start_refresher():
+    """Start the process-wide refresher (once), or return None if it is disabled by config"""
+    global _refresher
+    if REFRESH_INTERVAL_SECONDS <= 0 or SNAPSHOT_MAX_AGE_SECONDS <= 0:
+        return None
+    with _refresher_lock:
+        if _refresher is None:
+            _refresher = BoardRefresher(
+                SERVICE,
+                [(DEALS_BOARD_ID, DEALS_SCHEMA), (WORK_ORDERS_BOARD_ID, WORK_ORDERS_SCHEMA)],
+                REFRESH_INTERVAL_SECONDS,
+                SNAPSHOT_MAX_AGE_SECONDS,
+            ).start()
+        return _refresher
+
+
+def warm_start():
+    """Map both boards' snapshot files (once per process) so the first questions don't wait on monday,
+    then catch up in the background: through the refresher when it is enabled, else with one download"""
+    global _warmed
+    with _refresher_lock:
+        if _warmed:
+            return []
+        _warmed = True
+    mapped = SERVICE.warm_start([(DEALS_BOARD_ID, DEALS_SCHEMA), (WORK_ORDERS_BOARD_ID, WORK_ORDERS_SCHEMA)])
+    if mapped and start_refresher() is None:
+        threading.Thread(target=_catch_up, args=(mapped,), name="board-catch-up", daemon=True).start()
+    return mapped
+
+
+def _catch_up(boards: list):
+    """Download the mapped boards, retrying with backoff until each has landed (a question's download counts)"""
+    failures = 0
+    while True:
+        boards = [board for board in boards if board[0] in SERVICE.warm_boards()]
+        if not boards:
+            return
+        try:
+            SERVICE.load_snapshots(*boards, refresh=True)
+            return
+        except Exception:
+            # Recorded in the board's health; meanwhile questions try monday and fall back to the mapped copy
+            failures += 1
+            retry = min(RETRY_BASE_SECONDS * 2 ** (failures - 1), CATCH_UP_MAX_DELAY_SECONDS)
+            time.sleep(random.uniform(retry / 2, retry))
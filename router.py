@@ -0,0 +1,244 @@
+import math
+import re
+import threading
+from collections import Counter
+
+# Sector names as the tools expect them, keyed by the words users type
+SECTORS = {
+    "mining": "Mining",
+    "powerline": "Powerline",
+    "renewable": "Renewables",
+    "renewables": "Renewables",
+    "railway": "Railways",
+    "railways": "Railways",
+    "tender": "Tender",
+    "dsp": "DSP",
+}
+SECTOR_TOKEN = "SECTOR"
+NO_TOOL = None
+
+# Questions that must go through the LLM: comparisons, multi-part asks and anything long
+MAX_WORDS = 12
+COMPLEX_WORDS = {"compare", "comparison", "vs", "versus", "between", "why", "should", "if"}
+# Qualifiers no tool takes (periods, counts, exclusions); a question carrying one needs the LLM
+QUALIFIER_WORDS = {
+    "count", "number", "per", "only", "except", "excluding", "without", "since", "until", "before", "after",
+    "last", "next", "today", "week", "month", "quarter", "year", "ytd",
+}
+# What "by ..." may break down by: revenue_analysis already reports revenue per sector
+BREAKDOWNS = {"sector", "sectors", "revenue"}
+# Words that lean on an earlier turn; with chat history such a question isn't routed
+CONTEXT_WORDS = {"it", "its", "they", "them", "their", "that", "those", "these", "this", "there", "same", "else"}
+FOLLOW_UP = re.compile(r"^(what|how) about\b|^(and|also|then)\b")
+
+# Lead-in words a rule allows before its phrase ("show me the ...", "what is our ...")
+LEAD = r"^(?:please |(?:show|give|get|tell) me |what (?:is|are) |what s |whats |our |the )*"
+# (pattern, tool, fixed params) — each matches the whole question, and is checked
+# before the classifier; a match is certain
+RULES = [
+    (r"(overall |full )?pipeline (summary|overview)", "pipeline_summary", {}),
+    (r"(revenue (and|&) billing|collection rate)( analysis)?", "revenue_analysis", {}),
+    (r"(top|best|strongest) (performing )?sectors?( by revenue)?", "revenue_analysis", {}),
+    (rf"{SECTOR_TOKEN} sector (performance|analysis|overview|deep dive)", "sector_analysis", {}),
+    (r"open deals( overview)?", "get_deals", {"status": "Open"}),
+    (r"work orders (in progress|ongoing)", "get_work_orders", {"status": "Ongoing"}),
+]
+RULES = [(re.compile(f"{LEAD}(?:{pattern})$"), tool, fixed) for pattern, tool, fixed in RULES]
+# Tools that take a sector param; naming a sector to any other tool is a qualifier it can't honour
+SECTOR_TOOLS = {"sector_analysis", "get_deals", "get_work_orders"}
+
+# Query → tool table the classifier is trained on; NO_TOOL marks greetings and
+# vague questions the LLM should answer or clarify itself
+TRAINING_QUERIES = [
+    ("overall pipeline summary", "pipeline_summary"),
+    ("give me a pipeline overview", "pipeline_summary"),
+    ("how is the pipeline looking", "pipeline_summary"),
+    ("summary of deals and work orders", "pipeline_summary"),
+    ("how many deals have we won", "pipeline_summary"),
+    ("deal status distribution", "pipeline_summary"),
+    ("deal stage breakdown", "pipeline_summary"),
+    ("which sector has the most work orders", "pipeline_summary"),
+    ("how many work orders are completed", "pipeline_summary"),
+    ("business overview", "pipeline_summary"),
+    ("revenue and billing analysis", "revenue_analysis"),
+    ("collection rate analysis", "revenue_analysis"),
+    ("what is our collection rate", "revenue_analysis"),
+    ("how much have we billed", "revenue_analysis"),
+    ("how much is receivable", "revenue_analysis"),
+    ("outstanding receivables", "revenue_analysis"),
+    ("cash flow status", "revenue_analysis"),
+    ("top performing sectors", "revenue_analysis"),
+    ("which sector brings the most revenue", "revenue_analysis"),
+    ("strongest sector by revenue", "revenue_analysis"),
+    ("revenue by sector", "revenue_analysis"),
+    ("mining sector performance", "sector_analysis"),
+    ("renewables sector analysis", "sector_analysis"),
+    ("how is railways doing", "sector_analysis"),
+    ("tell me about the powerline sector", "sector_analysis"),
+    ("mining deep dive", "sector_analysis"),
+    ("tender sector overview", "sector_analysis"),
+    ("dsp performance", "sector_analysis"),
+    ("open deals overview", "get_deals"),
+    ("list open deals", "get_deals"),
+    ("show me the open deals", "get_deals"),
+    ("deals on hold", "get_deals"),
+    ("dead deals", "get_deals"),
+    ("work orders in progress", "get_work_orders"),
+    ("ongoing work orders", "get_work_orders"),
+    ("list completed work orders", "get_work_orders"),
+    ("work orders not started", "get_work_orders"),
+    ("hi", NO_TOOL),
+    ("hello there", NO_TOOL),
+    ("hey how are you", NO_TOOL),
+    ("thanks", NO_TOOL),
+    ("tell me about deals", NO_TOOL),
+    ("show me sectors", NO_TOOL),
+    ("should we invest more", NO_TOOL),
+    ("what can you do", NO_TOOL),
+]
+
+# Status words the get_* tools filter on, by tool
+STATUSES = {
+    "get_deals": {"open": "Open", "on hold": "On Hold", "dead": "Dead"},
+    "get_work_orders": {
+        "completed": "Completed", "not started": "Not Started", "ongoing": "Ongoing", "in progress": "Ongoing",
+    },
+}
+
+
+def _normalize(question: str) -> tuple:
+    """Lowercased words with sector names swapped for SECTOR_TOKEN, plus the sectors found"""
+    words = re.findall(r"[a-z&]+", question.lower())
+    sectors = []
+    for i, word in enumerate(words):
+        if word in SECTORS:
+            sectors.append(SECTORS[word])
+            words[i] = SECTOR_TOKEN
+    return words, sectors
+
+
+def _qualified(words: list) -> bool:
+    """True if the question narrows or reshapes its ask beyond what a tool call returns"""
+    if QUALIFIER_WORDS.intersection(words):
+        return True
+    return any(word == "by" and following not in BREAKDOWNS for word, following in zip(words, words[1:] + [""]))
+
+
+def _follow_up(words: list) -> bool:
+    """True if the question only makes sense next to an earlier turn ("what about mining", "how is it doing")"""
+    return bool(CONTEXT_WORDS.intersection(words)) or FOLLOW_UP.match(" ".join(words)) is not None
+
+
+def _features(words: list) -> list:
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+class IntentClassifier:
+    """Multinomial naive Bayes over word unigrams and bigrams.
+
+    Small enough to train at import time from TRAINING_QUERIES; predict()
+    returns the most likely tool and its posterior probability.
+    """
+
+    def __init__(self, examples: list, alpha: float = 0.5):
+        self.alpha = alpha
+        self.counts = {}
+        self.totals = Counter()
+        self.priors = Counter()
+        for text, tool in examples:
+            features = _features(_normalize(text)[0])
+            self.counts.setdefault(tool, Counter()).update(features)
+            self.totals[tool] += len(features)
+            self.priors[tool] += 1
+        self.vocabulary = set().union(*self.counts.values())
+        self.n_examples = len(examples)
+
+    def predict(self, words: list) -> tuple:
+        features = [f for f in _features(words) if f in self.vocabulary]
+        if not features:
+            return NO_TOOL, 0.0
+        scores = {}
+        for tool, counts in self.counts.items():
+            denominator = self.totals[tool] + self.alpha * len(self.vocabulary)
+            scores[tool] = math.log(self.priors[tool] / self.n_examples) + sum(
+                math.log((counts[f] + self.alpha) / denominator) for f in features
+            )
+        best = max(scores, key=scores.get)
+        norm = sum(math.exp(s - scores[best]) for s in scores.values())
+        # Questions mostly made of unseen words shouldn't be trusted however peaked the posterior is
+        coverage = len([w for w in words if w in self.vocabulary]) / len(words)
+        return best, coverage / norm
+
+
+CLASSIFIER = IntentClassifier(TRAINING_QUERIES)
+
+
+class RouterStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.routed = 0
+        self.total = 0
+
+    def record(self, routed: bool):
+        with self._lock:
+            self.total += 1
+            self.routed += routed
+
+    @property
+    def hit_rate(self) -> float:
+        return self.routed / self.total if self.total else 0.0
+
+
+STATS = RouterStats()
+
+
+def _params(tool: str, question: str, sectors: list, fixed: dict):
+    """Tool params read off the question, or None if a required one is missing"""
+    params = dict(fixed)
+    if sectors and tool not in SECTOR_TOOLS:
+        return None
+    if tool in SECTOR_TOOLS and sectors:
+        params["sector"] = sectors[0]
+    if tool == "sector_analysis" and "sector" not in params:
+        return None
+    text = question.lower()
+    for word, status in STATUSES.get(tool, {}).items():
+        if "status" not in params and re.search(rf"\b{word}\b", text):
+            params["status"] = status
+    return params
+
+
+def route(question: str, threshold: float, chat_history: list = None) -> dict:
+    """Pick the tool call for a question without asking the LLM.
+
+    Returns {"tool", "params", "confidence", "source"}; "tool" is None when the
+    question should go through the normal agent loop (no confident match, a
+    comparison or multi-part question, a qualifier no tool takes, a required
+    param missing, or a follow-up to earlier turns in ``chat_history``).
+    """
+    words, sectors = _normalize(question)
+    decision = {"tool": None, "params": {}, "confidence": 0.0, "source": None}
+    if not words or len(words) > MAX_WORDS or len(set(sectors)) > 1 or COMPLEX_WORDS.intersection(words):
+        return decision
+    if _qualified(words) or (chat_history and _follow_up(words)):
+        return decision
+
+    text = " ".join(words)
+    for pattern, tool, fixed in RULES:
+        if pattern.match(text):
+            decision.update(tool=tool, confidence=1.0, source="rule")
+            params = _params(tool, question, sectors, fixed)
+            break
+    else:
+        tool, confidence = CLASSIFIER.predict(words)
+        decision.update(confidence=round(confidence, 3), source="classifier")
+        if tool is NO_TOOL or confidence < threshold:
+            return decision
+        decision["tool"] = tool
+        params = _params(tool, question, sectors, {})
+
+    if params is None:
+        decision["tool"] = None
+        return decision
+    decision["params"] = params
+    return decision
@@ -0,0 +1,79 @@
+import asyncio
+import queue
+import threading
+
+_loop = None
+_lock = threading.Lock()
+_DONE = object()
+
+
+def loop() -> asyncio.AbstractEventLoop:
+    """The process-wide event loop every conversation's agent turn runs on, started on first use"""
+    global _loop
+    with _lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="bi-agent-runtime", daemon=True).start()
+        return _loop
+
+
+def _check_thread():
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        return
+    if running is _loop:
+        raise RuntimeError("blocking call on the runtime loop; await the async version instead")
+
+
+def run(coro, timeout: float = None):
+    """Run a coroutine on the runtime loop and block the calling thread for its result.
+
+    The coroutine sees a copy of the caller's context (request scope, span recorder).
+    If the wait times out or the caller is interrupted, the coroutine is cancelled.
+    """
+    _check_thread()
+    future = asyncio.run_coroutine_threadsafe(coro, loop())
+    try:
+        return future.result(timeout)
+    except BaseException:
+        future.cancel()
+        raise
+
+
+def iterate(agen):
+    """Drive an async generator on the runtime loop as a plain generator.
+
+    One task runs the whole generator (so context variables it sets hold across
+    its awaits) and hands items over through a queue. Closing this generator
+    early — the consumer stopped reading, e.g. a Streamlit rerun when the user
+    navigates away — cancels the task, which cancels whatever it was awaiting.
+    """
+    _check_thread()
+    items = queue.Queue()
+
+    async def pump():
+        try:
+            async for item in agen:
+                items.put((item, None))
+        except asyncio.CancelledError as e:
+            items.put((_DONE, e))
+            raise
+        except BaseException as e:
+            items.put((_DONE, e))
+            return
+        items.put((_DONE, None))
+
+    future = asyncio.run_coroutine_threadsafe(pump(), loop())
+    try:
+        while True:
+            item, error = items.get()
+            if item is _DONE:
+                if isinstance(error, asyncio.CancelledError):
+                    raise RuntimeError("cancelled on the runtime loop") from error
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        future.cancel()
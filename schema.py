@@ -0,0 +1,111 @@
+import sys
+from datetime import datetime
+
+CURRENCY = "currency"
+NUMERIC = "numeric"
+DATE = "date"
+CATEGORICAL = "categorical"
+
+DATE_FORMATS = ["%Y-%m-%d", "%d/%m/%Y", "%d-%m-%Y", "%d %b %Y", "%b %d, %Y"]
+
+
+def parse_currency(text: str):
+    """'₹ 1,20,000' -> 120000.0; currency symbols, grouping and spaces are stripped, bad input raises"""
+    cleaned = text.replace(",", "").replace("₹", "").replace("$", "").replace(" ", "").strip()
+    return float(cleaned) if cleaned else None
+
+
+def parse_numeric(text: str):
+    cleaned = text.replace(",", "").strip()
+    return float(cleaned) if cleaned else None
+
+
+def parse_date(text: str):
+    """Return the date as an ISO 'YYYY-MM-DD' string (monday sends 'YYYY-MM-DD' or 'YYYY-MM-DD HH:MM')"""
+    text = text.strip()
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(text[:10] if fmt == "%Y-%m-%d" else text, fmt).date().isoformat()
+        except ValueError:
+            continue
+    raise ValueError(f"unrecognised date: {text!r}")
+
+
+PARSERS = {
+    CURRENCY: parse_currency,
+    NUMERIC: parse_numeric,
+    DATE: parse_date,
+    CATEGORICAL: sys.intern,
+}
+
+
+class BoardSchema:
+    """Declared column types of a board, applied once when items are ingested.
+
+    Currency and numeric cells become floats, dates become ISO strings and
+    categorical labels are interned. Cells that fail to parse become None and
+    are recorded per item, so data-quality problems show up in traces instead
+    of silently turning into 0.0.
+    """
+
+    def __init__(self, name: str, header_names: list, columns: dict):
+        self.name = name
+        self.header_names = header_names
+        self.columns = columns
+
+    def parse_row(self, item_id, row: dict, issues: dict):
+        """Parse ``row`` in place; unparseable cells go to issues[title][item_id] = raw text"""
+        for title, kind in self.columns.items():
+            text = row.get(title)
+            if text is None:
+                continue
+            try:
+                row[title] = PARSERS[kind](text)
+            except (ValueError, TypeError):
+                row[title] = None
+                issues.setdefault(title, {})[item_id] = text
+
+
+def quality_summary(issues: dict, samples: int = 3) -> dict:
+    """{column: {"invalid": count, "examples": [...]}} for the columns that had parse failures"""
+    return {
+        title: {"invalid": len(bad), "examples": list(dict.fromkeys(bad.values()))[:samples]}
+        for title, bad in issues.items() if bad
+    }
+
+
+DEALS_SCHEMA = BoardSchema(
+    "Deals",
+    header_names=["Deal Name", "name", None],
+    columns={
+        "Masked Deal value": CURRENCY,
+        "Closure Probability": CATEGORICAL,  # High / Medium / Low labels (occasionally a number)
+        "Deal Stage": CATEGORICAL,
+        "Deal Status": CATEGORICAL,
+        "Sector/service": CATEGORICAL,
+        "Close Date (A)": DATE,
+        "Tentative Close Date": DATE,
+        "Created Date": DATE,
+    },
+)
+
+WORK_ORDERS_SCHEMA = BoardSchema(
+    "Work Orders",
+    header_names=["Deal name masked", "name", None],
+    columns={
+        "Amount Incl GST": CURRENCY,
+        "Billed Value Incl GST": CURRENCY,
+        "Collected Amount": CURRENCY,
+        "Amount Receivable": CURRENCY,
+        "Amount to Bill Incl GST": CURRENCY,
+        "Sector": CATEGORICAL,
+        "Execution Status": CATEGORICAL,
+        "Billing Status": CATEGORICAL,
+        "Invoice Status": CATEGORICAL,
+        "Data Delivery Date": DATE,
+        "Date of PO/LOI": DATE,
+        "Probable Start Date": DATE,
+        "Probable End Date": DATE,
+        "Last invoice date": DATE,
+    },
+)
@@ -0,0 +1,133 @@
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+
+from cache import BoardSnapshot
+from compact import ColumnTable
+
+# Bump when the layout changes; files in another format are ignored and rewritten after the next download
+FORMAT_VERSION = 1
+MAGIC = b"BISNAP"
+# Magic, format version, header length
+_PREFIX = struct.Struct("<6sHI")
+_ALIGN = 8
+
+
+def snapshot_path(directory: str, board_id) -> str:
+    return os.path.join(directory, f"board_{board_id}.snap")
+
+
+def snapshot_boards(directory: str) -> list:
+    """IDs of the boards with a snapshot file in ``directory``"""
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        return []
+    return [name[len("board_"):-len(".snap")] for name in names
+            if name.startswith("board_") and name.endswith(".snap")]
+
+
+def _padding(offset: int) -> int:
+    return -offset % _ALIGN
+
+
+def write_snapshot(path: str, snapshot: BoardSnapshot):
+    """Write a snapshot to ``path`` atomically: readers see the old file or the new one, never half of one.
+
+    Layout: a fixed prefix (magic, format version, header length), a JSON header
+    (board ID, sync times, fetched columns, item IDs, parse issues, and each
+    column's array type, offset and dictionary labels), then every column's raw
+    array — float64 values or dictionary codes — aligned to 8 bytes.
+    """
+    rows = snapshot.rows if isinstance(snapshot.rows, ColumnTable) else ColumnTable.from_rows(snapshot.rows)
+    layout = []
+    arrays = []
+    offset = 0
+    for title, data, labels in rows.buffers():
+        nbytes = len(data) * data.itemsize
+        layout.append({
+            "title": title,
+            "type": data.typecode if hasattr(data, "typecode") else data.format,
+            "offset": offset,
+            "nbytes": nbytes,
+            "labels": labels,
+        })
+        arrays.append((data, _padding(nbytes)))
+        offset += nbytes + _padding(nbytes)
+    header = json.dumps({
+        "board_id": snapshot.board_id,
+        "byteorder": sys.byteorder,
+        "fetched_at": snapshot.fetched_at,
+        "reconciled_at": snapshot.reconciled_at,
+        "columns": sorted(snapshot.columns) if snapshot.columns is not None else None,
+        "size": len(rows),
+        "item_ids": snapshot.item_ids,
+        "issues": snapshot.issues or {},
+        "layout": layout,
+    }).encode()
+
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, temp = tempfile.mkstemp(dir=directory, prefix=".snap-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(_PREFIX.pack(MAGIC, FORMAT_VERSION, len(header)))
+            f.write(header)
+            f.write(b"\0" * _padding(_PREFIX.size + len(header)))
+            for data, padding in arrays:
+                f.write(data)
+                f.write(b"\0" * padding)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp, path)
+    except BaseException:
+        try:
+            os.unlink(temp)
+        except OSError:
+            pass
+        raise
+
+
+def read_snapshot(path: str):
+    """Map a snapshot file, or return None if it is missing, damaged, or in another format or byte order.
+
+    Column arrays are memoryviews over the mapping, so loading costs one header
+    parse; the OS pages column data in as it is read and shares it between
+    processes mapping the same file.
+    """
+    try:
+        with open(path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):  # missing, or empty (which can't be mapped)
+        return None
+    try:
+        magic, version, length = _PREFIX.unpack_from(mapped)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            return None
+        header = json.loads(mapped[_PREFIX.size:_PREFIX.size + length])
+        if header["byteorder"] != sys.byteorder:
+            return None
+        start = _PREFIX.size + length + _padding(_PREFIX.size + length)
+        view = memoryview(mapped)
+        buffers = []
+        for column in header["layout"]:
+            begin = start + column["offset"]
+            data = view[begin:begin + column["nbytes"]].cast(column["type"])
+            if len(data) != header["size"]:
+                return None
+            buffers.append((column["title"], data, column["labels"]))
+    except (struct.error, ValueError, TypeError, KeyError):
+        return None
+    columns = header["columns"]
+    return BoardSnapshot(
+        header["board_id"],
+        ColumnTable.from_buffers(header["size"], buffers),
+        header["fetched_at"],
+        item_ids=header["item_ids"],
+        reconciled_at=header["reconciled_at"],
+        columns=frozenset(columns) if columns is not None else None,
+        issues=header["issues"],
+    )
@@ -0,0 +1,167 @@
+import json
+import sqlite3
+import threading
+from cache import BoardSnapshot
+from compact import ColumnTable
+
+# Bump when the stored row format changes; older stores are rebuilt from monday
+STORE_VERSION = 4
+
+# Row fields that get their own indexed column, keyed by normalized column title
+INDEXED_COLUMNS = {
+    "Sector": "sector",
+    "Sector/service": "sector_service",
+    "Deal Stage": "deal_stage",
+    "Deal Status": "deal_status",
+    "Execution Status": "execution_status",
+}
+
+
+class BoardStore:
+    """SQLite copy of the latest normalized snapshot of each board.
+
+    Survives process restarts, and answers category filters (sector, stage,
+    status) through indexes instead of scanning every row.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            if self._conn.execute("PRAGMA user_version").fetchone()[0] != STORE_VERSION:
+                self._conn.execute("DROP TABLE IF EXISTS items")
+                self._conn.execute("DROP TABLE IF EXISTS boards")
+                self._conn.execute(f"PRAGMA user_version = {STORE_VERSION}")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS boards ("
+                "board_id TEXT PRIMARY KEY, fetched_at REAL NOT NULL, reconciled_at REAL NOT NULL, issues_json TEXT, "
+                "columns_json TEXT)"
+            )
+            indexed = ", ".join(f"{col} TEXT" for col in INDEXED_COLUMNS.values())
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS items ("
+                "board_id TEXT NOT NULL, pos INTEGER NOT NULL, item_id TEXT, row_json TEXT NOT NULL, "
+                f"{indexed}, PRIMARY KEY (board_id, pos))"
+            )
+            for col in INDEXED_COLUMNS.values():
+                self._conn.execute(f"CREATE INDEX IF NOT EXISTS items_{col} ON items (board_id, {col})")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS items_item_id ON items (board_id, item_id)")
+
+    def save_snapshot(self, snapshot: BoardSnapshot):
+        item_ids = snapshot.item_ids or [None] * len(snapshot.rows)
+        records = (
+            (snapshot.board_id, pos, item_id, json.dumps(dict(row)), *(row.get(title) for title in INDEXED_COLUMNS))
+            for pos, (item_id, row) in enumerate(zip(item_ids, snapshot.rows))
+        )
+        placeholders = ", ".join("?" * (4 + len(INDEXED_COLUMNS)))
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM items WHERE board_id = ?", (snapshot.board_id,))
+            self._conn.executemany(
+                f"INSERT INTO items (board_id, pos, item_id, row_json, {', '.join(INDEXED_COLUMNS.values())}) "
+                f"VALUES ({placeholders})",
+                records,
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO boards (board_id, fetched_at, reconciled_at, issues_json, columns_json) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (
+                    snapshot.board_id, snapshot.fetched_at, snapshot.reconciled_at, json.dumps(snapshot.issues or {}),
+                    json.dumps(sorted(snapshot.columns)) if snapshot.columns is not None else None,
+                ),
+            )
+
+    def save_item(self, board_id, item_id, row: dict, issues: dict):
+        """Replace one item's row (appending it if new) and the board's parse issues, for pushed changes"""
+        board_id, item_id = str(board_id), str(item_id)
+        indexed = [row.get(title) for title in INDEXED_COLUMNS]
+        with self._lock, self._conn:
+            if self._conn.execute("SELECT 1 FROM boards WHERE board_id = ?", (board_id,)).fetchone() is None:
+                return
+            updated = self._conn.execute(
+                f"UPDATE items SET row_json = ?, {', '.join(f'{col} = ?' for col in INDEXED_COLUMNS.values())} "
+                "WHERE board_id = ? AND item_id = ?",
+                (json.dumps(row), *indexed, board_id, item_id),
+            ).rowcount
+            if not updated:
+                pos = self._conn.execute(
+                    "SELECT COALESCE(MAX(pos), -1) + 1 FROM items WHERE board_id = ?", (board_id,)
+                ).fetchone()[0]
+                self._conn.execute(
+                    f"INSERT INTO items (board_id, pos, item_id, row_json, {', '.join(INDEXED_COLUMNS.values())}) "
+                    f"VALUES ({', '.join('?' * (4 + len(INDEXED_COLUMNS)))})",
+                    (board_id, pos, item_id, json.dumps(row), *indexed),
+                )
+            self._conn.execute("UPDATE boards SET issues_json = ? WHERE board_id = ?", (json.dumps(issues), board_id))
+
+    def delete_item(self, board_id, item_id, issues: dict):
+        board_id = str(board_id)
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM items WHERE board_id = ? AND item_id = ?", (board_id, str(item_id)))
+            self._conn.execute("UPDATE boards SET issues_json = ? WHERE board_id = ?", (json.dumps(issues), board_id))
+
+    def invalidate(self, board_id=None):
+        with self._lock, self._conn:
+            if board_id is None:
+                self._conn.execute("DELETE FROM items")
+                self._conn.execute("DELETE FROM boards")
+            else:
+                self._conn.execute("DELETE FROM items WHERE board_id = ?", (str(board_id),))
+                self._conn.execute("DELETE FROM boards WHERE board_id = ?", (str(board_id),))
+
+    def load_snapshot(self, board_id):
+        board_id = str(board_id)
+        with self._lock:
+            meta = self._conn.execute(
+                "SELECT fetched_at, reconciled_at, issues_json, columns_json FROM boards WHERE board_id = ?", (board_id,)
+            ).fetchone()
+            if meta is None:
+                return None
+            records = self._conn.execute(
+                "SELECT item_id, row_json FROM items WHERE board_id = ? ORDER BY pos", (board_id,)
+            ).fetchall()
+        return BoardSnapshot(
+            board_id,
+            ColumnTable.from_rows(json.loads(row_json) for _, row_json in records),
+            meta[0],
+            item_ids=[item_id for item_id, _ in records],
+            reconciled_at=meta[1],
+            issues=json.loads(meta[2] or "{}"),
+            columns=frozenset(json.loads(meta[3])) if meta[3] else None,
+        )
+
+    def fetched_at(self, board_id):
+        with self._lock:
+            meta = self._conn.execute("SELECT fetched_at FROM boards WHERE board_id = ?", (str(board_id),)).fetchone()
+        return meta[0] if meta else None
+
+    def distinct_values(self, board_id, title: str) -> list:
+        col = INDEXED_COLUMNS[title]
+        with self._lock:
+            records = self._conn.execute(
+                f"SELECT DISTINCT {col} FROM items WHERE board_id = ? AND {col} IS NOT NULL", (str(board_id),)
+            ).fetchall()
+        return [value for value, in records]
+
+    def query(self, board_id, filters: dict) -> list:
+        """Rows whose indexed columns contain each filter substring (case-insensitive).
+
+        Each substring is first resolved against the column's few distinct values,
+        so the row lookup itself is an exact IN (...) match on the index.
+        """
+        clauses = ["board_id = ?"]
+        args = [str(board_id)]
+        for title, needle in filters.items():
+            if not needle:
+                continue
+            matches = [v for v in self.distinct_values(board_id, title) if v and needle.lower() in v.lower()]
+            if not matches:
+                return []
+            clauses.append(f"{INDEXED_COLUMNS[title]} IN ({', '.join('?' * len(matches))})")
+            args.extend(matches)
+        with self._lock:
+            records = self._conn.execute(
+                f"SELECT row_json FROM items WHERE {' AND '.join(clauses)} ORDER BY pos", args
+            ).fetchall()
+        return [json.loads(row_json) for row_json, in records]
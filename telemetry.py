@@ -0,0 +1,151 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+_recorder = ContextVar("span_recorder", default=None)
+
+# Histogram buckets (seconds) for span durations — from one page parse to a full Groq answer
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class SpanRecorder:
+    """Spans finished while this recorder is current, with start times relative to ``origin``"""
+
+    def __init__(self, origin: float = None):
+        self.origin = time.perf_counter() if origin is None else origin
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def add(self, name: str, started: float, duration: float, attrs: dict):
+        record = {
+            "name": name,
+            "start_ms": round((started - self.origin) * 1000, 1),
+            "duration_ms": round(duration * 1000, 1),
+            **attrs,
+        }
+        with self._lock:
+            self.spans.append(record)
+
+
+@contextmanager
+def recording(origin: float = None):
+    """Collect the spans of the block (and of threads started from a copy of its context)"""
+    recorder = SpanRecorder(origin)
+    token = _recorder.set(recorder)
+    try:
+        yield recorder
+    finally:
+        _recorder.reset(token)
+
+
+def current_recorder():
+    return _recorder.get()
+
+
+@contextmanager
+def span(name: str, **attrs):
+    """Time the block as stage ``name``; the yielded dict takes extra attributes (bytes, items, ...).
+
+    Every span feeds the process-wide METRICS histogram; it is also added to the
+    current recorder, if any, for the trace waterfall.
+    """
+    started = time.perf_counter()
+    try:
+        yield attrs
+    finally:
+        duration = time.perf_counter() - started
+        METRICS.observe(name, duration)
+        recorder = _recorder.get()
+        if recorder is not None:
+            recorder.add(name, started, duration, attrs)
+
+
+def _labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in sorted(labels.items())) + "}"
+
+
+class Metrics:
+    """Process-wide span-duration histograms and counters, rendered in Prometheus text format"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}  # span name -> [bucket counts..., +Inf count, sum]
+        self._counters = {}  # (metric, labels tuple) -> value
+        self._help = {}
+
+    def observe(self, name: str, seconds: float):
+        with self._lock:
+            histogram = self._histograms.setdefault(name, [0] * (len(BUCKETS) + 1) + [0.0])
+            histogram[bisect_left(BUCKETS, seconds)] += 1
+            histogram[-1] += seconds
+
+    def count(self, metric: str, value: float = 1, help_text: str = "", **labels):
+        key = (metric, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+            if help_text:
+                self._help.setdefault(metric, help_text)
+
+    def render(self) -> str:
+        with self._lock:
+            histograms = {name: list(h) for name, h in self._histograms.items()}
+            counters = dict(self._counters)
+            help_texts = dict(self._help)
+        lines = [
+            "# HELP bi_agent_span_seconds Wall time of instrumented stages (monday HTTP, normalize, tools, LLM)",
+            "# TYPE bi_agent_span_seconds histogram",
+        ]
+        for name, histogram in sorted(histograms.items()):
+            cumulative = 0
+            for bound, n in zip(BUCKETS + ("+Inf",), histogram[:-1]):
+                cumulative += n
+                lines.append(f'bi_agent_span_seconds_bucket{{span="{name}",le="{bound}"}} {cumulative}')
+            lines.append(f'bi_agent_span_seconds_sum{{span="{name}"}} {histogram[-1]:.6f}')
+            lines.append(f'bi_agent_span_seconds_count{{span="{name}"}} {cumulative}')
+        for metric in sorted({metric for metric, _ in counters}):
+            if metric in help_texts:
+                lines.append(f"# HELP {metric} {help_texts[metric]}")
+            lines.append(f"# TYPE {metric} counter")
+            for (name, labels), value in sorted(counters.items()):
+                if name == metric:
+                    lines.append(f"{metric}{_labels(dict(labels))} {value:g}")
+        return "\n".join(lines) + "\n"
+
+
+METRICS = Metrics()
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def start_metrics_server(port: int, host: str = "0.0.0.0"):
+    """Serve METRICS at http://host:port/metrics from a daemon thread (once per process)"""
+    global _server
+    with _server_lock:
+        if _server is not None:
+            return _server
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                payload = METRICS.render().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        _server = ThreadingHTTPServer((host, port), Handler)
+        _server.daemon_threads = True
+        threading.Thread(target=_server.serve_forever, name="metrics-server", daemon=True).start()
+        return _server
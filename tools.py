@@ -1,4 +1,10 @@
-from monday_api import get_board_items, safe_float, get_column_titles
+import asyncio
+
+from aggregate import board_columns, board_rollup
+from boards import load_snapshots, query_board, aload_snapshots, aquery_board
+from cache import snapshot_version
+from telemetry import span
+from schema import DEALS_SCHEMA, WORK_ORDERS_SCHEMA, quality_summary
 from config import WORK_ORDERS_BOARD_ID, DEALS_BOARD_ID
 
 
@@ -7,199 +13,323 @@ def crores(value):
     return round(value / 10000000, 2)
 
 
-def fetch_deals() -> list:
-    col_map = get_column_titles(DEALS_BOARD_ID)
-    items = get_board_items(DEALS_BOARD_ID)
-    result = []
-    for item in items:
-        row = {"name": item.get("name", "Unknown")}
-        for col in item.get("column_values", []):
-            col_id = col.get("id", "")
-            title = col_map.get(col_id, col_id).strip()
-            text = col.get("text", "") or ""
-            if text.strip() in ["", "null", "None", "-", "N/A", "n/a"]:
-                text = None
-            row[title] = text
-        result.append(row)
-    result = [r for r in result if r.get("name") not in ["Deal Name", "name", None]]
-    return result
-
-
-def fetch_work_orders() -> list:
-    col_map = get_column_titles(WORK_ORDERS_BOARD_ID)
-    items = get_board_items(WORK_ORDERS_BOARD_ID)
-    result = []
-    for item in items:
-        row = {"name": item.get("name", "Unknown")}
-        for col in item.get("column_values", []):
-            col_id = col.get("id", "")
-            title = col_map.get(col_id, col_id).strip()
-            text = col.get("text", "") or ""
-            if text.strip() in ["", "null", "None", "-", "N/A", "n/a"]:
-                text = None
-            row[title] = text
-        result.append(row)
-    result = [r for r in result if r.get("name") not in ["Deal name masked", "name", None]]
-    return result
+def _billing_status(wo):
+    s = (wo.get("Billing Status") or wo.get("Invoice Status") or "Unknown").strip()
+    return "Billed" if s.lower() in ["billed", "biled", "bllied"] else s
+
+
+# Typed column layout of each board for the aggregation engine
+DEAL_COLUMNS = {
+    "money": ["Masked Deal value"],
+    "categories": ["Deal Stage", "Deal Status", "Sector/service"],
+}
+WORK_ORDER_COLUMNS = {
+    "money": ["Billed Value Incl GST", "Collected Amount", "Amount Receivable", "Amount Incl GST", "Amount to Bill Incl GST"],
+    "categories": ["Sector", "Execution Status", ("Billing Status", _billing_status)],
+}
+
+
+# Column titles each summary tool reads, per board — only these are fetched from monday
+PIPELINE_COLUMNS = (
+    ["Deal Stage", "Deal Status", "Masked Deal value"],
+    ["Sector", "Execution Status", "Billed Value Incl GST", "Collected Amount", "Amount Receivable"],
+)
+SECTOR_COLUMNS = (
+    ["Sector/service", "Deal Stage", "Deal Status", "Masked Deal value"],
+    ["Sector", "Execution Status", "Billed Value Incl GST", "Collected Amount", "Amount Receivable"],
+)
+REVENUE_COLUMNS = [
+    "Sector", "Execution Status", "Billing Status", "Invoice Status", "Billed Value Incl GST",
+    "Collected Amount", "Amount Receivable", "Amount Incl GST", "Amount to Bill Incl GST",
+]
+
+
+SCHEMAS = {str(DEALS_BOARD_ID): DEALS_SCHEMA, str(WORK_ORDERS_BOARD_ID): WORK_ORDERS_SCHEMA}
+
+
+def _fetch_snapshots(*boards, trace=None) -> list:
+    """Load (board_id, schema[, columns]) boards; without columns the whole board is fetched"""
+    boards = [board if len(board) == 3 else (*board, None) for board in boards]
+    loaded = load_snapshots(*boards)
+    if trace is not None:
+        _trace_snapshots(trace, boards, loaded)
+    return [snapshot for snapshot, _ in loaded]
+
+
+async def _afetch_snapshots(*boards, trace=None) -> list:
+    boards = [board if len(board) == 3 else (*board, None) for board in boards]
+    loaded = await aload_snapshots(*boards)
+    if trace is not None:
+        # Hashing a freshly loaded board is a full pass over it; keep it off the event loop
+        await asyncio.to_thread(_trace_snapshots, trace, boards, loaded)
+    return [snapshot for snapshot, _ in loaded]
+
+
+def _trace_snapshots(trace: dict, boards: list, loaded: list):
+    # What the result was computed from, so cached answers can tell when it changes
+    trace["data_versions"] = {
+        str(board_id): {"columns": sorted(columns) if columns is not None else None,
+                        "version": snapshot_version(snapshot, columns)}
+        for (board_id, _, columns), (snapshot, _) in zip(boards, loaded)
+    }
+    trace["from_cache"] = all(hit for _, hit in loaded)
+    trace["data_age_seconds"] = round(max(snapshot.age_seconds for snapshot, _ in loaded), 1)
+    quality = {
+        schema.name: quality_summary(snapshot.issues or {})
+        for (_, schema, _), (snapshot, _) in zip(boards, loaded)
+    }
+    if any(quality.values()):
+        trace["data_quality"] = {name: q for name, q in quality.items() if q}
+
+
+def _query_board(board_id, schema, filters, trace) -> list:
+    """Filtered rows of one board, pushing the filters down to monday when the board isn't cached"""
+    rows, stats = query_board(board_id, schema, filters)
+    _trace_query(trace, board_id, schema, stats)
+    return rows
+
+
+async def _aquery_board(board_id, schema, filters, trace) -> list:
+    rows, stats = await aquery_board(board_id, schema, filters)
+    _trace_query(trace, board_id, schema, stats)
+    return rows
+
+
+def _trace_query(trace: dict, board_id, schema, stats: dict):
+    if stats["version"] is not None:
+        trace["data_versions"] = {str(board_id): {"columns": None, "version": stats["version"]}}
+    trace["from_cache"] = stats["from_cache"]
+    trace["data_age_seconds"] = round(stats["data_age_seconds"], 1)
+    trace["items_transferred"] = stats["items_transferred"]
+    quality = quality_summary(stats["issues"] or {})
+    if quality:
+        trace["data_quality"] = {schema.name: quality}
+
+
+def _fetch_boards(*boards, trace=None) -> list:
+    return [snapshot.rows for snapshot in _fetch_snapshots(*boards, trace=trace)]
+
+
+def _both_boards(columns) -> tuple:
+    deal_columns, work_order_columns = columns
+    return (DEALS_BOARD_ID, DEALS_SCHEMA, deal_columns), (WORK_ORDERS_BOARD_ID, WORK_ORDERS_SCHEMA, work_order_columns)
+
+
+def _columnar(deals, work_orders) -> tuple:
+    with span("columnar"):
+        return board_columns(deals, DEAL_COLUMNS), board_columns(work_orders, WORK_ORDER_COLUMNS)
+
+
+def _rollups(deals, work_orders) -> tuple:
+    with span("rollup"):
+        return board_rollup(deals, DEAL_COLUMNS), board_rollup(work_orders, WORK_ORDER_COLUMNS)
+
+
+def _fetch_columns(columns, trace=None) -> tuple:
+    return _columnar(*_fetch_snapshots(*_both_boards(columns), trace=trace))
+
+
+def _fetch_rollups(columns, trace=None) -> tuple:
+    return _rollups(*_fetch_snapshots(*_both_boards(columns), trace=trace))
+
+
+# Building columns/rollups of a fresh snapshot is CPU work, so the async versions run it in a thread
+async def _afetch_columns(columns, trace=None) -> tuple:
+    return await asyncio.to_thread(_columnar, *await _afetch_snapshots(*_both_boards(columns), trace=trace))
+
+
+async def _afetch_rollups(columns, trace=None) -> tuple:
+    return await asyncio.to_thread(_rollups, *await _afetch_snapshots(*_both_boards(columns), trace=trace))
+
+
+def current_versions(data_versions: dict) -> dict:
+    """Current content hash of each board in a trace's data_versions, for the same columns"""
+    boards = [(board_id, SCHEMAS[board_id], dep["columns"]) for board_id, dep in data_versions.items()]
+    loaded = load_snapshots(*boards)
+    return {
+        board_id: snapshot_version(snapshot, columns)
+        for (board_id, _, columns), (snapshot, _) in zip(boards, loaded)
+    }
+
+
+async def acurrent_versions(data_versions: dict) -> dict:
+    boards = [(board_id, SCHEMAS[board_id], dep["columns"]) for board_id, dep in data_versions.items()]
+    loaded = await aload_snapshots(*boards)
+
+    def versions():
+        return {
+            board_id: snapshot_version(snapshot, columns)
+            for (board_id, _, columns), (snapshot, _) in zip(boards, loaded)
+        }
+    return await asyncio.to_thread(versions)
+
+
+def fetch_deals(trace=None) -> list:
+    return _fetch_boards((DEALS_BOARD_ID, DEALS_SCHEMA), trace=trace)[0]
+
+
+def fetch_work_orders(trace=None) -> list:
+    return _fetch_boards((WORK_ORDERS_BOARD_ID, WORK_ORDERS_SCHEMA), trace=trace)[0]
+
+
+def fetch_deals_and_work_orders(trace=None) -> tuple:
+    deals, work_orders = _fetch_boards(
+        (DEALS_BOARD_ID, DEALS_SCHEMA),
+        (WORK_ORDERS_BOARD_ID, WORK_ORDERS_SCHEMA),
+        trace=trace,
+    )
+    return deals, work_orders
 
 
 # ─── TOOL 1: GET WORK ORDERS ──────────────────────────────────────────────────
-def tool_get_work_orders(sector=None, status=None):
+def _work_orders_query(sector, status, offset) -> tuple:
+    # offset only picks which rows the agent lists when the result is too large to show in full
     trace = {
         "tool": "get_work_orders",
-        "params": {"sector": sector, "status": status},
+        "params": {"sector": sector, "status": status, "offset": offset},
         "board": f"Work Orders (ID: {WORK_ORDERS_BOARD_ID})"
     }
-    data = fetch_work_orders()
-    if sector:
-        data = [d for d in data if d.get("Sector") and sector.lower() in str(d["Sector"]).lower()]
-    if status:
-        data = [d for d in data if d.get("Execution Status") and status.lower() in str(d["Execution Status"]).lower()]
+    return (WORK_ORDERS_BOARD_ID, WORK_ORDERS_SCHEMA, {"Sector": sector, "Execution Status": status}, trace)
+
+
+def tool_get_work_orders(sector=None, status=None, offset=0):
+    query = _work_orders_query(sector, status, offset)
+    return _rows_result(_query_board(*query), query[-1])
+
+
+async def atool_get_work_orders(sector=None, status=None, offset=0):
+    query = _work_orders_query(sector, status, offset)
+    return _rows_result(await _aquery_board(*query), query[-1])
+
+
+def _rows_result(data: list, trace: dict) -> dict:
     trace["records_returned"] = len(data)
     return {"data": data, "trace": trace}
 
 
 # ─── TOOL 2: GET DEALS ────────────────────────────────────────────────────────
-def tool_get_deals(sector=None, stage=None, status=None):
+def _deals_query(sector, stage, status, offset) -> tuple:
     trace = {
         "tool": "get_deals",
-        "params": {"sector": sector, "stage": stage, "status": status},
+        "params": {"sector": sector, "stage": stage, "status": status, "offset": offset},
         "board": f"Deals (ID: {DEALS_BOARD_ID})"
     }
-    data = fetch_deals()
-    if sector:
-        data = [d for d in data if d.get("Sector/service") and sector.lower() in str(d["Sector/service"]).lower()]
-    if stage:
-        data = [d for d in data if d.get("Deal Stage") and stage.lower() in str(d["Deal Stage"]).lower()]
-    if status:
-        data = [d for d in data if d.get("Deal Status") and status.lower() in str(d["Deal Status"]).lower()]
-    trace["records_returned"] = len(data)
-    return {"data": data, "trace": trace}
+    filters = {"Sector/service": sector, "Deal Stage": stage, "Deal Status": status}
+    return (DEALS_BOARD_ID, DEALS_SCHEMA, filters, trace)
+
+
+def tool_get_deals(sector=None, stage=None, status=None, offset=0):
+    query = _deals_query(sector, stage, status, offset)
+    return _rows_result(_query_board(*query), query[-1])
+
+
+async def atool_get_deals(sector=None, stage=None, status=None, offset=0):
+    query = _deals_query(sector, stage, status, offset)
+    return _rows_result(await _aquery_board(*query), query[-1])
 
 
 # ─── TOOL 3: PIPELINE SUMMARY ─────────────────────────────────────────────────
 def tool_pipeline_summary():
     trace = {"tool": "pipeline_summary", "params": {}, "board": "Both boards"}
-    deals = fetch_deals()
-    work_orders = fetch_work_orders()
-
-    stage_counts = {}
-    status_counts = {}
-    total_deal_value = 0.0
-    open_deals = 0
-
-    for d in deals:
-        stage = d.get("Deal Stage") or "Unknown"
-        stage_counts[stage] = stage_counts.get(stage, 0) + 1
-        status = d.get("Deal Status") or "Unknown"
-        status_counts[status] = status_counts.get(status, 0) + 1
-        total_deal_value += safe_float(d.get("Masked Deal value"))
-        if str(d.get("Deal Status", "")).strip().lower() == "open":
-            open_deals += 1
-
-    sector_counts = {}
-    exec_status_counts = {}
-    for wo in work_orders:
-        sector = wo.get("Sector") or "Unknown"
-        sector_counts[sector] = sector_counts.get(sector, 0) + 1
-        es = wo.get("Execution Status") or "Unknown"
-        exec_status_counts[es] = exec_status_counts.get(es, 0) + 1
+    return _pipeline_summary(*_fetch_columns(PIPELINE_COLUMNS, trace), trace)
 
+
+async def atool_pipeline_summary():
+    trace = {"tool": "pipeline_summary", "params": {}, "board": "Both boards"}
+    return _pipeline_summary(*await _afetch_columns(PIPELINE_COLUMNS, trace), trace)
+
+
+def _pipeline_summary(deals, work_orders, trace: dict) -> dict:
     summary = {
-        "total_deals": len(deals),
-        "open_deals": open_deals,
-        "total_deal_value_crores": crores(total_deal_value),
-        "deal_stage_distribution": stage_counts,
-        "deal_status_distribution": status_counts,
-        "total_work_orders": len(work_orders),
-        "wo_sector_distribution": sector_counts,
-        "wo_execution_status": exec_status_counts,
-        "total_billed_crores": crores(sum(safe_float(wo.get("Billed Value Incl GST")) for wo in work_orders)),
-        "total_collected_crores": crores(sum(safe_float(wo.get("Collected Amount")) for wo in work_orders)),
-        "total_receivable_crores": crores(sum(safe_float(wo.get("Amount Receivable")) for wo in work_orders)),
+        "total_deals": deals.size,
+        "open_deals": deals.count(deals.where("Deal Status", lambda s: str(s).strip().lower() == "open")),
+        "total_deal_value_crores": crores(deals.total("Masked Deal value")),
+        "deal_stage_distribution": deals.counts("Deal Stage"),
+        "deal_status_distribution": deals.counts("Deal Status"),
+        "total_work_orders": work_orders.size,
+        "wo_sector_distribution": work_orders.counts("Sector"),
+        "wo_execution_status": work_orders.counts("Execution Status"),
+        "total_billed_crores": crores(work_orders.total("Billed Value Incl GST")),
+        "total_collected_crores": crores(work_orders.total("Collected Amount")),
+        "total_receivable_crores": crores(work_orders.total("Amount Receivable")),
     }
-    trace["records_returned"] = len(deals) + len(work_orders)
+    trace["records_returned"] = deals.size + work_orders.size
     return {"data": summary, "trace": trace}
 
 
 # ─── TOOL 4: SECTOR ANALYSIS ──────────────────────────────────────────────────
 def tool_sector_analysis(sector):
     trace = {"tool": "sector_analysis", "params": {"sector": sector}, "board": "Both boards"}
-    all_deals = fetch_deals()
-    deals = [d for d in all_deals if d.get("Sector/service") and sector.lower() in str(d["Sector/service"]).lower()]
-    all_wo = fetch_work_orders()
-    work_orders = [d for d in all_wo if d.get("Sector") and sector.lower() in str(d["Sector"]).lower()]
-
-    deal_statuses = {}
-    for d in deals:
-        s = d.get("Deal Status") or "Unknown"
-        deal_statuses[s] = deal_statuses.get(s, 0) + 1
-
-    deal_stages = {}
-    for d in deals:
-        s = d.get("Deal Stage") or "Unknown"
-        deal_stages[s] = deal_stages.get(s, 0) + 1
-
-    wo_statuses = {}
-    for wo in work_orders:
-        s = wo.get("Execution Status") or "Unknown"
-        wo_statuses[s] = wo_statuses.get(s, 0) + 1
+    return _sector_analysis(sector, *_fetch_rollups(SECTOR_COLUMNS, trace), trace)
+
+
+async def atool_sector_analysis(sector):
+    trace = {"tool": "sector_analysis", "params": {"sector": sector}, "board": "Both boards"}
+    return _sector_analysis(sector, *await _afetch_rollups(SECTOR_COLUMNS, trace), trace)
+
+
+def _sector_analysis(sector, deals, work_orders, trace: dict) -> dict:
+    in_sector = lambda s: bool(s) and sector.lower() in str(s).lower()
+    deal_where = {"Sector/service": in_sector}
+    wo_where = {"Sector": in_sector}
 
     analysis = {
         "sector": sector,
-        "total_deals": len(deals),
-        "total_deal_value_crores": crores(sum(safe_float(d.get("Masked Deal value")) for d in deals)),
-        "deal_status_breakdown": deal_statuses,
-        "deal_stage_breakdown": deal_stages,
-        "total_work_orders": len(work_orders),
-        "total_billed_crores": crores(sum(safe_float(wo.get("Billed Value Incl GST")) for wo in work_orders)),
-        "total_receivable_crores": crores(sum(safe_float(wo.get("Amount Receivable")) for wo in work_orders)),
-        "total_collected_crores": crores(sum(safe_float(wo.get("Collected Amount")) for wo in work_orders)),
-        "wo_status_breakdown": wo_statuses,
+        "total_deals": deals.count(deal_where),
+        "total_deal_value_crores": crores(deals.total("Masked Deal value", deal_where)),
+        "deal_status_breakdown": deals.counts("Deal Status", deal_where),
+        "deal_stage_breakdown": deals.counts("Deal Stage", deal_where),
+        "total_work_orders": work_orders.count(wo_where),
+        "total_billed_crores": crores(work_orders.total("Billed Value Incl GST", wo_where)),
+        "total_receivable_crores": crores(work_orders.total("Amount Receivable", wo_where)),
+        "total_collected_crores": crores(work_orders.total("Collected Amount", wo_where)),
+        "wo_status_breakdown": work_orders.counts("Execution Status", wo_where),
     }
-    trace["records_returned"] = len(deals) + len(work_orders)
+    trace["records_returned"] = analysis["total_deals"] + analysis["total_work_orders"]
     return {"data": analysis, "trace": trace}
 
 
 # ─── TOOL 5: REVENUE ANALYSIS ─────────────────────────────────────────────────
+def _work_order_rollup(snapshot):
+    with span("rollup"):
+        return board_rollup(snapshot, WORK_ORDER_COLUMNS)
+
+
 def tool_revenue_analysis():
     trace = {"tool": "revenue_analysis", "params": {}, "board": "Work Orders board"}
-    work_orders = fetch_work_orders()
-
-    total_billed = sum(safe_float(wo.get("Billed Value Incl GST")) for wo in work_orders)
-    total_collected = sum(safe_float(wo.get("Collected Amount")) for wo in work_orders)
-
-    billing_status = {}
-    sector_revenue = {}
-    for wo in work_orders:
-        s = (wo.get("Billing Status") or wo.get("Invoice Status") or "Unknown").strip()
-        if s.lower() in ["billed", "biled", "bllied"]:
-            s = "Billed"
-        billing_status[s] = billing_status.get(s, 0) + 1
-        sector = wo.get("Sector") or "Unknown"
-        sector_revenue[sector] = sector_revenue.get(sector, 0) + safe_float(wo.get("Billed Value Incl GST"))
-
-    wo_status_counts = {}
-    for wo in work_orders:
-        s = wo.get("Execution Status") or "Unknown"
-        wo_status_counts[s] = wo_status_counts.get(s, 0) + 1
+    snapshot = _fetch_snapshots((WORK_ORDERS_BOARD_ID, WORK_ORDERS_SCHEMA, REVENUE_COLUMNS), trace=trace)[0]
+    return _revenue_analysis(_work_order_rollup(snapshot), trace)
+
+
+async def atool_revenue_analysis():
+    trace = {"tool": "revenue_analysis", "params": {}, "board": "Work Orders board"}
+    snapshot = (await _afetch_snapshots((WORK_ORDERS_BOARD_ID, WORK_ORDERS_SCHEMA, REVENUE_COLUMNS), trace=trace))[0]
+    return _revenue_analysis(await asyncio.to_thread(_work_order_rollup, snapshot), trace)
+
+
+def _revenue_analysis(work_orders, trace: dict) -> dict:
+    total_work_orders = work_orders.count()
+
+    total_billed = work_orders.total("Billed Value Incl GST")
+    total_collected = work_orders.total("Collected Amount")
 
     # Convert sector revenue to crores
+    sector_revenue = work_orders.sums_by("Sector", "Billed Value Incl GST")
     sector_revenue_crores = {k: crores(v) for k, v in sector_revenue.items()}
 
     analysis = {
-        "total_contract_value_crores": crores(sum(safe_float(wo.get("Amount Incl GST")) for wo in work_orders)),
+        "total_contract_value_crores": crores(work_orders.total("Amount Incl GST")),
         "total_billed_crores": crores(total_billed),
         "total_collected_crores": crores(total_collected),
-        "total_receivable_crores": crores(sum(safe_float(wo.get("Amount Receivable")) for wo in work_orders)),
-        "total_unbilled_crores": crores(sum(safe_float(wo.get("Amount to Bill Incl GST")) for wo in work_orders)),
+        "total_receivable_crores": crores(work_orders.total("Amount Receivable")),
+        "total_unbilled_crores": crores(work_orders.total("Amount to Bill Incl GST")),
         "collection_rate_pct": round((total_collected / total_billed * 100) if total_billed > 0 else 0, 1),
-        "billing_status_breakdown": billing_status,
+        "billing_status_breakdown": work_orders.counts("Billing Status"),
         "revenue_by_sector_crores": sector_revenue_crores,
-        "execution_status_breakdown": wo_status_counts,
-        "total_work_orders": len(work_orders),
+        "execution_status_breakdown": work_orders.counts("Execution Status"),
+        "total_work_orders": total_work_orders,
     }
-    trace["records_returned"] = len(work_orders)
+    trace["records_returned"] = total_work_orders
     return {"data": analysis, "trace": trace}
 
 
@@ -212,20 +342,33 @@ TOOLS = {
     "revenue_analysis": tool_revenue_analysis,
 }
 
+# The same tools as coroutines, for the async agent runtime
+ATOOLS = {
+    "get_work_orders": atool_get_work_orders,
+    "get_deals": atool_get_deals,
+    "pipeline_summary": atool_pipeline_summary,
+    "sector_analysis": atool_sector_analysis,
+    "revenue_analysis": atool_revenue_analysis,
+}
+
 TOOL_DESCRIPTIONS = """
 You have access to these tools. Call them by responding ONLY with JSON like:
 {"tool": "tool_name", "params": {"key": "value"}}
 
-1. get_work_orders(sector=None, status=None)
+1. get_work_orders(sector=None, status=None, offset=0)
    - Known sectors: Mining, Powerline, Renewables, Railways, Tender, DSP
    - Known statuses: Completed, Not Started, Ongoing, Executed until current month
 
-2. get_deals(sector=None, stage=None, status=None)
+2. get_deals(sector=None, stage=None, status=None, offset=0)
    - Known stages: Sales Qualified Leads, Proposal/Commercials Sent, Feasibility,
      Work Order Received, Negotiations, Demo Done, Lead Generated,
      Project Won, Project Lost, Projects On Hold
    - Known statuses: Open, On Hold, Dead
 
+   Both return {"columns": [...], "rows": [[...], ...]}. Large results instead carry exact
+   "summary" totals/counts over ALL rows, the "top" rows by value and one page of rows;
+   call again with offset=next_offset to see the next page. Use the summary for totals.
+
 3. pipeline_summary()
    - Full overview: deals, work orders, revenue — all values already in crores
 
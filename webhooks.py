@@ -0,0 +1,111 @@
+import hmac
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+from boards import SERVICE, BoardService
+from telemetry import METRICS, span
+
+# monday's event "type" for each webhook subscription we handle
+CREATE_EVENTS = {"create_pulse", "create_item"}
+CHANGE_EVENTS = {"update_column_value", "change_column_value", "change_status_column_value", "change_name"}
+DELETE_EVENTS = {"delete_pulse", "item_deleted"}
+
+
+def value_text(value):
+    """monday's display text for a column value as webhooks send it (JSON, not the text field)"""
+    if value is None or isinstance(value, str):
+        return value
+    if not isinstance(value, dict):
+        return str(value)
+    if "label" in value:  # status: {"label": {"index": 1, "text": "Done"}}
+        label = value["label"]
+        return label.get("text") if isinstance(label, dict) else label
+    if "chosenValues" in value:  # dropdown
+        return ", ".join(choice.get("name", "") for choice in value["chosenValues"] or [])
+    if "date" in value:
+        return value["date"]
+    for key in ("value", "text", "name"):
+        if key in value:
+            return None if value[key] is None else str(value[key])
+    return None
+
+
+def apply_event(event: dict, service: BoardService = SERVICE) -> str:
+    """Apply one monday webhook event to the held board snapshots; returns what happened to it"""
+    kind = event.get("type")
+    board_id = event.get("boardId")
+    item_id = event.get("pulseId") or event.get("itemId")
+    with span("webhook", event=kind) as attrs:
+        if board_id is None or item_id is None:
+            result = "ignored"
+        elif kind in CREATE_EVENTS:
+            values = {column_id: value_text(value) for column_id, value in (event.get("columnValues") or {}).items()}
+            result = service.apply_item(board_id, item_id, values, name=event.get("pulseName"))
+        elif kind in CHANGE_EVENTS and event.get("columnId") == "name":
+            result = service.apply_item(board_id, item_id, {}, name=value_text(event.get("value")))
+        elif kind in CHANGE_EVENTS:
+            result = service.apply_item(board_id, item_id, {event.get("columnId"): value_text(event.get("value"))})
+        elif kind in DELETE_EVENTS:
+            result = service.remove_item(board_id, item_id)
+        else:
+            result = "ignored"
+        attrs["result"] = result
+    METRICS.count("bi_agent_webhook_events_total", 1, "monday webhook events received", type=kind, result=result)
+    return result
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def start_webhook_server(port: int, token: str = "", host: str = None, service: BoardService = SERVICE):
+    """Receive monday webhooks at http://host:port/ from a daemon thread (once per process).
+
+    Answers the challenge handshake monday sends when a webhook is created. With a
+    ``token``, requests must carry it as ?token=... in the registered webhook URL.
+    The default host is every interface with a token and 127.0.0.1 without one,
+    so anyone who can reach the port can't rewrite the snapshots; a public host
+    without a token is refused.
+    """
+    global _server
+    if host is None:
+        host = "0.0.0.0" if token else "127.0.0.1"
+    elif not token and host not in ("127.0.0.1", "localhost", "::1"):
+        raise ValueError(f"webhook server on {host} needs a token; set WEBHOOK_TOKEN")
+    with _server_lock:
+        if _server is not None:
+            return _server
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                supplied = parse_qs(urlparse(self.path).query).get("token", [""])[0]
+                if token and not hmac.compare_digest(supplied, token):
+                    self.send_error(403)
+                    return
+                try:
+                    body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                except ValueError:
+                    self.send_error(400)
+                    return
+                if "challenge" in body:
+                    reply = {"challenge": body["challenge"]}
+                elif isinstance(body.get("event"), dict):
+                    reply = {"result": apply_event(body["event"], service)}
+                else:
+                    self.send_error(400)
+                    return
+                payload = json.dumps(reply).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        _server = ThreadingHTTPServer((host, port), Handler)
+        _server.daemon_threads = True
+        threading.Thread(target=_server.serve_forever, name="webhook-server", daemon=True).start()
+        return _server